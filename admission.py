@@ -0,0 +1,240 @@
+"""
+Control de admisión para la API
+Rate limiting por cliente (token bucket), límite global de concurrencia con
+cola de espera acotada y respuestas rápidas 429/503 con Retry-After
+"""
+import asyncio
+import hashlib
+import ipaddress
+import json
+import math
+import os
+import time
+from collections import OrderedDict
+
+class TokenBucket:
+    """Token bucket clásico: `rate` tokens por segundo, ráfagas de hasta `burst`"""
+
+    __slots__ = ('rate', 'burst', 'tokens', 'updated')
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self):
+        """
+        Intenta consumir un token
+
+        Returns:
+            0 si se consumió, o los segundos a esperar hasta el próximo token
+        """
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+class AdmissionController:
+    """
+    Estado y política de admisión (compartido entre el middleware y /stats)
+
+    Args:
+        paths: Rutas protegidas, exactas o como prefijo de segmento ('/chat' cubre
+            '/chat' y '/chat/...', no '/chatx'); el resto pasa sin control
+        rate: Peticiones por segundo permitidas por cliente
+        burst: Ráfaga máxima por cliente
+        max_concurrency: Peticiones procesándose a la vez en el proceso
+        max_queue: Peticiones que pueden esperar un hueco antes de rechazar
+        queue_timeout: Segundos máximos de espera en la cola
+        max_clients: Buckets de clientes que se guardan en memoria (LRU)
+        on_reject: Callback opcional on_reject(reason) al rechazar ('rate_limit' u 'overload')
+        trusted_proxies: IPs o redes (CIDR) de proxies cuyo X-Forwarded-For se acepta
+            (por defecto TRUSTED_PROXIES, separadas por comas; vacío = ninguno)
+        api_keys: Claves con bucket propio, enviadas en X-API-Key o Authorization: Bearer
+            (por defecto RATE_LIMIT_API_KEYS, separadas por comas). Una clave
+            desconocida no cuenta: el cliente se limita por IP
+    """
+
+    def __init__(self, paths=('/chat',), rate=None, burst=None,
+                 max_concurrency=None, max_queue=None, queue_timeout=None,
+                 max_clients=10000, on_reject=None, trusted_proxies=None, api_keys=None):
+        self.paths = tuple(path.rstrip('/') or '/' for path in paths)
+        self.rate = rate if rate is not None else float(os.getenv('RATE_LIMIT_PER_SECOND', '1'))
+        self.burst = burst if burst is not None else float(os.getenv('RATE_LIMIT_BURST', '5'))
+        self.max_concurrency = max_concurrency if max_concurrency is not None else int(os.getenv('MAX_CONCURRENT_REQUESTS', '16'))
+        self.max_queue = max_queue if max_queue is not None else int(os.getenv('MAX_QUEUED_REQUESTS', '32'))
+        self.queue_timeout = queue_timeout if queue_timeout is not None else float(os.getenv('QUEUE_TIMEOUT_SECONDS', '10'))
+        self.max_clients = max_clients
+        self.on_reject = on_reject
+        if trusted_proxies is None:
+            trusted_proxies = [p for p in os.getenv('TRUSTED_PROXIES', '').split(',') if p.strip()]
+        self.trusted_proxies = [ipaddress.ip_network(p.strip(), strict=False) for p in trusted_proxies]
+        if api_keys is None:
+            api_keys = os.getenv('RATE_LIMIT_API_KEYS', '').split(',')
+        # Solo se guardan hashes: la clave en claro no queda en memoria ni en los buckets
+        self.api_keys = {self._key_digest(key.strip()) for key in api_keys if key.strip()}
+
+        self._buckets = OrderedDict()
+        self._semaphore = None
+        self.active = 0
+        self.waiting = 0
+        self.rejected_rate = 0
+        self.rejected_overload = 0
+
+    @staticmethod
+    def _key_digest(key):
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]
+
+    def _matches(self, path):
+        """True si la ruta es una de las protegidas o está debajo de ella"""
+        return any(path == prefix or path.startswith(prefix.rstrip('/') + '/') for prefix in self.paths)
+
+    def _api_key(self, headers):
+        """Digest de la clave enviada si es una de las configuradas, si no None"""
+        key = headers.get(b'x-api-key', b'')
+        auth = headers.get(b'authorization', b'')
+        if not key and auth.lower().startswith(b'bearer '):
+            key = auth[7:]
+        key = key.decode('latin-1').strip()
+        if not key or not self.api_keys:
+            return None
+        digest = self._key_digest(key)
+        return digest if digest in self.api_keys else None
+
+    def _is_trusted(self, ip):
+        try:
+            address = ipaddress.ip_address(ip)
+        except ValueError:
+            return False
+        return any(address in network for network in self.trusted_proxies)
+
+    def _client_key(self, scope):
+        """
+        Identifica al cliente: una clave de RATE_LIMIT_API_KEYS si la envía, si
+        no la IP de la conexión. Las cabeceras las controla el cliente, así que
+        X-Forwarded-For solo se usa si la conexión viene de un proxy de
+        confianza: se recorre de derecha a izquierda saltando proxies de
+        confianza y se toma la primera IP que no lo es
+        """
+        headers = dict(scope.get('headers') or [])
+        api_key = self._api_key(headers)
+        if api_key is not None:
+            return 'key:' + api_key
+
+        client = scope.get('client')
+        peer = client[0] if client else 'unknown'
+        if not self.trusted_proxies or not self._is_trusted(peer):
+            return 'ip:' + peer
+
+        forwarded = headers.get(b'x-forwarded-for', b'').decode('latin-1')
+        hops = [hop.strip() for hop in forwarded.split(',') if hop.strip()]
+        for hop in reversed(hops):
+            if not self._is_trusted(hop):
+                try:
+                    return 'ip:' + str(ipaddress.ip_address(hop))
+                except ValueError:
+                    # Valor inválido inyectado antes del proxy: usar el último salto conocido
+                    break
+            peer = hop
+        return 'ip:' + peer
+
+    def _bucket(self, key):
+        """Obtiene (o crea) el bucket del cliente manteniendo el LRU acotado"""
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(self.rate, self.burst)
+            self._buckets[key] = bucket
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket
+
+    async def _reject(self, send, status_code, detail, retry_after):
+        """Responde inmediatamente con JSON y cabecera Retry-After"""
+        if self.on_reject is not None:
+            self.on_reject('rate_limit' if status_code == 429 else 'overload')
+        body = json.dumps({'detail': detail}, ensure_ascii=False).encode('utf-8')
+        await send({
+            'type': 'http.response.start',
+            'status': status_code,
+            'headers': [
+                (b'content-type', b'application/json'),
+                (b'content-length', str(len(body)).encode()),
+                (b'retry-after', str(max(1, math.ceil(retry_after))).encode()),
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def handle(self, app, scope, receive, send):
+        """Admite, encola o rechaza la petición antes de pasarla a `app`"""
+        if scope['type'] != 'http' or scope.get('method') == 'OPTIONS' or not self._matches(scope['path']):
+            await app(scope, receive, send)
+            return
+
+        # 1. Rate limit por cliente
+        wait = self._bucket(self._client_key(scope)).take()
+        if wait > 0:
+            self.rejected_rate += 1
+            await self._reject(send, 429, "Demasiadas peticiones, intenta de nuevo en unos segundos", wait)
+            return
+
+        # 2. Límite global de concurrencia con cola acotada
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        # Se cuenta con active + waiting (no con el semáforo) porque la adquisición
+        # es asíncrona y varias peticiones pueden llegar antes de que se refleje
+        if self.active + self.waiting >= self.max_concurrency + self.max_queue:
+            self.rejected_overload += 1
+            await self._reject(send, 503, "Servidor saturado, intenta de nuevo en unos segundos", self.queue_timeout)
+            return
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected_overload += 1
+            await self._reject(send, 503, "Servidor saturado, intenta de nuevo en unos segundos", self.queue_timeout)
+            return
+        finally:
+            self.waiting -= 1
+
+        self.active += 1
+        try:
+            await app(scope, receive, send)
+        finally:
+            self.active -= 1
+            self._semaphore.release()
+
+    def stats(self):
+        """Estado actual del control de admisión"""
+        return {
+            'active': self.active,
+            'waiting': self.waiting,
+            'max_concurrency': self.max_concurrency,
+            'max_queue': self.max_queue,
+            'rejected_rate_limit': self.rejected_rate,
+            'rejected_overload': self.rejected_overload,
+            'tracked_clients': len(self._buckets),
+        }
+
+class AdmissionControlMiddleware:
+    """
+    Middleware ASGI que aplica un AdmissionController
+
+    Args:
+        app: Aplicación ASGI
+        controller: AdmissionController a usar (se crea uno por defecto si no se pasa)
+    """
+
+    def __init__(self, app, controller=None):
+        self.app = app
+        self.controller = controller or AdmissionController()
+
+    async def __call__(self, scope, receive, send):
+        await self.controller.handle(self.app, scope, receive, send)
@@ -6,11 +6,11 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Optional
-import os
 from dotenv import load_dotenv
 from pathlib import Path
 import chromadb
-from langchain_openai import AzureOpenAIEmbeddings, AzureChatOpenAI
+from azure_clients import get_azure_config, create_embeddings, create_chat_llm, aclose_http_clients
+from health_state import HealthState
 from langchain_core.messages import SystemMessage, HumanMessage
 
 load_dotenv()
@@ -48,13 +48,19 @@ class ChatResponse(BaseModel):
 # Variables globales para el chatbot
 llm = None
 embeddings = None
+collection = None
 get_relevant_chunks_fn = None
 
+# Conteo del vector store refrescado en segundo plano (/api/stats no abre clientes)
+health = HealthState({
+    'collection_count': lambda: collection.count() if collection is not None else None,
+})
+
 def initialize_chatbot():
     """
     Inicializa el chatbot con el vector store y LLM
     """
-    global llm, embeddings, get_relevant_chunks_fn
+    global llm, embeddings, collection, get_relevant_chunks_fn
     
     try:
         # Verificar que existe el vector store
@@ -73,38 +79,20 @@ def initialize_chatbot():
             return False
         
         # Inicializar embeddings con Azure OpenAI
-        azure_endpoint = os.getenv('AZURE_OPENAI_ENDPOINT')
-        azure_api_key = os.getenv('AZURE_OPENAI_API_KEY')
-        api_version = os.getenv('AZURE_OPENAI_API_VERSION', '2024-12-01-preview')
+        config = get_azure_config(default_api_version='2024-12-01-preview')
         
         # Validar configuración de Azure OpenAI
-        if not azure_endpoint:
+        if not config['azure_endpoint']:
             print("❌ AZURE_OPENAI_ENDPOINT no está configurado en .env")
             return False
         
-        if not azure_api_key:
+        if not config['api_key']:
             print("❌ AZURE_OPENAI_API_KEY no está configurado en .env")
             return False
         
-        # Inicializar embeddings
-        embedding_deployment = os.getenv('AZURE_OPENAI_EMBEDDING_DEPLOYMENT', 'text-embedding-ada-002')
-        embeddings = AzureOpenAIEmbeddings(
-            azure_endpoint=azure_endpoint,
-            api_key=azure_api_key,
-            api_version=api_version,
-            azure_deployment=embedding_deployment
-        )
-        
-        # Inicializar LLM con Azure OpenAI
-        chat_deployment = os.getenv('AZURE_OPENAI_CHAT_DEPLOYMENT', 'gpt-4o-mini')
-        llm = AzureChatOpenAI(
-            azure_endpoint=azure_endpoint,
-            api_key=azure_api_key,
-            api_version=api_version,
-            azure_deployment=chat_deployment,
-            temperature=0.7,
-            max_tokens=1500
-        )
+        # Inicializar embeddings y LLM (pool HTTP compartido)
+        embeddings = create_embeddings(config=config)
+        llm = create_chat_llm(config=config, temperature=0.7, max_tokens=1500)
         
         # Función para obtener chunks relevantes
         def get_relevant_chunks(query, n_results=5):
@@ -135,6 +123,12 @@ def initialize_chatbot():
 @app.on_event("startup")
 async def startup_event():
     initialize_chatbot()
+    health.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    health.stop()
+    await aclose_http_clients()
 
 # Endpoints
 @app.get("/")
@@ -197,7 +191,9 @@ Responde de manera natural y conversacional:"""
             {
                 "title": meta.get('title', 'Sin título'),
                 "video_id": meta.get('video_id', ''),
-                "chunk_id": meta.get('chunk_id', '')
+                "chunk_id": meta.get('chunk_id', ''),
+                "url": meta.get('url'),
+                "time_range": meta.get('time_range')
             }
             for meta in metadatas
         ]
@@ -213,23 +209,18 @@ Responde de manera natural y conversacional:"""
 
 @app.get("/api/stats")
 async def get_stats():
-    """Obtener estadísticas del vector store"""
-    try:
-        persist_directory = "./chroma_db"
-        client = chromadb.PersistentClient(path=persist_directory)
-        collection = client.get_collection("luisito_transcripts")
-        
-        count = collection.count()
-        
-        return {
-            "total_chunks": count,
-            "status": "ready"
-        }
-    except Exception as e:
+    """Obtener estadísticas del vector store (desde memoria)"""
+    count = health.snapshot().get('collection_count')
+    if not isinstance(count, int):
         return {
-            "error": str(e),
+            "error": count.get('error') if isinstance(count, dict) else "Vector store no inicializado",
             "status": "not_ready"
         }
+    
+    return {
+        "total_chunks": count,
+        "status": "ready"
+    }
 
 if __name__ == "__main__":
     import uvicorn
@@ -2,18 +2,35 @@
 API REST para el chatbot de Luisito Comunica
 Usa FastAPI para servir endpoints que pueden ser consumidos por React/Next.js
 """
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Response
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import List, Optional
 import os
+import threading
+import time
 from dotenv import load_dotenv
 from pathlib import Path
 import chromadb
-from langchain_openai import AzureOpenAIEmbeddings, AzureChatOpenAI
+from azure_clients import get_azure_config, create_embeddings, create_chat_llm, aclose_http_clients
+from singleflight import SingleFlight, normalize_query
+from admission import AdmissionController, AdmissionControlMiddleware
+from shared_cache import SharedCache
+from quantized_store import VECTOR_BACKEND, INDEX_DIR, QuantizedIndex, index_exists
+from index_version import read_index_version
+from health_state import HealthState, http_reachable
+from reranking import rerank, RERANK_ENABLED, RERANK_CANDIDATES
+import metrics
+import query_log
+from suggested_questions import SUGGESTED_QUESTIONS
+from tracing import init_tracing, span, set_attributes
+from openai import RateLimitError
 from langchain_core.messages import SystemMessage, HumanMessage
 
 load_dotenv()
+init_tracing('api')
 
 app = FastAPI(
     title="Luisito Comunica Chatbot API",
@@ -21,6 +38,11 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Control de admisión: rate limit por cliente y límite global de concurrencia
+# (se registra antes que CORS para que los 429/503 también lleven cabeceras CORS)
+admission = AdmissionController(paths=("/chat",), on_reject=metrics.record_rejected)
+app.add_middleware(AdmissionControlMiddleware, controller=admission)
+
 # Configurar CORS para permitir requests desde React/Next.js
 app.add_middleware(
     CORSMiddleware,
@@ -43,6 +65,9 @@ class Source(BaseModel):
     title: str
     video_id: Optional[str] = None
     url: Optional[str] = None
+    start_seconds: Optional[float] = None
+    end_seconds: Optional[float] = None
+    time_range: Optional[str] = None
 
 class ChatResponse(BaseModel):
     response: str
@@ -57,67 +82,190 @@ class HealthResponse(BaseModel):
 # Globales para inicialización
 llm = None
 embeddings = None
+embedding_deployment = None
 collection = None
 initialized = False
 
-def initialize_chatbot():
-    """Inicializa el chatbot con vector store y LLM"""
-    global llm, embeddings, collection, initialized
-    
-    if initialized:
-        return True
+# Estado de salud refrescado en segundo plano: las sondas y /stats no hacen I/O
+def vector_store_probe():
+    directory = vector_store_directory()
+    return {
+        'exists': Path(directory).exists(),
+        'version': read_index_version(directory),
+        'loaded_version': loaded_index_version,
+    }
+
+health = HealthState({
+    'vector_store': vector_store_probe,
+    'collection_count': lambda: collection.count() if collection is not None else None,
+    'azure_openai': lambda: http_reachable(os.getenv('AZURE_OPENAI_ENDPOINT')),
+    'cache_sizes': lambda: {'query_embeddings': embedding_cache.size(), 'answers': answer_cache.size()},
+})
+
+# Calentamiento en el arranque: hasta que termina /health no reporta listo
+WARMUP_ENABLED = os.getenv('WARMUP_ENABLED', 'true').lower() == 'true'
+WARMUP_POPULAR_QUERIES = int(os.getenv('WARMUP_POPULAR_QUERIES', '10'))
+WARMUP_WORKERS = int(os.getenv('WARMUP_WORKERS', '4'))
+# Tiempo que una pregunta queda reservada por el worker que la precalcula
+WARMUP_CLAIM_TTL = int(os.getenv('WARMUP_CLAIM_TTL', '300'))
+warmed_up = False
+
+# Recarga del índice cuando el scheduler publica una versión nueva
+INDEX_CHECK_INTERVAL_SECONDS = float(os.getenv('INDEX_CHECK_INTERVAL_SECONDS', '30'))
+loaded_index_version = None
+last_index_check = 0.0
+reload_lock = threading.Lock()
+
+# Preguntas idénticas en vuelo comparten una sola llamada a retrieval + LLM
+chat_flight = SingleFlight()
+
+# Cachés compartidas entre workers (SQLite local en modo WAL)
+CACHE_DB_PATH = os.getenv('CACHE_DB_PATH', './cache/api_cache.sqlite3')
+embedding_cache = SharedCache(CACHE_DB_PATH, 'query_embeddings', ttl=None)
+answer_cache = SharedCache(CACHE_DB_PATH, 'answers', ttl=int(os.getenv('ANSWER_CACHE_TTL', '3600')))
+warmup_claims = SharedCache(CACHE_DB_PATH, 'warmup_claims', ttl=WARMUP_CLAIM_TTL)
+
+# Métricas de este worker
+requests_served = 0
+
+# Registro de consultas para análisis offline (escritura por lotes en segundo plano)
+query_logger = query_log.QueryLog() if query_log.ENABLED else None
+metrics.add_stage_observer(query_log.record_stage)
+
+def vector_store_directory():
+    """Directorio del vector store según el backend (ChromaDB o índice int8)"""
+    return INDEX_DIR if VECTOR_BACKEND == 'int8' else "./chroma_db"
+
+def preload_vector_store(persist_directory=None):
+    """
+    Prepara el vector store antes de crear los workers (gunicorn preload)
+    Descarga el snapshot una sola vez y lee los archivos del índice para que
+    queden en la page cache del sistema, compartida por todos los procesos
     
-    try:
-        # Intentar descargar ChromaDB desde Azure si no existe
-        persist_directory = "./chroma_db"
-        if not Path(persist_directory).exists():
-            print("📥 ChromaDB no existe localmente, intentando descargar desde Azure...")
-            try:
-                from download_chromadb_from_azure import download_chromadb_from_azure
-                if not download_chromadb_from_azure():
-                    print("❌ No se pudo descargar el vector store")
-                    return False
-            except Exception as e:
-                print(f"⚠️  Error en descarga: {e}")
+    Returns:
+        bool: True si el vector store está disponible localmente
+    """
+    persist_directory = persist_directory or vector_store_directory()
+    # docker-compose monta el volumen aunque esté vacío: se comprueban los archivos, no el directorio
+    if VECTOR_BACKEND == 'int8':
+        available = index_exists(persist_directory)
+    else:
+        available = (Path(persist_directory) / 'chroma.sqlite3').is_file()
+    if not available:
+        print("📥 Vector store no existe localmente, intentando descargar desde Azure...")
+        try:
+            from download_chromadb_from_azure import download_chromadb_from_azure, download_quantized_index
+            download = download_quantized_index if VECTOR_BACKEND == 'int8' else download_chromadb_from_azure
+            if not download():
+                print("❌ No se pudo descargar el vector store")
                 return False
-        
-        # Cargar vector store desde ChromaDB local
+        except Exception as e:
+            print(f"⚠️  Error en descarga: {e}")
+            return False
+    
+    total_bytes = 0
+    for file_path in Path(persist_directory).rglob('*'):
+        if file_path.is_file():
+            with open(file_path, 'rb') as f:
+                while chunk := f.read(1024 * 1024):
+                    total_bytes += len(chunk)
+    print(f"✅ Vector store precargado en page cache ({total_bytes / 1024 / 1024:.1f} MB)")
+    return True
+
+def load_collection(persist_directory):
+    """
+    Abre el vector store del backend configurado y registra su versión
+    
+    Returns:
+        Collection de ChromaDB o QuantizedIndex, None si no existe la collection
+    """
+    global loaded_index_version
+    
+    version = read_index_version(persist_directory)
+    if VECTOR_BACKEND == 'int8':
+        # Índice int8 en memoria; expone query()/count() como una collection
+        loaded = QuantizedIndex.load(persist_directory)
+        print(f"🗜️  Índice int8 cargado: {loaded.count()} vectores")
+    else:
+        # Cargar vector store desde ChromaDB local (cada worker abre su propio
+        # cliente después del fork; SQLite y hnswlib no son seguros entre procesos)
         client = chromadb.PersistentClient(path=persist_directory)
         
         try:
-            collection = client.get_collection("luisito_transcripts")
+            loaded = client.get_collection("luisito_transcripts")
         except:
             print("❌ No se encontró la collection 'luisito_transcripts'")
+            return None
+    
+    loaded_index_version = version
+    return loaded
+
+def maybe_reload_collection():
+    """
+    Recarga el vector store si el scheduler publicó una versión nueva
+    Se comprueba como mucho cada INDEX_CHECK_INTERVAL_SECONDS; las consultas
+    en curso siguen usando la collection anterior hasta que se reemplaza
+    """
+    global collection, last_index_check
+    
+    now = time.monotonic()
+    if now - last_index_check < INDEX_CHECK_INTERVAL_SECONDS:
+        return
+    # Solo un thread comprueba; los demás siguen con la collection actual
+    if not reload_lock.acquire(blocking=False):
+        return
+    try:
+        last_index_check = now
+        persist_directory = vector_store_directory()
+        version = read_index_version(persist_directory)
+        if version is None or version == loaded_index_version:
+            return
+        
+        if VECTOR_BACKEND != 'int8':
+            # El cliente de ChromaDB guarda en caché el índice HNSW por ruta:
+            # sin limpiarla no se verían los chunks que escribió otro proceso
+            from chromadb.api.client import SharedSystemClient
+            clear_cache = getattr(SharedSystemClient, 'clear_system_cache', None)
+            if clear_cache:
+                clear_cache()
+        
+        with span('vector_store.reload', backend=VECTOR_BACKEND):
+            reloaded = load_collection(persist_directory)
+        if reloaded is not None:
+            collection = reloaded
+            health.request_refresh()
+            print(f"🔄 Vector store recargado (versión {version})")
+    except Exception as e:
+        print(f"⚠️  Error recargando vector store: {e}")
+    finally:
+        reload_lock.release()
+
+def initialize_chatbot():
+    """Inicializa el chatbot con vector store y LLM"""
+    global llm, embeddings, embedding_deployment, collection, initialized
+    
+    if initialized:
+        return True
+    
+    try:
+        # Intentar descargar el vector store desde Azure si no existe
+        persist_directory = vector_store_directory()
+        if not Path(persist_directory).exists() and not preload_vector_store(persist_directory):
             return False
         
-        # Inicializar embeddings con Azure OpenAI
-        azure_endpoint = os.getenv('AZURE_OPENAI_ENDPOINT')
-        azure_api_key = os.getenv('AZURE_OPENAI_API_KEY')
-        api_version = os.getenv('AZURE_OPENAI_API_VERSION', '2024-02-15-preview')
+        collection = load_collection(persist_directory)
+        if collection is None:
+            return False
         
-        if not azure_endpoint or not azure_api_key:
+        # Inicializar embeddings y LLM con Azure OpenAI (pool HTTP compartido)
+        config = get_azure_config()
+        if not config['azure_endpoint'] or not config['api_key']:
             print("❌ Azure OpenAI no configurado correctamente")
             return False
         
-        # Inicializar embeddings
-        embedding_deployment = os.getenv('AZURE_OPENAI_EMBEDDING_DEPLOYMENT', 'text-embedding-ada-002')
-        embeddings = AzureOpenAIEmbeddings(
-            azure_endpoint=azure_endpoint,
-            api_key=azure_api_key,
-            api_version=api_version,
-            azure_deployment=embedding_deployment
-        )
-        
-        # Inicializar LLM con Azure OpenAI
-        chat_deployment = os.getenv('AZURE_OPENAI_CHAT_DEPLOYMENT', 'gpt-4o-mini')
-        llm = AzureChatOpenAI(
-            azure_endpoint=azure_endpoint,
-            api_key=azure_api_key,
-            api_version=api_version,
-            azure_deployment=chat_deployment,
-            temperature=0.7,
-            max_tokens=1500
-        )
+        embedding_deployment = config['embedding_deployment']
+        embeddings = create_embeddings(config=config)
+        llm = create_chat_llm(config=config, temperature=0.7, max_tokens=1500)
         
         initialized = True
         print("✅ Chatbot inicializado correctamente")
@@ -127,16 +275,113 @@ def initialize_chatbot():
         print(f"❌ Error inicializando chatbot: {e}")
         return False
 
+def warmup_questions():
+    """Preguntas sugeridas más las más frecuentes del query log (sin repetir)"""
+    questions = list(SUGGESTED_QUESTIONS)
+    if WARMUP_POPULAR_QUERIES:
+        try:
+            questions += query_log.popular_queries(limit=WARMUP_POPULAR_QUERIES)
+        except Exception as e:
+            print(f"⚠️  No se pudo leer el query log: {e}")
+    
+    unique = {}
+    for question in questions:
+        unique.setdefault(normalize_query(question), question)
+    return list(unique.values())
+
+def warm_up():
+    """
+    Deja el worker listo para que la primera petición real sea tan rápida como las demás:
+    carga el índice HNSW en memoria con una consulta, abre las conexiones a
+    Azure OpenAI (TLS + pool) y precalcula embeddings y respuestas de las
+    preguntas sugeridas en las cachés compartidas
+    """
+    global warmed_up
+    
+    if not WARMUP_ENABLED or not initialized:
+        warmed_up = initialized
+        return
+    
+    start = time.perf_counter()
+    questions = warmup_questions()
+    try:
+        with span('warmup', questions=len(questions)):
+            # Llamada directa (sin caché) para abrir la conexión TLS del pool con Azure
+            with span('warmup.connection'):
+                query_embedding = embeddings.embed_query(questions[0])
+            # Una consulta carga el índice HNSW (ChromaDB lo lee de disco de forma perezosa)
+            with span('warmup.index'):
+                collection.query(query_embeddings=[query_embedding], n_results=1, include=['distances'])
+            print(f"🔥 Índice y embeddings listos ({time.perf_counter() - start:.1f}s)")
+            
+            # Preguntas sin respuesta en caché (un arranque reciente pudo haberlas
+            # calculado ya). Cada una la reclama un solo worker, así N workers no
+            # repiten las mismas llamadas al LLM; se resuelven en paralelo
+            pending = [
+                q for q in questions
+                if answer_cache.get(answer_cache_key(q)) is None and warmup_claims.claim(answer_cache_key(q))
+            ]
+            if pending:
+                from concurrent.futures import ThreadPoolExecutor
+                with ThreadPoolExecutor(max_workers=WARMUP_WORKERS) as executor:
+                    list(executor.map(answer_query, pending))
+            print(f"🔥 Calentamiento completo: {len(pending)} respuestas precalculadas, "
+                  f"{len(questions) - len(pending)} en caché o a cargo de otro worker "
+                  f"({time.perf_counter() - start:.1f}s)")
+    except Exception as e:
+        # Un fallo (ej. cuota de Azure) no debe dejar el worker fuera de servicio
+        print(f"⚠️  Calentamiento incompleto: {e}")
+    finally:
+        warmed_up = True
+
 def get_relevant_chunks(query, n_results=5):
     """Busca chunks relevantes en el vector store"""
-    query_embedding = embeddings.embed_query(query)
-    results = collection.query(
-        query_embeddings=[query_embedding],
-        n_results=n_results
-    )
+    maybe_reload_collection()
+    
+    # El embedding de la pregunta se reutiliza entre workers y reinicios
+    cache_key = f"{embedding_deployment}:{normalize_query(query)}"
+    query_embedding = embedding_cache.get(cache_key)
+    metrics.record_cache('query_embedding', query_embedding is not None)
+    if query_embedding is None:
+        with metrics.observe_stage('embed_query'), span('embed.query', deployment=embedding_deployment):
+            query_embedding = embeddings.embed_query(query)
+        embedding_cache.set(cache_key, query_embedding)
+    
+    # Se piden más candidatos de los necesarios y se re-ordenan localmente
+    n_candidates = max(n_results, RERANK_CANDIDATES) if RERANK_ENABLED else n_results
+    include = ['documents', 'metadatas', 'distances']
+    if RERANK_ENABLED:
+        include.append('embeddings')
+    
+    with metrics.observe_stage('vector_query'), span('chroma.query', n_results=n_candidates, backend=VECTOR_BACKEND):
+        results = collection.query(
+            query_embeddings=[query_embedding],
+            n_results=n_candidates,
+            include=include
+        )
     
+    ids = results['ids'][0]
     documents = results['documents'][0]
     metadatas = results['metadatas'][0]
+    distances = results['distances'][0]
+    
+    if RERANK_ENABLED and documents:
+        with metrics.observe_stage('rerank'), span('rerank', candidates=len(documents)):
+            order = rerank(
+                query,
+                documents,
+                metadatas,
+                distances,
+                embeddings=(results.get('embeddings') or [None])[0],
+                k=n_results
+            )
+        ids = [ids[i] for i in order]
+        documents = [documents[i] for i in order]
+        metadatas = [metadatas[i] for i in order]
+        distances = [distances[i] for i in order]
+    
+    metrics.record_retrieval(len(documents))
+    query_log.annotate(chunk_ids=ids, distances=[round(float(d), 4) for d in distances])
     
     return documents, metadatas
 
@@ -176,50 +421,161 @@ Instrucciones:
             SystemMessage(content=system_prompt),
             HumanMessage(content=user_prompt)
         ]
-        response = llm.invoke(messages).content
+        with metrics.observe_stage('llm'), span('llm.invoke') as llm_span:
+            llm_result = llm.invoke(messages)
+            # Los atributos se agregan antes de cerrar el span
+            token_usage = llm_result.response_metadata.get('token_usage') or {}
+            set_attributes(
+                llm_span,
+                prompt_tokens=token_usage.get('prompt_tokens'),
+                completion_tokens=token_usage.get('completion_tokens')
+            )
+        response = llm_result.content
+        
+        metrics.record_tokens(token_usage.get('prompt_tokens'), token_usage.get('completion_tokens'))
+        query_log.annotate(
+            prompt_tokens=token_usage.get('prompt_tokens'),
+            completion_tokens=token_usage.get('completion_tokens')
+        )
         
         # Procesar metadatas para fuentes
         sources = []
         for metadata in metadatas:
+            video_id = metadata.get('video_id', '')
+            # La URL con &t= viene precalculada en el índice; los chunks antiguos no la tienen
+            url = metadata.get('url') or (f"https://www.youtube.com/watch?v={video_id}" if video_id else None)
             source = Source(
                 title=metadata.get('title', 'Video de Luisito Comunica'),
-                video_id=metadata.get('video_id', ''),
-                url=f"https://www.youtube.com/watch?v={metadata.get('video_id', '')}" if metadata.get('video_id') else None
+                video_id=video_id,
+                url=url,
+                start_seconds=metadata.get('start_seconds'),
+                end_seconds=metadata.get('end_seconds'),
+                time_range=metadata.get('time_range')
             )
             sources.append(source)
         
         return response, sources
     
+    except RateLimitError as e:
+        # Cuota de Azure agotada: se propaga para responder 503 en vez de un texto de error
+        metrics.record_error(e)
+        raise
     except Exception as e:
+        metrics.record_error(e)
+        query_log.annotate(error=type(e).__name__)
         print(f"Error generando respuesta: {e}")
         return f"Lo siento, hubo un error generando la respuesta: {e}", []
 
+def answer_cache_key(query, version=None):
+    """
+    Clave de la caché de respuestas: la pregunta normalizada más la versión
+    del índice cargado, así una recarga del índice no sirve respuestas viejas
+    """
+    version = loaded_index_version if version is None else version
+    return f"{version or 0}:{normalize_query(query)}"
+
+def answer_query(query, details=None):
+    """
+    Genera la respuesta y la guarda en la caché compartida
+    Solo se cachean respuestas con fuentes (no errores ni "sin información")
+    
+    Args:
+        query: Pregunta del usuario
+        details: Dict opcional donde se anotan etapas, chunks y tokens (query log)
+    """
+    # La versión se toma antes de generar: si el índice se recarga a mitad,
+    # la respuesta queda bajo la versión con la que se calculó
+    cache_key = answer_cache_key(query)
+    with query_log.collect(details):
+        response, sources = generate_response(query)
+    if sources:
+        answer_cache.set(cache_key, {
+            'response': response,
+            'sources': [dict(source) for source in sources]
+        })
+    return response, sources
+
 @app.on_event("startup")
 async def startup_event():
     """Inicializa el chatbot al arrancar el servidor"""
     print("🚀 Iniciando API de Luisito Comunica Chatbot...")
     initialize_chatbot()
+    health.start()
+    # En segundo plano: el servidor acepta conexiones mientras tanto, pero
+    # /health no reporta vector_store_ready hasta terminar
+    threading.Thread(target=warm_up, name='warmup', daemon=True).start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Cierra el pool de conexiones HTTP compartido y vacía el query log"""
+    health.stop()
+    await aclose_http_clients()
+    if query_logger is not None:
+        query_logger.close()
+
+def is_ready():
+    """Inicializado, calentado y con el vector store presente (según la última foto)"""
+    vector_store = health.snapshot().get('vector_store') or {}
+    return initialized and warmed_up and bool(vector_store.get('exists'))
 
 @app.get("/", response_model=HealthResponse)
 async def root():
     """Health check endpoint"""
-    vector_store_ready = Path("./chroma_db").exists() and initialized
     return HealthResponse(
         status="running",
         message="Luisito Comunica Chatbot API",
-        vector_store_ready=vector_store_ready
+        vector_store_ready=is_ready()
     )
 
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
     """Health check endpoint"""
-    vector_store_ready = Path("./chroma_db").exists() and initialized
     return HealthResponse(
         status="healthy",
         message="API funcionando correctamente",
-        vector_store_ready=vector_store_ready
+        vector_store_ready=is_ready()
     )
 
+@app.get("/health/live")
+async def health_live():
+    """Liveness: el proceso responde (sin comprobar dependencias)"""
+    return {"status": "alive", "pid": os.getpid()}
+
+@app.get("/health/ready")
+async def health_ready():
+    """Readiness: 200 si el worker puede responder preguntas, 503 si no"""
+    state = health.snapshot()
+    ready = is_ready()
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else "not_ready",
+            "initialized": initialized,
+            "warmed_up": warmed_up,
+            "vector_store": state.get('vector_store'),
+            "collection_count": state.get('collection_count'),
+            "azure_openai": state.get('azure_openai'),
+            "updated_at": state.get('updated_at'),
+            "age_seconds": state.get('age_seconds'),
+        }
+    )
+
+def log_query(query, query_key, status, start, details=None, sources=0):
+    """Encola el registro de una petición de chat (no bloquea)"""
+    if query_logger is None:
+        return
+    record = {
+        'query': query,
+        'query_key': query_key,
+        'status': status,
+        'total_seconds': round(time.perf_counter() - start, 4),
+        'sources': sources,
+        'worker': os.getpid(),
+    }
+    if details:
+        record.update(details)
+    query_logger.log(record)
+
 @app.post("/chat", response_model=ChatResponse)
 async def chat(request: ChatRequest):
     """Endpoint principal para chat"""
@@ -229,31 +585,98 @@ async def chat(request: ChatRequest):
     if not request.message.strip():
         raise HTTPException(status_code=400, detail="El mensaje no puede estar vacío")
     
-    # Generar respuesta
-    response, sources = generate_response(request.message)
+    global requests_served
+    requests_served += 1
     
-    return ChatResponse(
-        response=response,
-        sources=sources,
-        total_chunks_used=len(sources)
-    )
+    with metrics.track_in_flight(), metrics.observe_stage('total'), span('chat') as chat_span:
+        start = time.perf_counter()
+        query_key = normalize_query(request.message)
+        
+        # Con solo aciertos de caché nadie llegaría a get_relevant_chunks:
+        # se comprueba aquí la versión del índice (en un thread, puede recargarlo)
+        if time.monotonic() - last_index_check >= INDEX_CHECK_INTERVAL_SECONDS:
+            await run_in_threadpool(maybe_reload_collection)
+        
+        # Respuesta ya calculada por este u otro worker (con el mismo índice)
+        cached = answer_cache.get(answer_cache_key(request.message))
+        metrics.record_cache('answer', cached is not None)
+        set_attributes(chat_span, answer_cache_hit=cached is not None)
+        if cached is not None:
+            log_query(request.message, query_key, 'cache_hit', start, sources=len(cached['sources']))
+            return ChatResponse(
+                response=cached['response'],
+                sources=cached['sources'],
+                total_chunks_used=len(cached['sources'])
+            )
+        
+        coalesced = chat_flight.is_inflight(query_key)
+        if coalesced:
+            metrics.record_coalesced()
+        
+        # Generar respuesta (en un thread para no bloquear el event loop); las
+        # preguntas idénticas concurrentes se agrupan en una sola generación
+        details = {}
+        try:
+            response, sources = await chat_flight.do(
+                query_key,
+                run_in_threadpool,
+                answer_query,
+                request.message,
+                details
+            )
+        except RateLimitError as e:
+            log_query(request.message, query_key, 'rate_limited', start, details)
+            retry_after = e.response.headers.get("retry-after", "10") if e.response is not None else "10"
+            raise HTTPException(
+                status_code=503,
+                detail="Servicio saturado, intenta de nuevo en unos segundos",
+                headers={"Retry-After": retry_after}
+            )
+        
+        # Solo la petición que hizo el cálculo trae etapas y tokens en details
+        if 'error' in details:
+            status = 'error'
+        else:
+            status = 'coalesced' if coalesced and not details.get('stages') else 'ok'
+        log_query(request.message, query_key, status, start, details, sources=len(sources))
+        
+        return ChatResponse(
+            response=response,
+            sources=sources,
+            total_chunks_used=len(sources)
+        )
+
+@app.get("/metrics")
+async def get_metrics():
+    """Métricas en formato Prometheus"""
+    payload, content_type = metrics.render_metrics()
+    return Response(content=payload, media_type=content_type)
 
 @app.get("/stats")
 async def get_stats():
-    """Obtiene estadísticas del vector store"""
+    """Estadísticas del vector store y del worker (desde memoria)"""
     if not initialized or not collection:
         raise HTTPException(status_code=503, detail="Chatbot no inicializado")
     
-    try:
-        # Obtener conteo total de chunks
-        count = collection.count()
-        
-        return {
-            "total_chunks": count,
-            "status": "ready"
+    state = health.snapshot()
+    return {
+        "total_chunks": state.get('collection_count'),
+        "status": "ready" if is_ready() else "warming_up",
+        "vector_backend": VECTOR_BACKEND,
+        "vector_store": state.get('vector_store'),
+        "azure_openai": state.get('azure_openai'),
+        "cache_sizes": state.get('cache_sizes'),
+        "state_updated_at": state.get('updated_at'),
+        "admission": admission.stats(),
+        "worker": {
+            "pid": os.getpid(),
+            "requests_served": requests_served,
+            "coalesced_requests": chat_flight.coalesced,
+            "embedding_cache": embedding_cache.stats(),
+            "answer_cache": answer_cache.stats(),
+            "query_log": query_logger.stats() if query_logger is not None else None
         }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error obteniendo estadísticas: {e}")
+    }
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,194 @@
+"""
+Fábrica compartida de clientes Azure OpenAI
+Configura clientes HTTP con keep-alive, timeouts, reintentos y HTTP/2 para
+que todos los puntos de entrada reutilicen conexiones calientes
+"""
+import os
+import threading
+import httpx
+from dotenv import load_dotenv
+from langchain_openai import AzureOpenAIEmbeddings, AzureChatOpenAI
+
+load_dotenv()
+
+# HTTP/2 solo si el paquete h2 está instalado (httpx[http2])
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+_lock = threading.Lock()
+_http_client = None
+_async_http_client = None
+_client_pid = None
+
+def get_azure_config(default_api_version='2024-02-15-preview'):
+    """
+    Lee la configuración de Azure OpenAI desde variables de entorno
+
+    Args:
+        default_api_version: Versión de API si AZURE_OPENAI_API_VERSION no está definida
+
+    Returns:
+        Dict con endpoint, api_key, api_version y deployments
+    """
+    return {
+        'azure_endpoint': os.getenv('AZURE_OPENAI_ENDPOINT'),
+        'api_key': os.getenv('AZURE_OPENAI_API_KEY'),
+        'api_version': os.getenv('AZURE_OPENAI_API_VERSION', default_api_version),
+        'embedding_deployment': os.getenv('AZURE_OPENAI_EMBEDDING_DEPLOYMENT', 'text-embedding-ada-002'),
+        'chat_deployment': os.getenv('AZURE_OPENAI_CHAT_DEPLOYMENT', 'gpt-4o-mini'),
+    }
+
+def _timeout():
+    """Timeouts separados para conectar, leer, escribir y obtener conexión del pool"""
+    return httpx.Timeout(
+        connect=float(os.getenv('AZURE_HTTP_CONNECT_TIMEOUT', '5')),
+        read=float(os.getenv('AZURE_HTTP_READ_TIMEOUT', '60')),
+        write=float(os.getenv('AZURE_HTTP_WRITE_TIMEOUT', '10')),
+        pool=float(os.getenv('AZURE_HTTP_POOL_TIMEOUT', '5'))
+    )
+
+def _limits():
+    """Límites del pool de conexiones keep-alive"""
+    return httpx.Limits(
+        max_connections=int(os.getenv('AZURE_HTTP_MAX_CONNECTIONS', '100')),
+        max_keepalive_connections=int(os.getenv('AZURE_HTTP_MAX_KEEPALIVE', '20')),
+        keepalive_expiry=float(os.getenv('AZURE_HTTP_KEEPALIVE_EXPIRY', '120'))
+    )
+
+def _max_retries():
+    """Reintentos del SDK de OpenAI (backoff exponencial con jitter y Retry-After)"""
+    return int(os.getenv('AZURE_OPENAI_MAX_RETRIES', '3'))
+
+def _reset_after_fork():
+    """
+    Descarta clientes heredados de otro proceso
+    Los sockets no deben compartirse entre procesos tras un fork
+    """
+    global _http_client, _async_http_client, _client_pid
+    if _client_pid != os.getpid():
+        _http_client = None
+        _async_http_client = None
+        _client_pid = os.getpid()
+
+def get_http_client():
+    """
+    Cliente HTTP síncrono compartido por todo el proceso
+
+    Returns:
+        httpx.Client con pool keep-alive
+    """
+    global _http_client
+    with _lock:
+        _reset_after_fork()
+        if _http_client is None:
+            _http_client = httpx.Client(
+                timeout=_timeout(),
+                # El transporte reintenta solo fallos de conexión (TCP/TLS);
+                # los errores HTTP (429/5xx) los reintenta el SDK con jitter
+                transport=httpx.HTTPTransport(
+                    http2=HTTP2_AVAILABLE,
+                    limits=_limits(),
+                    retries=int(os.getenv('AZURE_HTTP_CONNECT_RETRIES', '2'))
+                )
+            )
+        return _http_client
+
+def get_async_http_client():
+    """
+    Cliente HTTP asíncrono compartido por todo el proceso
+
+    Returns:
+        httpx.AsyncClient con pool keep-alive
+    """
+    global _async_http_client
+    with _lock:
+        _reset_after_fork()
+        if _async_http_client is None:
+            _async_http_client = httpx.AsyncClient(
+                timeout=_timeout(),
+                transport=httpx.AsyncHTTPTransport(
+                    http2=HTTP2_AVAILABLE,
+                    limits=_limits(),
+                    retries=int(os.getenv('AZURE_HTTP_CONNECT_RETRIES', '2'))
+                )
+            )
+        return _async_http_client
+
+def _validate(config):
+    """Valida que el endpoint y la API key estén configurados"""
+    if not config['azure_endpoint'] or not config['api_key']:
+        raise ValueError("AZURE_OPENAI_ENDPOINT y AZURE_OPENAI_API_KEY deben estar configurados")
+
+def create_embeddings(deployment=None, config=None):
+    """
+    Crea un cliente de embeddings que usa el pool HTTP compartido
+
+    Args:
+        deployment: Nombre del deployment (opcional, por defecto desde .env)
+        config: Configuración de Azure (opcional, por defecto get_azure_config())
+
+    Returns:
+        AzureOpenAIEmbeddings configurado
+    """
+    config = config or get_azure_config()
+    _validate(config)
+
+    return AzureOpenAIEmbeddings(
+        azure_endpoint=config['azure_endpoint'],
+        api_key=config['api_key'],
+        api_version=config['api_version'],
+        azure_deployment=deployment or config['embedding_deployment'],
+        max_retries=_max_retries(),
+        http_client=get_http_client(),
+        http_async_client=get_async_http_client()
+    )
+
+def create_chat_llm(deployment=None, temperature=0.7, max_tokens=1500, config=None):
+    """
+    Crea un cliente de chat que usa el pool HTTP compartido
+
+    Args:
+        deployment: Nombre del deployment (opcional, por defecto desde .env)
+        temperature: Temperatura del modelo
+        max_tokens: Máximo de tokens de respuesta
+        config: Configuración de Azure (opcional, por defecto get_azure_config())
+
+    Returns:
+        AzureChatOpenAI configurado
+    """
+    config = config or get_azure_config()
+    _validate(config)
+
+    return AzureChatOpenAI(
+        azure_endpoint=config['azure_endpoint'],
+        api_key=config['api_key'],
+        api_version=config['api_version'],
+        azure_deployment=deployment or config['chat_deployment'],
+        temperature=temperature,
+        max_tokens=max_tokens,
+        max_retries=_max_retries(),
+        http_client=get_http_client(),
+        http_async_client=get_async_http_client()
+    )
+
+def close_http_clients():
+    """Cierra los clientes HTTP compartidos (al apagar el servidor)"""
+    global _http_client, _async_http_client
+    with _lock:
+        if _http_client is not None:
+            _http_client.close()
+            _http_client = None
+        # El cliente asíncrono se cierra desde el event loop con aclose_http_clients
+        _async_http_client = None
+
+async def aclose_http_clients():
+    """Cierra los clientes HTTP compartidos desde un contexto asíncrono"""
+    global _async_http_client
+    client = _async_http_client
+    _async_http_client = None
+    if client is not None:
+        await client.aclose()
+    close_http_clients()
@@ -0,0 +1,224 @@
+"""
+Benchmark offline de retrieval
+Construye un corpus sintético con embeddings deterministas, ejecuta la misma
+búsqueda que get_relevant_chunks contra varios backends y reporta latencia
+p50/p95, QPS y recall@k respecto a la búsqueda exacta. No usa red ni Azure
+
+Uso:
+    python bench_retrieval.py --docs 20000 --queries 200 --k 5
+    python bench_retrieval.py --backends exact,chroma,int8 --output bench_output.txt
+"""
+import argparse
+import random
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from fake_embeddings import embed_text
+
+# Vocabulario sintético: sílabas combinadas en palabras por tema
+_SYLLABLES = ['ca', 'mi', 'no', 'lu', 'si', 'to', 'pa', 're', 'vi', 'ja', 'go', 'de',
+              'mar', 'sol', 'cu', 'ba', 'ti', 'ro', 'za', 'qui', 'ma', 'le', 'chi', 'na']
+
+def _make_word(rng):
+    return ''.join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4)))
+
+def build_corpus(n_docs, n_topics=50, words_per_doc=120, seed=42):
+    """
+    Genera un corpus sintético agrupado por temas (como videos de un mismo viaje)
+
+    Args:
+        n_docs: Número de chunks
+        n_topics: Número de temas
+        words_per_doc: Palabras por chunk
+        seed: Semilla para que el corpus sea reproducible
+
+    Returns:
+        Tupla con (docs, metadatas, topic_vocab, common_vocab)
+    """
+    rng = random.Random(seed)
+    common_vocab = [_make_word(rng) for _ in range(300)]
+    topic_vocab = [[_make_word(rng) for _ in range(80)] for _ in range(n_topics)]
+
+    docs, metadatas = [], []
+    for i in range(n_docs):
+        topic = i % n_topics
+        words = [
+            rng.choice(topic_vocab[topic]) if rng.random() < 0.7 else rng.choice(common_vocab)
+            for _ in range(words_per_doc)
+        ]
+        docs.append(' '.join(words))
+        metadatas.append({'video_id': f"video{topic:03d}", 'title': f"Video {topic}", 'chunk_index': i})
+
+    return docs, metadatas, topic_vocab, common_vocab
+
+def build_queries(n_queries, topic_vocab, common_vocab, seed=7):
+    """Preguntas sintéticas: pocas palabras de un tema mezcladas con palabras comunes"""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(n_queries):
+        topic = rng.randrange(len(topic_vocab))
+        words = [rng.choice(topic_vocab[topic]) for _ in range(5)] + [rng.choice(common_vocab) for _ in range(3)]
+        rng.shuffle(words)
+        queries.append(' '.join(words))
+    return queries
+
+def embed_all(texts, dim):
+    """Matriz float32 (n, dim) de embeddings deterministas"""
+    return np.vstack([embed_text(text, dim) for text in texts]).astype(np.float32)
+
+# --- Backends ---------------------------------------------------------------
+# Cada backend recibe (vectors, docs, metadatas) y devuelve una función
+# search(query_vector, k) -> lista de índices, más una función de limpieza
+
+def backend_exact(vectors, docs, metadatas):
+    """Búsqueda exacta por similitud coseno (vectores ya normalizados)"""
+    def search(query_vector, k):
+        scores = vectors @ query_vector
+        k = min(k, len(scores))
+        # argpartition exige k < n; con k == n basta ordenar todo
+        top = np.argpartition(-scores, k)[:k] if k < len(scores) else np.arange(len(scores))
+        return top[np.argsort(-scores[top])].tolist()
+    return search, lambda: None
+
+def backend_chroma(vectors, docs, metadatas):
+    """ChromaDB con HNSW coseno, igual que build_vectorstore/get_relevant_chunks"""
+    import chromadb
+
+    path = tempfile.mkdtemp(prefix='bench_chroma_')
+    client = chromadb.PersistentClient(path=path)
+    collection = client.create_collection('bench', metadata={"hnsw:space": "cosine"})
+
+    batch_size = 1000
+    for start in range(0, len(docs), batch_size):
+        end = min(start + batch_size, len(docs))
+        collection.add(
+            ids=[str(i) for i in range(start, end)],
+            embeddings=vectors[start:end].tolist(),
+            documents=docs[start:end],
+            metadatas=metadatas[start:end]
+        )
+
+    def search(query_vector, k):
+        results = collection.query(query_embeddings=[query_vector.tolist()], n_results=k, include=[])
+        return [int(i) for i in results['ids'][0]]
+
+    return search, lambda: shutil.rmtree(path, ignore_errors=True)
+
+def backend_int8(vectors, docs, metadatas):
+    """Índice int8 de quantized_store (pasada gruesa + re-ranking en float)"""
+    from quantized_store import QuantizedIndex
+
+    index = QuantizedIndex.from_vectors(vectors, [str(i) for i in range(len(docs))], docs, metadatas)
+
+    def search(query_vector, k):
+        indices, _ = index.search(query_vector, k)
+        return indices
+
+    return search, lambda: None
+
+BACKENDS = {
+    'exact': backend_exact,
+    'chroma': backend_chroma,
+    'int8': backend_int8,
+}
+
+def percentile(values, pct):
+    """Percentil simple sobre una lista de valores"""
+    return float(np.percentile(np.asarray(values), pct)) if values else 0.0
+
+def run_benchmark(n_docs=10000, n_queries=200, k=5, dim=1536, backends=('exact', 'chroma', 'int8')):
+    """
+    Ejecuta el benchmark en todos los backends pedidos
+
+    Returns:
+        Lista de dicts con los resultados por backend
+    """
+    print(f"📚 Generando corpus sintético: {n_docs} chunks, dim={dim}")
+    docs, metadatas, topic_vocab, common_vocab = build_corpus(n_docs)
+    vectors = embed_all(docs, dim)
+    queries = build_queries(n_queries, topic_vocab, common_vocab)
+    query_vectors = embed_all(queries, dim)
+
+    # Ground truth: búsqueda exacta
+    exact_search, _ = backend_exact(vectors, docs, metadatas)
+    truth = [set(exact_search(q, k)) for q in query_vectors]
+
+    results = []
+    for name in backends:
+        if name not in BACKENDS:
+            print(f"⚠️  Backend desconocido: {name}")
+            continue
+
+        try:
+            build_start = time.perf_counter()
+            search, cleanup = BACKENDS[name](vectors, docs, metadatas)
+            build_seconds = time.perf_counter() - build_start
+        except ImportError as e:
+            print(f"⚠️  Backend '{name}' no disponible: {e}")
+            continue
+
+        try:
+            # Calentamiento para no medir carga perezosa del índice
+            for q in query_vectors[:5]:
+                search(q, k)
+
+            latencies, hits = [], 0
+            total_start = time.perf_counter()
+            for q, expected in zip(query_vectors, truth):
+                start = time.perf_counter()
+                found = search(q, k)
+                latencies.append((time.perf_counter() - start) * 1000)
+                hits += len(expected.intersection(found))
+            total_seconds = time.perf_counter() - total_start
+        finally:
+            cleanup()
+
+        results.append({
+            'backend': name,
+            'build_s': build_seconds,
+            'p50_ms': percentile(latencies, 50),
+            'p95_ms': percentile(latencies, 95),
+            'qps': len(query_vectors) / total_seconds if total_seconds else 0.0,
+            'recall': hits / (min(k, n_docs) * len(query_vectors)),
+        })
+
+    return results
+
+def format_results(results, k):
+    """Tabla de resultados en texto"""
+    lines = [f"{'backend':12} {'build s':>9} {'p50 ms':>9} {'p95 ms':>9} {'QPS':>10} {f'recall@{k}':>10}"]
+    for r in results:
+        lines.append(
+            f"{r['backend']:12} {r['build_s']:>9.2f} {r['p50_ms']:>9.3f} {r['p95_ms']:>9.3f} "
+            f"{r['qps']:>10.1f} {r['recall']:>10.3f}"
+        )
+    return '\n'.join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark offline de retrieval")
+    parser.add_argument('--docs', type=int, default=10000, help="Número de chunks del corpus")
+    parser.add_argument('--queries', type=int, default=200, help="Número de preguntas")
+    parser.add_argument('--k', type=int, default=5, help="Resultados por pregunta (n_results)")
+    parser.add_argument('--dim', type=int, default=1536, help="Dimensión de los embeddings")
+    parser.add_argument('--backends', default=','.join(BACKENDS), help="Backends separados por coma")
+    parser.add_argument('--output', help="Archivo donde guardar la tabla de resultados")
+    args = parser.parse_args()
+
+    print("📊 BENCHMARK DE RETRIEVAL (OFFLINE)")
+    print("="*60)
+
+    results = run_benchmark(args.docs, args.queries, args.k, args.dim, args.backends.split(','))
+    table = format_results(results, args.k)
+    print()
+    print(table)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(table + '\n')
+        print(f"\n💾 Resultados guardados en {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -5,13 +5,23 @@ import os
 from pathlib import Path
 from azure.storage.blob import BlobServiceClient
 from dotenv import load_dotenv
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_openai import AzureOpenAIEmbeddings
+from itertools import chain, islice
+from contextlib import nullcontext
+from azure_clients import get_azure_config, create_embeddings
 import chromadb
-import json
+from tracing import init_tracing, span
+from chunking import chunk_transcription, DEFAULT_MAX_TOKENS, DEFAULT_OVERLAP_TOKENS
+import transcript_store
+import transcript_normalizer
+from transcriptions_io import iter_transcriptions, find_latest_dump
+from embedding_cache import CachedEmbeddings, EmbeddingCache
+from quantized_store import VECTOR_BACKEND, INDEX_DIR, QuantizedIndex
+from index_version import write_index_version
 
 load_dotenv()
 
+COLLECTION_NAME = "luisito_transcripts"
+
 def load_transcriptions_from_azure():
     """
     Carga todas las transcripciones desde Azure Blob Storage
@@ -28,18 +38,24 @@ def load_transcriptions_from_azure():
     blob_service_client = BlobServiceClient.from_connection_string(connection_string)
     container_client = blob_service_client.get_container_client(container_name)
     
-    transcriptions = []
+    transcriptions = {}
     
     print("📥 Cargando transcripciones desde Azure Blob Storage...")
     for blob in container_client.list_blobs(name_starts_with="videos/"):
+        video_id, extension = os.path.splitext(os.path.basename(blob.name))
+        # Si un video tiene blob compacto (.ltr) y JSON antiguo, gana el compacto
+        if video_id in transcriptions and extension != transcript_store.EXTENSION:
+            continue
+        
         blob_client = blob_service_client.get_blob_client(
             container=container_name,
             blob=blob.name
         )
-        data = blob_client.download_blob().readall()
-        transcription = json.loads(data.decode('utf-8'))
-        transcriptions.append(transcription)
+        with span('blob.download', blob=blob.name):
+            data = blob_client.download_blob().readall()
+        transcriptions[video_id] = transcript_store.loads(data)
     
+    transcriptions = list(transcriptions.values())
     print(f"✅ {len(transcriptions)} transcripciones cargadas")
     return transcriptions
 
@@ -48,49 +64,184 @@ def load_transcriptions_from_local():
     Carga transcripciones desde archivo local (fallback)
     
     Returns:
-        Lista de transcripciones
+        Iterador de transcripciones (se leen de disco bajo demanda)
     """
     transcriptions_dir = Path('data')
-    transcription_files = list(transcriptions_dir.glob('transcriptions_*.json'))
     
-    if not transcription_files:
-        return []
+    # Primero las transcripciones compactas por video que deja el transcriber
+    compact_files = sorted((transcriptions_dir / 'transcripts').glob(f"*{transcript_store.EXTENSION}"))
+    if compact_files:
+        print(f"📥 Cargando {len(compact_files)} transcripciones compactas desde {transcriptions_dir / 'transcripts'}")
+        return (transcript_store.load(path) for path in compact_files)
+    
+    latest_file = find_latest_dump(transcriptions_dir)
+    
+    if not latest_file:
+        return iter(())
     
-    latest_file = sorted(transcription_files)[-1]
     print(f"📥 Cargando desde archivo local: {latest_file}")
+    return iter_transcriptions(latest_file)
+
+def format_timestamp(seconds):
+    """Formatea segundos como H:MM:SS o M:SS"""
+    seconds = int(seconds)
+    hours, remainder = divmod(seconds, 3600)
+    minutes, secs = divmod(remainder, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{secs:02d}"
+    return f"{minutes}:{secs:02d}"
+
+def video_url(video_id, start_seconds=None):
+    """URL del video, con &t= para abrirlo en el segundo exacto si se conoce"""
+    url = f"https://www.youtube.com/watch?v={video_id}"
+    if start_seconds is not None:
+        url += f"&t={int(start_seconds)}s"
+    return url
+
+def build_chunks(transcription, max_tokens=None, overlap_tokens=None, normalization=None):
+    """
+    Divide una transcripción en chunks con su rango de tiempo
     
-    with open(latest_file, 'r', encoding='utf-8') as f:
-        transcriptions = json.load(f)
+    Args:
+        transcription: Dict de transcripción (con 'transcript_data' si hay segmentos)
+        max_tokens: Presupuesto de tokens por chunk (opcional)
+        overlap_tokens: Tokens de solapamiento entre chunks (opcional)
+        normalization: NormalizationStats opcional donde acumular el ahorro de tokens
     
-    return transcriptions
+    Yields:
+        Dicts con 'id', 'text' y 'metadata' listos para ChromaDB
+    """
+    # Quitar [Música], subtítulos rodantes repetidos y muletillas antes de trocear
+    if transcript_normalizer.ENABLED:
+        transcription, stats = transcript_normalizer.normalize_transcription(transcription)
+        if normalization is not None:
+            normalization.add(stats)
+    
+    title = transcription.get('title', 'Sin título')
+    video_id = transcription.get('video_id', 'unknown')
+    published_at = transcription.get('published_at', '')
+    
+    for i, chunk in enumerate(chunk_transcription(transcription, max_tokens, overlap_tokens)):
+        metadata = {
+            'video_id': video_id,
+            'title': title,
+            'published_at': str(published_at),
+            'chunk_index': i,
+            'tokens': chunk['tokens']
+        }
+        # ChromaDB no acepta None en metadatos: solo se guardan tiempos si existen.
+        # El deep link y el rango legible se calculan aquí para no hacerlo por consulta
+        if chunk['start'] is not None:
+            metadata['start_seconds'] = round(chunk['start'], 2)
+            metadata['end_seconds'] = round(chunk['end'], 2)
+            metadata['time_range'] = f"{format_timestamp(chunk['start'])}-{format_timestamp(chunk['end'])}"
+        metadata['url'] = video_url(video_id, chunk['start'])
+        
+        yield {
+            'id': f"{video_id}_{i}",
+            'text': chunk['text'],
+            'metadata': metadata
+        }
 
-def create_vectorstore():
+def iter_chunks(transcriptions, max_tokens=None, overlap_tokens=None, normalization=None):
+    """Chunks de todas las transcripciones, generados bajo demanda"""
+    for trans in transcriptions:
+        yield from build_chunks(trans, max_tokens, overlap_tokens, normalization)
+
+def _upsert_chunks(collection, batch, embedding_list):
+    """Guarda chunks ya embebidos con una sola escritura"""
+    with span('chroma.add', chunks=len(batch)):
+        collection.upsert(
+            ids=[chunk['id'] for chunk in batch],
+            embeddings=embedding_list,
+            documents=[chunk['text'] for chunk in batch],
+            metadatas=[chunk['metadata'] for chunk in batch]
+        )
+
+def _embed_chunks(embeddings, batch):
+    """Embeddings de un lote de chunks"""
+    texts = [chunk['text'] for chunk in batch]
+    with span('embed.batch', texts=len(texts), deployment=getattr(embeddings, 'deployment', None)):
+        return embeddings.embed_documents(texts)
+
+def add_chunks(collection, embeddings, batch):
     """
-    Crea el vector store usando ChromaDB local con embeddings de OpenAI
+    Embebe un lote de chunks y lo guarda en ChromaDB con una sola escritura
+    
+    Args:
+        collection: Collection de ChromaDB
+        embeddings: Modelo de embeddings (CachedEmbeddings)
+        batch: Lista de chunks de build_chunks
     """
-    print("\n🧠 CONSTRUYENDO VECTOR STORE")
-    print("="*60)
+    _upsert_chunks(collection, batch, _embed_chunks(embeddings, batch))
+
+def index_transcription(collection, embeddings, transcription, lock=None, normalization=None):
+    """
+    Indexa (o re-indexa) una sola transcripción en una collection existente
+    Borra antes los chunks previos del video por si cambió el número de chunks.
+    Los embeddings se calculan fuera del lock para que varios threads puedan
+    embeber en paralelo y solo serialicen la escritura
+    
+    Args:
+        collection: Collection de ChromaDB
+        embeddings: Modelo de embeddings
+        transcription: Dict de transcripción
+        lock: Lock opcional para serializar escrituras en ChromaDB
+        normalization: NormalizationStats opcional para el reporte de ahorro
     
-    # Inicializar ChromaDB local
-    persist_directory = "./chroma_db"
-    Path(persist_directory).mkdir(exist_ok=True)
+    Returns:
+        Número de chunks indexados
+    """
+    video_id = transcription.get('video_id', 'unknown')
+    chunks = list(build_chunks(transcription, normalization=normalization))
+    embedding_list = _embed_chunks(embeddings, chunks) if chunks else []
+    
+    with lock or nullcontext():
+        collection.delete(where={'video_id': video_id})
+        if chunks:
+            _upsert_chunks(collection, chunks, embedding_list)
+    return len(chunks)
+
+def get_collection(persist_directory="./chroma_db", reset=False):
+    """
+    Abre (o crea) la collection de transcripciones
     
+    Args:
+        persist_directory: Directorio de ChromaDB
+        reset: Eliminar la collection existente para reconstruirla
+    """
+    Path(persist_directory).mkdir(exist_ok=True)
     client = chromadb.PersistentClient(path=persist_directory)
     
-    # Crear o obtener collection
-    collection_name = "luisito_transcripts"
-    
-    try:
-        # Intentar eliminar collection existente para reconstruirla
-        client.delete_collection(collection_name)
-        print(f"   🗑️  Collection '{collection_name}' eliminada (reconstruyendo)")
-    except:
-        pass
+    if reset:
+        try:
+            client.delete_collection(COLLECTION_NAME)
+            print(f"   🗑️  Collection '{COLLECTION_NAME}' eliminada (reconstruyendo)")
+        except:
+            pass
     
-    collection = client.get_or_create_collection(
-        name=collection_name,
+    return client.get_or_create_collection(
+        name=COLLECTION_NAME,
         metadata={"hnsw:space": "cosine"}
     )
+
+def create_cached_embeddings():
+    """Embeddings de Azure OpenAI con caché por hash de contenido"""
+    config = get_azure_config()
+    embedding_cache = EmbeddingCache()
+    return CachedEmbeddings(create_embeddings(config=config), config['embedding_deployment'], embedding_cache)
+
+def create_vectorstore():
+    """
+    Crea el vector store usando ChromaDB local con embeddings de OpenAI
+    """
+    print("\n🧠 CONSTRUYENDO VECTOR STORE")
+    print("="*60)
+    
+    # Inicializar ChromaDB local (reconstrucción completa)
+    persist_directory = "./chroma_db"
+    collection_name = COLLECTION_NAME
+    collection = get_collection(persist_directory, reset=True)
     
     # Cargar transcripciones (primero intentar Azure, luego local)
     try:
@@ -99,103 +250,83 @@ def create_vectorstore():
         print("⚠️  No se pudo cargar desde Azure, intentando local...")
         transcriptions = load_transcriptions_from_local()
     
-    if not transcriptions:
+    # Puede ser un iterador (dump local en streaming): mirar el primero sin consumirlo
+    transcriptions = iter(transcriptions)
+    first = next(transcriptions, None)
+    if first is None:
         print("❌ No se encontraron transcripciones")
         return
-    
-    # Filtar solo transcripciones exitosas
-    successful_transcriptions = [t for t in transcriptions if t.get('status') == 'success']
-    print(f"   📊 Transcripciones exitosas: {len(successful_transcriptions)}")
-    
-    # Inicializar text splitter
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1000,
-        chunk_overlap=200,
-        length_function=len
-    )
-    
-    # Inicializar embeddings con Azure OpenAI
-    azure_endpoint = os.getenv('AZURE_OPENAI_ENDPOINT')
-    azure_api_key = os.getenv('AZURE_OPENAI_API_KEY')
-    api_version = os.getenv('AZURE_OPENAI_API_VERSION', '2024-02-15-preview')
-    embedding_deployment = os.getenv('AZURE_OPENAI_EMBEDDING_DEPLOYMENT', 'text-embedding-ada-002')
-    
-    if not azure_endpoint or not azure_api_key:
-        raise ValueError("AZURE_OPENAI_ENDPOINT y AZURE_OPENAI_API_KEY deben estar configurados")
-    
-    embeddings = AzureOpenAIEmbeddings(
-        azure_endpoint=azure_endpoint,
-        api_key=azure_api_key,
-        api_version=api_version,
-        azure_deployment=embedding_deployment
-    )
-    
-    # Procesar transcripciones
+    transcriptions = chain([first], transcriptions)
+    
+    # Filtar solo transcripciones exitosas (bajo demanda, contando al pasar)
+    successful_count = [0]
+    def successful_transcriptions():
+        for t in transcriptions:
+            if t.get('status') == 'success':
+                successful_count[0] += 1
+                yield t
+    
+    # Inicializar embeddings con Azure OpenAI (pool HTTP compartido). La caché
+    # por hash de contenido evita re-embeber chunks cuyo texto no cambió
+    embeddings = create_cached_embeddings()
+    embedding_deployment = embeddings.deployment
+    embedding_cache = embeddings.cache
+    print(f"   💾 Caché de embeddings: {embedding_cache.path} ({embedding_cache.size()} vectores)")
+    
+    # Procesar transcripciones: los chunks se generan por segmentos con
+    # timestamps y se embeben por lotes a medida que se producen
     print("\n📝 Procesando transcripciones...")
-    all_chunks = []
-    
-    for trans in successful_transcriptions:
-        title = trans.get('title', 'Sin título')
-        video_id = trans.get('video_id', 'unknown')
-        transcript = trans.get('transcript', '')
-        published_at = trans.get('published_at', '')
-        
-        if not transcript:
-            continue
-        
-        # Dividir texto en chunks
-        chunks = text_splitter.split_text(transcript)
-        
-        for i, chunk in enumerate(chunks):
-            all_chunks.append({
-                'id': f"{video_id}_{i}",
-                'text': chunk,
-                'metadata': {
-                    'video_id': video_id,
-                    'title': title,
-                    'published_at': str(published_at),
-                    'chunk_index': i
-                }
-            })
-    
-    print(f"   ✅ {len(all_chunks)} chunks creados")
-    
-    # Generar embeddings y agregar a ChromaDB
+    print(f"   Chunks de hasta {DEFAULT_MAX_TOKENS} tokens (solapamiento {DEFAULT_OVERLAP_TOKENS})")
     print(f"\n🧠 Generando embeddings con Azure OpenAI...")
     print(f"   Deployment: {embedding_deployment}")
     print(f"   Esto puede tomar varios minutos dependiendo de la cantidad de chunks")
     
     batch_size = 100
-    
-    for i in range(0, len(all_chunks), batch_size):
-        batch = all_chunks[i:i+batch_size]
-        texts = [chunk['text'] for chunk in batch]
+    normalization = transcript_normalizer.NormalizationStats()
+    chunks = iter_chunks(successful_transcriptions(), normalization=normalization)
+    total_chunks = 0
+    batch_number = 0
+    
+    while True:
+        batch = list(islice(chunks, batch_size))
+        if not batch:
+            break
+        batch_number += 1
+        total_chunks += len(batch)
         
-        # Generar embeddings
+        # Generar embeddings y agregar a ChromaDB
         try:
-            embedding_list = embeddings.embed_documents(texts)
-            
-            # Agregar a ChromaDB
-            for chunk, embedding in zip(batch, embedding_list):
-                collection.add(
-                    ids=[chunk['id']],
-                    embeddings=[embedding],
-                    documents=[chunk['text']],
-                    metadatas=[chunk['metadata']]
-                )
+            add_chunks(collection, embeddings, batch)
             
-            print(f"   ✅ Procesados {min(i+batch_size, len(all_chunks))}/{len(all_chunks)} chunks")
+            print(f"   ✅ Procesados {total_chunks} chunks")
             
         except Exception as e:
-            print(f"   ❌ Error procesando batch {i//batch_size + 1}: {e}")
+            print(f"   ❌ Error procesando batch {batch_number}: {e}")
             continue
     
     # PersistentClient se guarda automáticamente, no necesita persist() explícito
     
     print(f"\n✅ Vector store creado exitosamente!")
     print(f"   📁 Ubicación: {persist_directory}")
-    print(f"   📊 Total de chunks: {len(all_chunks)}")
+    print(f"   📊 Transcripciones exitosas: {successful_count[0]}")
+    print(f"   📊 Total de chunks: {total_chunks}")
+    cache_stats = embeddings.stats()
+    print(f"   💾 Embeddings reutilizados de caché: {cache_stats['hits']} (nuevos: {cache_stats['misses']})")
     print(f"   🗂️  Collection: {collection_name}")
+    if transcript_normalizer.ENABLED:
+        print(f"   {transcript_normalizer.format_summary(normalization.summary())}")
+    embedding_cache.close()
+    
+    # Backend int8: exportar también el índice cuantizado que sirve la API
+    directories = [persist_directory]
+    if VECTOR_BACKEND == 'int8' and total_chunks:
+        QuantizedIndex.from_collection(collection).save(INDEX_DIR)
+        print(f"   🗜️  Índice int8 exportado en {INDEX_DIR}")
+        directories.append(INDEX_DIR)
+    
+    # Marca de versión: los workers de la API recargan la reconstrucción sin reiniciar
+    for directory in directories:
+        write_index_version(directory, chunks_indexed=total_chunks, rebuild=True)
 
 def verify_vectorstore():
     """
@@ -222,6 +353,7 @@ def verify_vectorstore():
         return False
 
 if __name__ == "__main__":
+    init_tracing('builder')
     create_vectorstore()
     verify_vectorstore()
 
@@ -15,6 +15,9 @@ interface Source {
   title: string
   video_id?: string
   url?: string
+  start_seconds?: number
+  end_seconds?: number
+  time_range?: string
 }
 
 const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000'
@@ -256,6 +259,9 @@ export default function Home() {
                             <Youtube className="w-3.5 h-3.5 text-red-500 mt-0.5 flex-shrink-0" />
                             <p className="text-xs text-zinc-400 group-hover:text-white truncate">
                               {sidx + 1}. {source.title}
+                              {source.time_range && (
+                                <span className="ml-1 text-zinc-600">({source.time_range})</span>
+                              )}
                             </p>
                           </a>
                         ))}
@@ -3,10 +3,10 @@ Chatbot de Luisito Comunica usando RAG con ChromaDB y OpenAI
 Interfaz web con Streamlit
 """
 import streamlit as st
-from langchain_openai import AzureOpenAIEmbeddings, AzureChatOpenAI
+from azure_clients import get_azure_config, create_embeddings, create_chat_llm
+from suggested_questions import SUGGESTED_QUESTIONS
 from langchain_core.messages import SystemMessage, HumanMessage
 import chromadb
-import os
 from dotenv import load_dotenv
 from pathlib import Path
 
@@ -167,38 +167,20 @@ def initialize_chatbot():
             return None, None, None, None
         
         # Inicializar embeddings con Azure OpenAI
-        azure_endpoint = os.getenv('AZURE_OPENAI_ENDPOINT')
-        azure_api_key = os.getenv('AZURE_OPENAI_API_KEY')
-        api_version = os.getenv('AZURE_OPENAI_API_VERSION', '2024-02-15-preview')
+        config = get_azure_config()
         
         # Validar configuración de Azure OpenAI
-        if not azure_endpoint:
+        if not config['azure_endpoint']:
             st.error("❌ AZURE_OPENAI_ENDPOINT no está configurado en .env")
             return None, None, None, None
         
-        if not azure_api_key:
+        if not config['api_key']:
             st.error("❌ AZURE_OPENAI_API_KEY no está configurado en .env")
             return None, None, None, None
         
-        # Inicializar embeddings
-        embedding_deployment = os.getenv('AZURE_OPENAI_EMBEDDING_DEPLOYMENT', 'text-embedding-ada-002')
-        embeddings = AzureOpenAIEmbeddings(
-            azure_endpoint=azure_endpoint,
-            api_key=azure_api_key,
-            api_version=api_version,
-            azure_deployment=embedding_deployment
-        )
-        
-        # Inicializar LLM con Azure OpenAI
-        chat_deployment = os.getenv('AZURE_OPENAI_CHAT_DEPLOYMENT', 'gpt-4o-mini')
-        llm = AzureChatOpenAI(
-            azure_endpoint=azure_endpoint,
-            api_key=azure_api_key,
-            api_version=api_version,
-            azure_deployment=chat_deployment,
-            temperature=0.7,
-            max_tokens=1500
-        )
+        # Inicializar embeddings y LLM (pool HTTP compartido)
+        embeddings = create_embeddings(config=config)
+        llm = create_chat_llm(config=config, temperature=0.7, max_tokens=1500)
         
         # Memoria manejada por Streamlit
         memory = None  # Usaremos st.session_state para la memoria
@@ -328,15 +310,7 @@ def main():
         
         # Preguntas sugeridas interactivas
         st.markdown("### 💬 Preguntas sugeridas")
-        suggested_questions = [
-            "¿De qué trató el video del mercado de solteros en China?",
-            "¿Qué lugares visitó en Madagascar?",
-            "¿Cuál fue su experiencia en Dubai?",
-            "¿Qué opinó sobre Cuba?",
-            "¿En qué video habla de comida mexicana?"
-        ]
-        
-        for question in suggested_questions:
+        for question in SUGGESTED_QUESTIONS:
             if st.button(question, key=f"suggest_{hash(question)}", use_container_width=True):
                 # Agregar pregunta automáticamente al chat
                 st.session_state.messages.append({"role": "user", "content": question})
@@ -0,0 +1,162 @@
+"""
+Chunking de transcripciones por segmentos con timestamps
+Empaqueta los segmentos de `transcript_data` (text/start/duration) hasta un
+presupuesto de tokens, con solapamiento, y conserva el rango de tiempo de
+cada chunk. El empaquetado usa sumas acumuladas con NumPy para no recorrer
+segmento a segmento
+"""
+import os
+import re
+
+import numpy as np
+
+DEFAULT_MAX_TOKENS = int(os.getenv('CHUNK_MAX_TOKENS', '300'))
+DEFAULT_OVERLAP_TOKENS = int(os.getenv('CHUNK_OVERLAP_TOKENS', '50'))
+
+_word_re = re.compile(r"\S+")
+_encoding = None
+_encoding_loaded = False
+
+def _get_encoding():
+    """Tokenizer de tiktoken (cl100k_base, el de ada-002/gpt-4o-mini) si está disponible"""
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        _encoding_loaded = True
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding('cl100k_base')
+        except Exception:
+            # Sin tiktoken (o sin red para bajar el vocabulario) se usa una aproximación
+            _encoding = None
+    return _encoding
+
+def count_tokens(texts):
+    """
+    Cuenta tokens de varios textos a la vez
+
+    Args:
+        texts: Lista de textos
+
+    Returns:
+        np.ndarray int64 con los tokens de cada texto
+    """
+    encoding = _get_encoding()
+    if encoding is not None:
+        return np.fromiter((len(tokens) for tokens in encoding.encode_batch(texts)), dtype=np.int64, count=len(texts))
+    # Aproximación para español: ~1.3 tokens por palabra
+    return np.fromiter((int(len(_word_re.findall(text)) * 1.3) + 1 for text in texts), dtype=np.int64, count=len(texts))
+
+def _split_long_segment(segment, token_count, max_tokens):
+    """
+    Divide un segmento que no cabe en un chunk, repartiendo su duración
+    proporcionalmente entre las partes
+    """
+    words = segment['text'].split()
+    parts = max(1, int(np.ceil(token_count / max_tokens)))
+    per_part = max(1, int(np.ceil(len(words) / parts)))
+    start = float(segment.get('start', 0.0))
+    duration = float(segment.get('duration', 0.0))
+
+    pieces = []
+    for i in range(0, len(words), per_part):
+        fraction_start = i / len(words)
+        fraction_end = min(len(words), i + per_part) / len(words)
+        pieces.append({
+            'text': ' '.join(words[i:i + per_part]),
+            'start': start + duration * fraction_start,
+            'duration': duration * (fraction_end - fraction_start),
+        })
+    return pieces
+
+def chunk_segments(segments, max_tokens=None, overlap_tokens=None):
+    """
+    Agrupa segmentos consecutivos en chunks de hasta `max_tokens`
+
+    Args:
+        segments: Lista de dicts con 'text', 'start' y 'duration'
+        max_tokens: Presupuesto de tokens por chunk
+        overlap_tokens: Tokens aproximados que se repiten entre chunks consecutivos
+
+    Yields:
+        Dicts con 'text', 'start', 'end' (segundos) y 'tokens'
+    """
+    max_tokens = max_tokens or DEFAULT_MAX_TOKENS
+    overlap_tokens = DEFAULT_OVERLAP_TOKENS if overlap_tokens is None else overlap_tokens
+    overlap_tokens = min(overlap_tokens, max_tokens // 2)
+
+    segments = [s for s in segments if s.get('text', '').strip()]
+    if not segments:
+        return
+
+    tokens = count_tokens([s['text'] for s in segments])
+
+    # Segmentos más grandes que el presupuesto se parten antes de empaquetar
+    if (tokens > max_tokens).any():
+        expanded = []
+        for segment, token_count in zip(segments, tokens):
+            if token_count > max_tokens:
+                expanded.extend(_split_long_segment(segment, token_count, max_tokens))
+            else:
+                expanded.append(segment)
+        segments = expanded
+        tokens = count_tokens([s['text'] for s in segments])
+
+    starts = np.fromiter((float(s.get('start', 0.0)) for s in segments), dtype=np.float64, count=len(segments))
+    ends = starts + np.fromiter((float(s.get('duration', 0.0)) for s in segments), dtype=np.float64, count=len(segments))
+    # cumulative[i] = tokens de los segmentos [0, i)
+    cumulative = np.concatenate(([0], np.cumsum(tokens)))
+
+    n = len(segments)
+    first = 0
+    while first < n:
+        # Último segmento que cabe: mayor j con cumulative[j] - cumulative[first] <= max_tokens
+        last = int(np.searchsorted(cumulative, cumulative[first] + max_tokens, side='right')) - 1
+        last = max(last, first + 1)
+
+        yield {
+            'text': ' '.join(s['text'].strip() for s in segments[first:last]),
+            'start': float(starts[first]),
+            'end': float(ends[first:last].max()),
+            'tokens': int(cumulative[last] - cumulative[first]),
+        }
+
+        if last >= n:
+            break
+
+        # Siguiente chunk: retrocede desde `last` mientras el solapamiento quepa
+        next_first = int(np.searchsorted(cumulative, cumulative[last] - overlap_tokens, side='left'))
+        first = max(next_first, first + 1)
+
+def chunk_text(text, max_tokens=None, overlap_tokens=None):
+    """
+    Chunking de texto plano (transcripciones sin segmentos)
+    Trata cada grupo de ~40 palabras como un segmento sin tiempo
+
+    Yields:
+        Dicts con 'text', 'start', 'end' (None) y 'tokens'
+    """
+    words = text.split()
+    pseudo_segments = [
+        {'text': ' '.join(words[i:i + 40]), 'start': 0.0, 'duration': 0.0}
+        for i in range(0, len(words), 40)
+    ]
+    for chunk in chunk_segments(pseudo_segments, max_tokens, overlap_tokens):
+        chunk['start'] = None
+        chunk['end'] = None
+        yield chunk
+
+def chunk_transcription(transcription, max_tokens=None, overlap_tokens=None):
+    """
+    Chunks de una transcripción, usando los segmentos con tiempo si existen
+
+    Args:
+        transcription: Dict con 'transcript' y opcionalmente 'transcript_data'
+
+    Yields:
+        Dicts con 'text', 'start', 'end' y 'tokens'
+    """
+    segments = transcription.get('transcript_data') or []
+    if segments and isinstance(segments[0], dict) and 'start' in segments[0]:
+        yield from chunk_segments(segments, max_tokens, overlap_tokens)
+    elif transcription.get('transcript'):
+        yield from chunk_text(transcription['transcript'], max_tokens, overlap_tokens)
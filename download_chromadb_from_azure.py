@@ -88,6 +88,65 @@ def download_chromadb_from_azure():
         print(f"❌ Error descargando ChromaDB desde Azure: {e}")
         return False
 
+def download_quantized_index(index_directory=None):
+    """
+    Descarga el índice int8 (quantized_store) desde Azure Blob Storage
+    si no existe localmente
+    
+    Returns:
+        bool: True si descargó exitosamente o ya existe, False si falló
+    """
+    from quantized_store import INDEX_DIR, index_exists
+    index_directory = index_directory or INDEX_DIR
+    
+    if index_exists(index_directory):
+        print(f"✅ Índice int8 ya existe localmente en {index_directory}")
+        return True
+    
+    connection_string = os.getenv('AZURE_STORAGE_CONNECTION_STRING')
+    if not connection_string:
+        print("⚠️  AZURE_STORAGE_CONNECTION_STRING no configurada")
+        return False
+    
+    container_name = os.getenv('AZURE_STORAGE_CONTAINER', 'luisito-transcripts')
+    blob_name = "vector_index/index.tar.gz"
+    
+    try:
+        print("📥 Descargando índice int8 desde Azure Blob Storage...")
+        blob_client = BlobClient.from_connection_string(
+            connection_string,
+            container_name=container_name,
+            blob_name=blob_name
+        )
+        
+        if not blob_client.exists():
+            print("⚠️  Índice int8 no encontrado en Azure Blob Storage")
+            return False
+        
+        import tempfile
+        with tempfile.NamedTemporaryFile(delete=False, suffix='.tar.gz') as temp_file:
+            blob_client.download_blob().readinto(temp_file)
+            temp_path = temp_file.name
+        
+        try:
+            Path(index_directory).mkdir(parents=True, exist_ok=True)
+            with tarfile.open(temp_path, "r:gz") as tar:
+                tar.extractall(path=index_directory)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        
+        print("✅ Índice int8 descargado exitosamente")
+        return True
+    
+    except Exception as e:
+        print(f"❌ Error descargando índice int8 desde Azure: {e}")
+        return False
+
 if __name__ == "__main__":
-    download_chromadb_from_azure()
+    from quantized_store import VECTOR_BACKEND
+    if VECTOR_BACKEND == 'int8':
+        download_quantized_index()
+    else:
+        download_chromadb_from_azure()
 
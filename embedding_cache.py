@@ -0,0 +1,141 @@
+"""
+Caché persistente de embeddings para la construcción del índice
+Guarda cada vector (float32) en SQLite con clave sha256(deployment + texto),
+así una reconstrucción completa solo paga embeddings de texto nuevo
+"""
+import hashlib
+import os
+import sqlite3
+from pathlib import Path
+
+import numpy as np
+
+DEFAULT_PATH = os.getenv('EMBEDDING_CACHE_PATH', './cache/embeddings.sqlite3')
+
+# Límite de parámetros por consulta de SQLite (999 en versiones antiguas)
+_LOOKUP_BATCH = 500
+
+def content_key(text, deployment):
+    """Clave del embedding: el mismo texto con otro deployment es otra entrada"""
+    return hashlib.sha256(f"{deployment}\x00{text}".encode('utf-8')).hexdigest()
+
+class EmbeddingCache:
+    """
+    Almacén de vectores por hash de contenido
+
+    Args:
+        path: Ruta del archivo SQLite
+    """
+
+    def __init__(self, path=None):
+        self.path = str(path or DEFAULT_PATH)
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, dim INTEGER NOT NULL, vector BLOB NOT NULL)"
+        )
+
+    def get_many(self, keys):
+        """
+        Busca varios vectores a la vez
+
+        Args:
+            keys: Lista de claves (content_key)
+
+        Returns:
+            Dict clave -> np.ndarray float32 con las que existan
+        """
+        found = {}
+        unique = list(dict.fromkeys(keys))
+        for start in range(0, len(unique), _LOOKUP_BATCH):
+            batch = unique[start:start + _LOOKUP_BATCH]
+            rows = self._conn.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})",
+                batch
+            ).fetchall()
+            for key, blob in rows:
+                found[key] = np.frombuffer(blob, dtype='<f4')
+        return found
+
+    def put_many(self, items):
+        """
+        Guarda vectores en una sola transacción
+
+        Args:
+            items: Iterable de (clave, vector)
+        """
+        rows = []
+        for key, vector in items:
+            vector = np.asarray(vector, dtype='<f4')
+            rows.append((key, vector.shape[0], vector.tobytes()))
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, dim, vector) VALUES (?, ?, ?)", rows
+            )
+
+    def size(self):
+        """Número de vectores guardados"""
+        return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
+
+class CachedEmbeddings:
+    """
+    Envuelve un modelo de embeddings de langchain consultando la caché antes
+    de llamar a embed_documents
+
+    Args:
+        embeddings: Modelo con embed_documents/embed_query (AzureOpenAIEmbeddings)
+        deployment: Nombre del deployment (forma parte de la clave)
+        cache: EmbeddingCache (opcional, por defecto DEFAULT_PATH)
+    """
+
+    def __init__(self, embeddings, deployment, cache=None):
+        self.embeddings = embeddings
+        self.deployment = deployment
+        self.cache = cache or EmbeddingCache()
+        self.hits = 0
+        self.misses = 0
+
+    def embed_documents(self, texts):
+        """
+        Embeddings de varios textos; solo se envían a Azure los que no están en caché
+
+        Returns:
+            Lista de vectores (listas de float) en el mismo orden que texts
+        """
+        keys = [content_key(text, self.deployment) for text in texts]
+        found = self.cache.get_many(keys)
+
+        # Textos nuevos, sin repetir dentro del mismo lote
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            new_items = list(zip(missing.keys(), vectors))
+            self.cache.put_many(new_items)
+            for key, vector in new_items:
+                found[key] = np.asarray(vector, dtype='<f4')
+
+        self.misses += len(missing)
+        self.hits += len(texts) - len(missing)
+        return [found[key].tolist() for key in keys]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+    def stats(self):
+        """Aciertos y textos nuevos enviados a Azure"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / total, 3) if total else 0.0,
+        }
@@ -0,0 +1,62 @@
+"""
+Embeddings deterministas para pruebas offline (benchmarks y servidor mock)
+Cada token tiene un vector aleatorio fijo derivado de su hash; el embedding de
+un texto es la suma normalizada de sus tokens, así textos con palabras en común
+quedan cerca igual que con un modelo real, sin llamar a Azure
+"""
+import hashlib
+import re
+from functools import lru_cache
+
+import numpy as np
+
+DEFAULT_DIM = 1536
+
+_token_re = re.compile(r"\w+", re.UNICODE)
+
+@lru_cache(maxsize=200000)
+def _token_vector(token, dim):
+    """Vector pseudoaleatorio fijo para un token"""
+    seed = int.from_bytes(hashlib.sha256(token.encode('utf-8')).digest()[:8], 'little')
+    return np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+
+def embed_text(text, dim=DEFAULT_DIM):
+    """
+    Calcula el embedding determinista de un texto
+
+    Args:
+        text: Texto a embeber
+        dim: Dimensión del vector
+
+    Returns:
+        np.ndarray float32 de norma 1
+    """
+    vector = np.zeros(dim, dtype=np.float32)
+    for token in _token_re.findall(text.lower()):
+        vector += _token_vector(token, dim)
+
+    norm = np.linalg.norm(vector)
+    if norm == 0:
+        # Texto vacío: vector fijo para que siga siendo determinista
+        vector = _token_vector('', dim)
+        norm = np.linalg.norm(vector)
+    return vector / norm
+
+class FakeEmbeddings:
+    """
+    Sustituto offline con la misma interfaz que AzureOpenAIEmbeddings
+
+    Args:
+        dim: Dimensión de los vectores (1536 como ada-002 por defecto)
+    """
+
+    def __init__(self, dim=DEFAULT_DIM):
+        self.dim = dim
+
+    def embed_documents(self, texts):
+        """Embeddings de varios textos como listas de floats"""
+        return [embed_text(text, self.dim).tolist() for text in texts]
+
+    def embed_query(self, text):
+        """Embedding de una pregunta como lista de floats"""
+        return embed_text(text, self.dim).tolist()
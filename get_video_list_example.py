@@ -3,7 +3,7 @@ Ejemplo de cómo obtener la lista de videos de un canal de YouTube
 Usando YouTube Data API v3
 """
 import os
-from googleapiclient.discovery import build
+from youtube_crawler import ChannelCrawler
 from dotenv import load_dotenv
 import json
 
@@ -20,38 +20,12 @@ def get_all_videos_from_channel(channel_id, api_key):
     Returns:
         Lista de diccionarios con información de cada video
     """
-    youtube = build('youtube', 'v3', developerKey=api_key)
-    
-    videos = []
-    next_page_token = None
-    
-    while True:
-        # Buscar videos del canal
-        request = youtube.search().list(
-            part="snippet",
-            channelId=channel_id,
-            maxResults=50,  # Máximo permitido por request
-            order="date",
-            type="video",
-            pageToken=next_page_token
-        )
-        response = request.execute()
-        
-        # Procesar resultados
-        for item in response['items']:
-            videos.append({
-                'video_id': item['id']['videoId'],
-                'title': item['snippet']['title'],
-                'published_at': item['snippet']['publishedAt'],
-                'description': item['snippet']['description'][:200],  # Primeros 200 chars
-                'channel_id': channel_id
-            })
-        
-        # Verificar si hay más páginas
-        next_page_token = response.get('nextPageToken')
-        if not next_page_token:
-            break
+    # La playlist de subidas cuesta 1 unidad por página (search.list cuesta 100)
+    crawler = ChannelCrawler(api_key)
+    videos = list(crawler.iter_videos(channel_id))
     
+    stats = crawler.stats()
+    print(f"   📊 Cuota usada: {stats['quota_spent']} unidades ({stats['requests']} peticiones)")
     return videos
 
 def save_video_list(videos, filename='data/video_list.json'):
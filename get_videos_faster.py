@@ -1,70 +1,41 @@
 """
 Obtener videos de YouTube de forma más eficiente
-Usa channels.list y luego busca con search cada vez que sea necesario
+Usa la playlist de subidas del canal (playlistItems.list) y videos.list por lotes
 """
 import os
-from googleapiclient.discovery import build
 from dotenv import load_dotenv
 import json
-import time
+from youtube_crawler import ChannelCrawler, QuotaExceededError
+from video_sync import sync_video_list, api_videos
 
 load_dotenv()
 
 def get_videos_efficient(channel_id, api_key, max_videos=100):
     """
     Obtiene videos de forma más eficiente
+    Recorre la playlist de subidas (1 unidad de cuota por página de 50) en vez
+    de search.list (100 unidades por página) y cachea las respuestas en disco
     """
-    youtube = build('youtube', 'v3', developerKey=api_key)
-    
+    crawler = ChannelCrawler(api_key)
     videos = []
-    next_page_token = None
-    page = 0
     
     print(f"📥 Obteniendo hasta {max_videos} videos...")
     
-    while len(videos) < max_videos:
-        page += 1
-        print(f"   Página {page}...")
-        
-        try:
-            request = youtube.search().list(
-                part="snippet",
-                channelId=channel_id,
-                maxResults=min(50, max_videos - len(videos)),
-                order="date",
-                type="video",
-                pageToken=next_page_token
-            )
-            response = request.execute()
-            
-            # Procesar resultados
-            for item in response['items']:
-                if len(videos) >= max_videos:
-                    break
-                videos.append({
-                    'video_id': item['id']['videoId'],
-                    'title': item['snippet']['title'],
-                    'published_at': item['snippet']['publishedAt'],
-                    'description': item['snippet'].get('description', '')[:200],
-                    'channel_id': channel_id
-                })
-            
-            # Verificar si hay más páginas
-            next_page_token = response.get('nextPageToken')
-            if not next_page_token or len(videos) >= max_videos:
-                break
-            
-            # Rate limiting
-            time.sleep(0.5)
-            
-        except Exception as e:
-            print(f"   ⚠️  Error en página {page}: {e}")
-            if "quotaExceeded" in str(e):
-                print("   ❌ Cuota excedida")
-                break
-            time.sleep(2)
-            continue
+    try:
+        for video in crawler.iter_videos(channel_id, max_videos=max_videos):
+            videos.append(video)
+            if len(videos) % 50 == 0:
+                print(f"   {len(videos)} videos...")
+    except QuotaExceededError as e:
+        print(f"   ❌ Cuota excedida: {e}")
+    except Exception as e:
+        print(f"   ⚠️  Error obteniendo videos: {e}")
+        if "quotaExceeded" in str(e):
+            print("   ❌ Cuota excedida")
     
+    stats = crawler.stats()
+    print(f"   📊 Cuota usada: {stats['quota_spent']} unidades "
+          f"({stats['requests']} peticiones, {stats['cache_hits']} desde caché)")
     return videos
 
 def save_video_list(videos, filename='data/video_list.json'):
@@ -84,16 +55,16 @@ def main():
         print("❌ Configura YOUTUBE_CHANNEL_ID y YOUTUBE_API_KEY en .env")
         return
     
-    # Obtener videos
-    videos = get_videos_efficient(channel_id, api_key, max_videos=200)
+    # Sincronización incremental: solo pagina hasta llegar a videos conocidos
+    # y deja los nuevos en data/new_videos.json
+    try:
+        new_videos = sync_video_list(api_videos(channel_id, api_key))
+    except Exception as e:
+        print(f"\n❌ No se pudieron obtener videos: {e}")
+        return
     
-    if videos:
-        os.makedirs('data', exist_ok=True)
-        save_video_list(videos)
-        print(f"\n📊 Total: {len(videos)} videos")
-        print("\n✅ ¡Listo para transcribir!")
-    else:
-        print("\n❌ No se pudieron obtener videos")
+    print(f"\n📊 Nuevos: {len(new_videos)} videos")
+    print("\n✅ ¡Listo para transcribir!")
 
 if __name__ == "__main__":
     main()
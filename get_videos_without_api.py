@@ -5,54 +5,170 @@ Usando yt-dlp como alternativa
 import subprocess
 import json
 import os
+import queue
+import threading
+from collections import deque
 from dotenv import load_dotenv
 
 load_dotenv()
 
-def get_videos_with_ytdlp(channel_url):
+YTDLP_TABS = ('videos', 'shorts', 'streams')
+
+def _parse_ytdlp_line(line, tab):
+    """Convierte una línea JSON de yt-dlp en un registro de video (None si no es válida)"""
+    try:
+        video_data = json.loads(line)
+    except ValueError:
+        return None
+    if not video_data.get('id'):
+        return None
+    return {
+        'video_id': video_data.get('id'),
+        'title': video_data.get('title'),
+        'duration': video_data.get('duration'),
+        'view_count': video_data.get('view_count'),
+        'published_at': video_data.get('upload_date', '')[:10] if video_data.get('upload_date') else None,
+        'url': video_data.get('url', f"https://www.youtube.com/watch?v={video_data.get('id')}"),
+        'tab': tab
+    }
+
+def iter_videos_with_ytdlp(channel_url, tab='videos', start=1, end=None):
+    """
+    Lee la salida de yt-dlp línea a línea y entrega cada video en cuanto llega
+    Si el consumidor deja de iterar, el proceso de yt-dlp se termina
+    
+    Args:
+        channel_url: URL del canal (ej: @LuisitoComunica o channel/UC...)
+        tab: Pestaña del canal ('videos', 'shorts' o 'streams')
+        start: Primer elemento (1 = el más reciente), para paginar
+        end: Último elemento (None = sin límite)
+    
+    Yields:
+        Diccionarios con información de cada video
+    """
+    cmd = [
+        'yt-dlp',
+        '--flat-playlist',
+        '--dump-json',
+        '--ignore-errors',
+        '--playlist-start', str(start),
+    ]
+    if end is not None:
+        cmd += ['--playlist-end', str(end)]
+    cmd.append(f'https://www.youtube.com/{channel_url}/{tab}')
+    
+    process = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        encoding='utf-8',
+        bufsize=1
+    )
+    # stderr se lee en otro thread: si se llena el pipe, yt-dlp se bloquea
+    # esperando y stdout deja de avanzar. Solo interesan las últimas líneas
+    stderr_tail = deque(maxlen=20)
+    stderr_thread = threading.Thread(target=stderr_tail.extend, args=(process.stderr,), daemon=True)
+    stderr_thread.start()
+    try:
+        for line in process.stdout:
+            video = _parse_ytdlp_line(line, tab)
+            if video:
+                yield video
+        process.wait()
+        if process.returncode not in (0, None):
+            stderr_thread.join(timeout=5)
+            stderr = ''.join(stderr_tail).strip()
+            # Canales sin esa pestaña (ej. sin directos) no son un error real
+            if stderr and 'does not have a' not in stderr:
+                print(f"⚠️  yt-dlp ({tab}) terminó con código {process.returncode}: {stderr[-300:]}")
+    finally:
+        if process.poll() is None:
+            process.terminate()
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        stderr_thread.join(timeout=5)
+        process.stdout.close()
+        process.stderr.close()
+
+def iter_channel_tabs(channel_url, tabs=YTDLP_TABS, end=None):
+    """
+    Enumera varias pestañas del canal a la vez (un yt-dlp por pestaña)
+    Los videos se entregan según van llegando de cualquier pestaña, sin repetidos
+    
+    Args:
+        channel_url: URL del canal
+        tabs: Pestañas a recorrer
+        end: Máximo de elementos por pestaña (None = sin límite)
+    
+    Yields:
+        Diccionarios con información de cada video (con 'tab')
+    """
+    results = queue.Queue(maxsize=500)
+    stop = threading.Event()
+    done = object()
+    
+    def enumerate_tab(tab):
+        try:
+            for video in iter_videos_with_ytdlp(channel_url, tab, end=end):
+                # put con timeout para notar si el consumidor se detuvo
+                while not stop.is_set():
+                    try:
+                        results.put(video, timeout=0.5)
+                        break
+                    except queue.Full:
+                        continue
+                if stop.is_set():
+                    break
+        except Exception as e:
+            print(f"⚠️  Error enumerando pestaña '{tab}': {e}")
+        finally:
+            results.put(done)
+    
+    threads = [threading.Thread(target=enumerate_tab, args=(tab,), daemon=True) for tab in tabs]
+    for thread in threads:
+        thread.start()
+    
+    seen = set()
+    finished = 0
+    try:
+        while finished < len(threads):
+            video = results.get()
+            if video is done:
+                finished += 1
+                continue
+            if video['video_id'] not in seen:
+                seen.add(video['video_id'])
+                yield video
+    finally:
+        stop.set()
+        # Vaciar la cola para que ningún thread quede bloqueado en put
+        while any(thread.is_alive() for thread in threads):
+            try:
+                results.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+def get_videos_with_ytdlp(channel_url, max_videos=50, tabs=('videos',)):
     """
     Obtiene lista de videos usando yt-dlp
     
     Args:
         channel_url: URL del canal (ej: @LuisitoComunica o UCECJDeK0MNapZbpaOzxrUPA)
+        max_videos: Máximo de videos por pestaña (None = todos)
+        tabs: Pestañas del canal a recorrer en paralelo
     
     Returns:
         Lista de diccionarios con información de videos
     """
     try:
-        # Intentar usar yt-dlp
-        cmd = [
-            'yt-dlp',
-            '--flat-playlist',
-            '--dump-json',
-            '--playlist-end', '50',  # Limitar a primeros 50 videos
-            f'https://www.youtube.com/{channel_url}/videos'
-        ]
-        
         print("📥 Descargando información de videos con yt-dlp...")
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        
-        if result.returncode != 0:
-            print(f"⚠️  yt-dlp no está instalado: {result.stderr}")
-            return None
-        
-        # Parsear salida JSON
-        videos = []
-        for line in result.stdout.strip().split('\n'):
-            if line:
-                try:
-                    video_data = json.loads(line)
-                    videos.append({
-                        'video_id': video_data.get('id'),
-                        'title': video_data.get('title'),
-                        'duration': video_data.get('duration'),
-                        'view_count': video_data.get('view_count'),
-                        'published_at': video_data.get('upload_date', '')[:10] if video_data.get('upload_date') else None,
-                        'url': video_data.get('url', f"https://www.youtube.com/watch?v={video_data.get('id')}")
-                    })
-                except:
-                    continue
-        
+        if len(tabs) == 1:
+            videos = list(iter_videos_with_ytdlp(channel_url, tabs[0], end=max_videos))
+        else:
+            videos = list(iter_channel_tabs(channel_url, tabs, end=max_videos))
         return videos
     
     except FileNotFoundError:
@@ -82,12 +198,16 @@ def main():
     print(f"Canal: {channel_id}")
     print("Usando yt-dlp (sin API key necesario)\n")
     
-    videos = get_videos_with_ytdlp(channel_url)
+    # Todas las pestañas en paralelo y sin límite de videos
+    videos = get_videos_with_ytdlp(channel_url, max_videos=None, tabs=YTDLP_TABS)
     
     if videos:
-        os.makedirs('data', exist_ok=True)
-        save_video_list(videos)
-        print(f"\n📊 Total: {len(videos)} videos")
+        # Mezcla con la lista existente y deja los nuevos en data/new_videos.json
+        # Las pestañas llegan intercaladas (no en orden de publicación), así que
+        # no se puede cortar al ver videos conocidos: se revisa la lista entera
+        from video_sync import sync_video_list
+        new_videos = sync_video_list(videos, early_stop=False)
+        print(f"\n📊 Nuevos: {len(new_videos)} videos")
         print("\n✅ ¡Listo para transcribir!")
     else:
         print("\n⚠️  No se pudieron obtener videos")
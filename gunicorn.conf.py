@@ -0,0 +1,47 @@
+"""
+Configuración de gunicorn para producción (API con varios workers uvicorn)
+Uso: gunicorn -c gunicorn.conf.py api_server:app
+"""
+import multiprocessing
+import os
+import shutil
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+worker_class = "uvicorn.workers.UvicornWorker"
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+
+# Importa api_server una sola vez en el master antes del fork: el código y los
+# módulos quedan compartidos copy-on-write entre workers
+preload_app = True
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '120'))
+graceful_timeout = 30
+keepalive = 5
+
+# Reciclar workers periódicamente evita que la memoria crezca sin límite
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '2000'))
+max_requests_jitter = 200
+
+accesslog = "-"
+errorlog = "-"
+
+# Las métricas de una ejecución anterior no deben sumarse a las nuevas; se limpia
+# aquí porque este archivo se ejecuta antes de importar la app (preload)
+_metrics_dir = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+if _metrics_dir:
+    shutil.rmtree(_metrics_dir, ignore_errors=True)
+    os.makedirs(_metrics_dir, exist_ok=True)
+
+def on_starting(server):
+    """Descarga el snapshot y calienta la page cache una sola vez, antes de crear workers"""
+    from api_server import preload_vector_store
+    preload_vector_store()
+
+def post_fork(server, worker):
+    """Cada worker abre su propio cliente de ChromaDB y pool HTTP en el evento startup"""
+    server.log.info(f"Worker {worker.pid} listo")
+
+def child_exit(server, worker):
+    """Descarta las métricas en vivo (gauges) de un worker que terminó"""
+    from metrics import mark_worker_dead
+    mark_worker_dead(worker.pid)
@@ -0,0 +1,108 @@
+"""
+Estado de salud en memoria, refrescado en segundo plano
+Las sondas del orquestador y los dashboards consultan /health y /stats con
+frecuencia; en vez de tocar disco o red en cada petición, un thread ejecuta
+las comprobaciones cada HEALTH_REFRESH_SECONDS y los endpoints devuelven la
+última foto desde memoria
+
+Uso:
+    state = HealthState({'collection_count': collection.count})
+    state.start()
+    state.snapshot()   # {'collection_count': 1234, 'updated_at': ..., 'age_seconds': ...}
+"""
+import os
+import threading
+import time
+from datetime import datetime
+
+REFRESH_SECONDS = float(os.getenv('HEALTH_REFRESH_SECONDS', '15'))
+PROBE_TIMEOUT_SECONDS = float(os.getenv('HEALTH_PROBE_TIMEOUT_SECONDS', '3'))
+
+class HealthState:
+    """
+    Ejecuta comprobaciones periódicas y guarda el último resultado
+
+    Args:
+        probes: Dict nombre -> función sin argumentos que devuelve el valor
+        interval: Segundos entre refrescos
+    """
+
+    def __init__(self, probes, interval=REFRESH_SECONDS):
+        self.probes = dict(probes)
+        self.interval = interval
+        self._snapshot = {'updated_at': None}
+        self._refreshed_at = None
+        self._thread = None
+        self._pid = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+
+    def refresh(self):
+        """Ejecuta todas las comprobaciones y reemplaza la foto (una sola asignación)"""
+        values = {}
+        for name, probe in self.probes.items():
+            try:
+                values[name] = probe()
+            except Exception as e:
+                values[name] = {'error': f"{type(e).__name__}: {e}"[:200]}
+        values['updated_at'] = datetime.now().isoformat(timespec='seconds')
+        self._snapshot = values
+        self._refreshed_at = time.monotonic()
+        return values
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.refresh()
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def start(self):
+        """
+        Arranca el refresco en segundo plano (una vez por proceso). Hasta el
+        primer refresco la foto está vacía y la readiness no se cumple
+        """
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='health-state', daemon=True)
+        self._thread.start()
+
+    def request_refresh(self):
+        """Adelanta el siguiente refresco (ej. tras recargar el índice)"""
+        self._wake.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def snapshot(self):
+        """Última foto del estado, sin I/O"""
+        snapshot = dict(self._snapshot)
+        if self._refreshed_at is not None:
+            snapshot['age_seconds'] = round(time.monotonic() - self._refreshed_at, 1)
+        return snapshot
+
+def http_reachable(url, timeout=PROBE_TIMEOUT_SECONDS):
+    """
+    Comprueba que un servicio HTTP responde (cualquier código de estado cuenta:
+    un 401 o 404 también demuestra que hay red y TLS hasta el servicio)
+
+    Returns:
+        Dict con 'reachable' y la latencia o el error
+    """
+    if not url:
+        return {'reachable': False, 'error': 'sin configurar'}
+
+    from azure_clients import get_http_client
+
+    start = time.perf_counter()
+    try:
+        response = get_http_client().get(url, timeout=timeout)
+        return {
+            'reachable': True,
+            'status_code': response.status_code,
+            'latency_ms': round((time.perf_counter() - start) * 1000, 1),
+        }
+    except Exception as e:
+        return {'reachable': False, 'error': type(e).__name__}
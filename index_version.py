@@ -0,0 +1,45 @@
+"""
+Marca de versión del vector store (index_version.json)
+Quien escribe en el índice (pipeline, scheduler) la actualiza al terminar;
+la API la compara periódicamente y recarga la collection si cambió, sin
+reiniciar los workers
+"""
+import json
+import os
+import time
+from pathlib import Path
+
+VERSION_FILE = 'index_version.json'
+
+def write_index_version(directory, **info):
+    """
+    Escribe una versión nueva en directory/index_version.json (atómico)
+
+    Args:
+        directory: Directorio del vector store
+        **info: Datos extra para diagnóstico (ej. videos indexados)
+
+    Returns:
+        Dict con la versión escrita
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    version = {'version': time.time_ns(), 'updated_at': time.strftime('%Y-%m-%dT%H:%M:%S'), **info}
+    temp_path = directory / f"{VERSION_FILE}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(version, f)
+    os.replace(temp_path, directory / VERSION_FILE)
+    return version
+
+def read_index_version(directory):
+    """
+    Versión actual del vector store
+
+    Returns:
+        Número de versión o None si nunca se escribió
+    """
+    try:
+        with open(Path(directory) / VERSION_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f).get('version')
+    except (OSError, ValueError):
+        return None
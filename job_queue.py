@@ -0,0 +1,220 @@
+"""
+Cola de trabajos persistente (SQLite) para procesar videos
+Cada video es un trabajo con estado (pending, running, done, failed),
+intentos y reintento con backoff exponencial. Sobrevive a reinicios del
+scheduler: cada trabajo 'running' guarda el proceso que lo tomó y al arrancar
+se devuelven a la cola los de procesos que ya no existen
+"""
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+DEFAULT_PATH = os.getenv('JOB_QUEUE_PATH', 'data/jobs.sqlite3')
+MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', '4'))
+RETRY_BASE_SECONDS = float(os.getenv('JOB_RETRY_BASE_SECONDS', '300'))
+
+STATUSES = ('pending', 'running', 'done', 'failed')
+
+class JobQueue:
+    """
+    Cola de videos a procesar sobre un archivo SQLite
+
+    Args:
+        path: Ruta del archivo SQLite
+        max_attempts: Intentos antes de marcar un trabajo como 'failed'
+        retry_base: Segundos de espera tras el primer fallo (se duplica en cada intento)
+    """
+
+    def __init__(self, path=None, max_attempts=MAX_ATTEMPTS, retry_base=RETRY_BASE_SECONDS):
+        self.path = str(path or DEFAULT_PATH)
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        # Los callbacks del pipeline llegan desde sus threads
+        self._conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "video_id TEXT PRIMARY KEY, payload TEXT NOT NULL, status TEXT NOT NULL, "
+            "attempts INTEGER NOT NULL DEFAULT 0, next_run_at REAL NOT NULL, last_error TEXT, "
+            "created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if 'owner' not in columns:
+            # Colas creadas antes de guardar el dueño de cada trabajo
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, next_run_at)")
+        self._lock = threading.Lock()
+        self.host = socket.gethostname()
+
+    @contextmanager
+    def _transaction(self):
+        """Transacción con bloqueo de escritura (una conexión compartida entre threads)"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def enqueue(self, videos):
+        """
+        Agrega videos a la cola (los que ya existen se ignoran)
+
+        Args:
+            videos: Iterable de dicts de video con 'video_id'
+
+        Returns:
+            Número de trabajos nuevos
+        """
+        now = time.time()
+        rows = [
+            (video['video_id'], json.dumps(video, ensure_ascii=False), now, now, now)
+            for video in videos
+        ]
+        with self._transaction() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO jobs (video_id, payload, status, next_run_at, created_at, updated_at) "
+                "VALUES (?, ?, 'pending', ?, ?, ?)",
+                rows
+            )
+            return conn.total_changes - before
+
+    def claim(self, limit=1):
+        """
+        Toma hasta `limit` trabajos listos y los marca como 'running'
+
+        Returns:
+            Lista de dicts de video
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            rows = conn.execute(
+                "SELECT video_id, payload FROM jobs WHERE status = 'pending' AND next_run_at <= ? "
+                "ORDER BY next_run_at LIMIT ?",
+                (now, limit)
+            ).fetchall()
+            conn.executemany(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, owner = ?, updated_at = ? "
+                "WHERE video_id = ?",
+                [(f"{self.host}:{os.getpid()}", now, video_id) for video_id, _ in rows]
+            )
+        return [json.loads(payload) for _, payload in rows]
+
+    def complete(self, video_id):
+        """Marca un trabajo como terminado"""
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'done', last_error = NULL, updated_at = ? WHERE video_id = ?",
+                (time.time(), video_id)
+            )
+
+    def fail(self, video_id, error, retryable=True):
+        """
+        Registra un fallo: reprograma con backoff o marca 'failed' si se agotaron los intentos
+
+        Returns:
+            True si el trabajo se volverá a intentar
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute("SELECT attempts FROM jobs WHERE video_id = ?", (video_id,)).fetchone()
+            attempts = row[0] if row else self.max_attempts
+            retry = retryable and attempts < self.max_attempts
+            conn.execute(
+                "UPDATE jobs SET status = ?, next_run_at = ?, last_error = ?, updated_at = ? WHERE video_id = ?",
+                (
+                    'pending' if retry else 'failed',
+                    now + self.retry_base * 2 ** max(0, attempts - 1),
+                    str(error)[:500],
+                    now,
+                    video_id,
+                )
+            )
+        return retry
+
+    def requeue_stale(self, timeout=3600):
+        """Devuelve a 'pending' los trabajos 'running' sin actualizar en `timeout` segundos (ej. un proceso colgado)"""
+        now = time.time()
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'pending', next_run_at = ?, updated_at = ? "
+                "WHERE status = 'running' AND updated_at < ?",
+                (now, now, now - timeout)
+            )
+            return cursor.rowcount
+
+    def _owner_alive(self, owner):
+        """
+        True si el proceso dueño de un trabajo sigue vivo en esta máquina
+        El propio proceso cuenta como muerto: en un contenedor reiniciado el
+        scheduler vuelve a tener el mismo PID que la corrida que se cortó
+        """
+        host, _, pid = (owner or '').rpartition(':')
+        if host != self.host:
+            # Otra máquina: no se puede comprobar, queda para requeue_stale
+            return bool(owner)
+        try:
+            pid = int(pid)
+        except ValueError:
+            return False
+        if pid == os.getpid():
+            return False
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            # Existe pero es de otro usuario
+            return True
+        return True
+
+    def requeue_orphaned(self):
+        """
+        Devuelve a 'pending' los trabajos 'running' cuyo proceso ya no existe
+        Se llama al arrancar el scheduler, antes de tomar trabajos nuevos
+
+        Returns:
+            Número de trabajos recuperados
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            rows = conn.execute("SELECT video_id, owner FROM jobs WHERE status = 'running'").fetchall()
+            orphaned = [(now, now, video_id) for video_id, owner in rows if not self._owner_alive(owner)]
+            conn.executemany(
+                "UPDATE jobs SET status = 'pending', next_run_at = ?, updated_at = ? "
+                "WHERE video_id = ? AND status = 'running'",
+                orphaned
+            )
+            return len(orphaned)
+
+    def retry_failed(self):
+        """Vuelve a encolar todos los trabajos 'failed' con los intentos a cero"""
+        now = time.time()
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'pending', attempts = 0, next_run_at = ?, updated_at = ? "
+                "WHERE status = 'failed'",
+                (now, now)
+            )
+            return cursor.rowcount
+
+    def counts(self):
+        """Número de trabajos por estado"""
+        counts = dict.fromkeys(STATUSES, 0)
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        for status, count in rows:
+            counts[status] = count
+        return counts
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,125 @@
+"""
+Generador de carga para /chat
+Envía peticiones a un ritmo objetivo (lazo abierto: no espera respuestas para
+mandar la siguiente) y reporta throughput, percentiles de latencia y errores
+
+Todas las peticiones salen de la misma IP, y el rate limit por cliente de la
+API (por defecto 1 RPS con ráfagas de 5) rechazaría casi todo con 429. Para
+medir capacidad, arranca la API con un límite por encima del ritmo de la prueba:
+    RATE_LIMIT_PER_SECOND=1000 RATE_LIMIT_BURST=1000 uvicorn api_server:app
+Los 429 se cuentan aparte de los errores y se avisa si dominan el resultado
+
+Uso (con mock_azure_openai.py para no consumir cuota):
+    python load_test.py --url http://localhost:8000 --rps 20 --duration 60
+    python load_test.py --rps 50 --unique-ratio 0.1   # 90% preguntas repetidas
+"""
+import argparse
+import asyncio
+import random
+import time
+from collections import Counter
+
+import httpx
+import numpy as np
+
+# Las mismas que precalcula el warm-up de la API: las repetidas miden la caché
+from suggested_questions import SUGGESTED_QUESTIONS
+
+def pick_question(rng, unique_ratio, counter):
+    """
+    Elige una pregunta: repetida (prueba caché/single-flight) o única
+
+    Args:
+        rng: Generador aleatorio
+        unique_ratio: Fracción de preguntas que no se repiten
+        counter: Contador para generar preguntas únicas
+    """
+    if rng.random() < unique_ratio:
+        counter[0] += 1
+        return f"{rng.choice(SUGGESTED_QUESTIONS)} (variante {counter[0]})"
+    return rng.choice(SUGGESTED_QUESTIONS)
+
+async def send_request(client, url, question, results):
+    """Envía una petición y guarda (status, latencia en segundos)"""
+    start = time.perf_counter()
+    try:
+        response = await client.post(f"{url}/chat", json={"message": question, "history": []})
+        status = response.status_code
+    except httpx.TimeoutException:
+        status = 'timeout'
+    except httpx.HTTPError as e:
+        status = type(e).__name__
+    results.append((status, time.perf_counter() - start))
+
+async def run_load(url, rps, duration, unique_ratio=0.5, timeout=60, seed=1):
+    """
+    Lanza peticiones a `rps` por segundo durante `duration` segundos
+
+    Returns:
+        Tupla con (resultados, segundos reales de la prueba)
+    """
+    rng = random.Random(seed)
+    counter = [0]
+    results = []
+    tasks = []
+    limits = httpx.Limits(max_connections=1000, max_keepalive_connections=200)
+
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+        start = time.perf_counter()
+        total = int(rps * duration)
+        for i in range(total):
+            # Lazo abierto: la i-ésima petición sale en start + i/rps
+            delay = start + i / rps - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            question = pick_question(rng, unique_ratio, counter)
+            tasks.append(asyncio.create_task(send_request(client, url, question, results)))
+
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+
+    return results, elapsed
+
+def report(results, elapsed, target_rps):
+    """Imprime el resumen de la prueba"""
+    statuses = Counter(status for status, _ in results)
+    ok_latencies = [latency * 1000 for status, latency in results if status == 200]
+    # Los 429 son el rate limit por cliente, no fallos del servicio
+    rate_limited = statuses.get(429, 0)
+    errors = len(results) - statuses.get(200, 0) - rate_limited
+
+    print(f"\n{'='*60}")
+    print("📊 RESULTADOS DE CARGA")
+    print(f"{'='*60}")
+    print(f"   Peticiones:         {len(results)} en {elapsed:.1f}s (objetivo {target_rps} RPS)")
+    print(f"   Throughput OK:      {statuses.get(200, 0) / elapsed:.1f} RPS")
+    print(f"   Rate limit (429):   {rate_limited / len(results) * 100 if results else 0:.1f}%")
+    print(f"   Tasa de error:      {errors / len(results) * 100 if results else 0:.1f}%")
+    if ok_latencies:
+        p50, p95, p99 = np.percentile(ok_latencies, [50, 95, 99])
+        print(f"   Latencia p50:       {p50:.0f} ms")
+        print(f"   Latencia p95:       {p95:.0f} ms")
+        print(f"   Latencia p99:       {p99:.0f} ms")
+        print(f"   Latencia máx:       {max(ok_latencies):.0f} ms")
+    print(f"   Códigos:            {dict(statuses)}")
+    print(f"{'='*60}\n")
+    if results and rate_limited > len(results) / 2:
+        print("⚠️  La mayoría de peticiones fueron rechazadas por el rate limit por cliente:")
+        print("   el resultado no mide la capacidad del servicio. Arranca la API con")
+        print("   RATE_LIMIT_PER_SECOND y RATE_LIMIT_BURST por encima de --rps\n")
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga de /chat")
+    parser.add_argument('--url', default='http://localhost:8000', help="URL base de la API")
+    parser.add_argument('--rps', type=float, default=10, help="Peticiones por segundo objetivo")
+    parser.add_argument('--duration', type=float, default=30, help="Duración en segundos")
+    parser.add_argument('--unique-ratio', type=float, default=0.5, help="Fracción de preguntas únicas")
+    parser.add_argument('--timeout', type=float, default=60, help="Timeout por petición")
+    args = parser.parse_args()
+
+    print(f"🚀 Enviando {args.rps} RPS durante {args.duration}s a {args.url}/chat")
+    results, elapsed = asyncio.run(run_load(args.url, args.rps, args.duration, args.unique_ratio, args.timeout))
+    report(results, elapsed, args.rps)
+
+if __name__ == "__main__":
+    main()
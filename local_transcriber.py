@@ -0,0 +1,237 @@
+"""
+Transcripción local del audio (tercer fallback, sin GPU)
+Cuando ni el MCP ni youtube-transcript-api tienen subtítulos, se descarga el
+audio con yt-dlp y se transcribe con faster-whisper en CPU. El audio se parte
+en segmentos (cortando en silencios) que se reparten entre un pool de
+procesos, uno por núcleo; el resultado usa el mismo formato de
+transcript_data que los otros métodos
+
+Si faster-whisper no está instalado el fallback queda desactivado
+
+Uso:
+    python local_transcriber.py VIDEO_ID
+"""
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+import numpy as np
+
+try:
+    from faster_whisper import WhisperModel, decode_audio
+    WHISPER_AVAILABLE = True
+except ImportError:
+    WHISPER_AVAILABLE = False
+
+SAMPLE_RATE = 16000
+
+ENABLED = os.getenv('LOCAL_TRANSCRIBE_ENABLED', 'true').lower() == 'true'
+MODEL_SIZE = os.getenv('WHISPER_MODEL', 'small')
+COMPUTE_TYPE = os.getenv('WHISPER_COMPUTE_TYPE', 'int8')
+LANGUAGE = os.getenv('WHISPER_LANGUAGE', 'es') or None
+WORKERS = int(os.getenv('LOCAL_TRANSCRIBE_WORKERS', str(max(1, (os.cpu_count() or 2) // 2))))
+SEGMENT_SECONDS = float(os.getenv('LOCAL_TRANSCRIBE_SEGMENT_SECONDS', '300'))
+MAX_VIDEO_SECONDS = int(os.getenv('LOCAL_TRANSCRIBE_MAX_SECONDS', '10800'))
+AUDIO_DIR = os.getenv('LOCAL_AUDIO_DIR', './cache/audio')
+
+# Modelo cargado una vez en cada proceso del pool
+_model = None
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def is_available():
+    """True si el fallback local puede usarse (faster-whisper y yt-dlp instalados)"""
+    return ENABLED and WHISPER_AVAILABLE and shutil.which('yt-dlp') is not None
+
+def download_audio(video_id, directory=AUDIO_DIR, max_seconds=MAX_VIDEO_SECONDS):
+    """
+    Descarga solo la pista de audio del video (sin convertir: PyAV la decodifica)
+
+    Returns:
+        Path del archivo de audio
+    """
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    command = [
+        'yt-dlp',
+        '-f', 'bestaudio',
+        '--no-playlist',
+        '--quiet',
+        '--no-warnings',
+        '--match-filter', f'duration <= {max_seconds}',
+        '-o', f'{directory}/{video_id}.%(ext)s',
+        f'https://www.youtube.com/watch?v={video_id}',
+    ]
+    subprocess.run(command, check=True, capture_output=True, text=True, timeout=900)
+
+    for path in Path(directory).glob(f'{video_id}.*'):
+        if path.suffix not in ('.part', '.ytdl'):
+            return path
+    raise RuntimeError(f"yt-dlp no descargó audio (¿video de más de {max_seconds}s?)")
+
+def find_cut_points(audio, sample_rate=SAMPLE_RATE, segment_seconds=SEGMENT_SECONDS,
+                    search_seconds=3.0, frame_seconds=0.05):
+    """
+    Posiciones de corte cada ~segment_seconds, movidas al tramo de menor
+    energía dentro de ±search_seconds para no partir palabras
+
+    Returns:
+        Lista de índices de muestra, empezando en 0 y terminando en len(audio)
+    """
+    frame = int(frame_seconds * sample_rate)
+    segment = int(segment_seconds * sample_rate)
+    search = int(search_seconds * sample_rate)
+
+    cuts = [0]
+    target = segment
+    while target < len(audio) - search:
+        window = audio[target - search:target + search]
+        frames = len(window) // frame
+        energy = np.square(window[:frames * frame].reshape(frames, frame)).mean(axis=1)
+        cut = target - search + int(np.argmin(energy)) * frame + frame // 2
+        cuts.append(cut)
+        target = cut + segment
+    cuts.append(len(audio))
+    return cuts
+
+def _init_worker(model_size, compute_type, cpu_threads):
+    global _model
+    _model = WhisperModel(model_size, device='cpu', compute_type=compute_type, cpu_threads=cpu_threads)
+
+def _transcribe_segment(task):
+    """Transcribe un segmento en un proceso del pool; los tiempos se desplazan al inicio del segmento"""
+    offset, samples, language = task
+    segments, info = _model.transcribe(
+        samples,
+        language=language,
+        beam_size=1,
+        vad_filter=True,
+        condition_on_previous_text=False
+    )
+    items = []
+    for segment in segments:
+        text = segment.text.strip()
+        if text:
+            items.append({
+                'text': text,
+                'start': round(offset + segment.start, 2),
+                'duration': round(segment.end - segment.start, 2),
+            })
+    return info.language, items
+
+def get_pool(workers=WORKERS):
+    """
+    Pool de procesos compartido (el modelo se carga una sola vez por proceso)
+    Se usa 'spawn': el pipeline tiene threads y fork con threads no es seguro
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            cpu_threads = max(1, (os.cpu_count() or 1) // workers)
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(MODEL_SIZE, COMPUTE_TYPE, cpu_threads)
+            )
+        return _pool
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+def transcribe_audio(path, language=LANGUAGE, segment_seconds=SEGMENT_SECONDS):
+    """
+    Transcribe un archivo de audio repartiendo sus segmentos entre el pool
+
+    Returns:
+        Tupla (transcript_data, idioma detectado)
+    """
+    audio = decode_audio(str(path), sampling_rate=SAMPLE_RATE)
+    cuts = find_cut_points(audio, segment_seconds=segment_seconds)
+    tasks = [
+        (start / SAMPLE_RATE, audio[start:end], language)
+        for start, end in zip(cuts, cuts[1:])
+    ]
+
+    transcript_data = []
+    detected = language
+    try:
+        # map conserva el orden de los segmentos
+        for segment_language, items in get_pool().map(_transcribe_segment, tasks):
+            detected = detected or segment_language
+            transcript_data.extend(items)
+    except BrokenProcessPool:
+        # Un proceso murió (memoria, modelo sin descargar): el próximo video crea otro pool
+        _reset_pool()
+        raise
+    return transcript_data, detected
+
+def transcribe_video(video_id):
+    """
+    Descarga el audio de un video y lo transcribe localmente
+
+    Returns:
+        Dict con el formato de transcribe_with_fallback (status 'success' o 'error')
+    """
+    if not is_available():
+        return {
+            'video_id': video_id,
+            'error': 'Transcripción local no disponible (instala faster-whisper y yt-dlp)',
+            'status': 'error'
+        }
+
+    audio_path = None
+    try:
+        start = time.perf_counter()
+        audio_path = download_audio(video_id)
+        transcript_data, language = transcribe_audio(audio_path)
+        if not transcript_data:
+            return {'video_id': video_id, 'error': 'El audio no contiene voz reconocible', 'status': 'error'}
+
+        elapsed = time.perf_counter() - start
+        audio_seconds = transcript_data[-1]['start'] + transcript_data[-1]['duration']
+        print(f"   🎙️  Whisper local: {len(transcript_data)} segmentos, "
+              f"{audio_seconds / 60:.1f} min de audio en {elapsed:.0f}s")
+        return {
+            'video_id': video_id,
+            'transcript': ' '.join(item['text'] for item in transcript_data),
+            'transcript_data': transcript_data,
+            'language': language or 'es',
+            'method': 'local_whisper',
+            'status': 'success'
+        }
+    except subprocess.CalledProcessError as e:
+        return {'video_id': video_id, 'error': f'Error descargando audio: {(e.stderr or "").strip()[:200]}', 'status': 'error'}
+    except Exception as e:
+        return {'video_id': video_id, 'error': f'Error en transcripción local: {e}', 'status': 'error'}
+    finally:
+        if audio_path is not None:
+            audio_path.unlink(missing_ok=True)
+
+def main():
+    if len(sys.argv) < 2:
+        print("Uso: python local_transcriber.py VIDEO_ID")
+        return
+
+    print(f"🎙️  TRANSCRIPCIÓN LOCAL ({MODEL_SIZE}, {COMPUTE_TYPE}, {WORKERS} procesos)")
+    print("="*60)
+    result = transcribe_video(sys.argv[1])
+    if result['status'] != 'success':
+        print(f"❌ {result['error']}")
+        return
+    for item in result['transcript_data'][:10]:
+        print(f"   [{item['start']:7.1f}s] {item['text']}")
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,7 @@ import json
 from http.server import HTTPServer, BaseHTTPRequestHandler
 from urllib.parse import urlparse, parse_qs
 import logging
+from tracing import init_tracing, span, set_attributes, extract_context
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -33,20 +34,26 @@ class TranscriptHandler(BaseHTTPRequestHandler):
                 
                 logger.info(f"Transcribing video: {video_url}")
                 
-                # Extract video ID from URL
-                video_id = self._extract_video_id(video_url)
-                
-                if not video_id:
-                    self._send_error(400, "Invalid YouTube URL")
-                    return
-                
-                # Get transcript
-                transcript = self._get_transcript(video_id)
-                
-                if transcript:
-                    self._send_json(200, transcript)
-                else:
-                    self._send_error(500, "Failed to get transcript")
+                # Continue the caller's trace (traceparent header) if present
+                with span('mcp.transcript', context=extract_context(self.headers), video_url=video_url) as current:
+                    # Extract video ID from URL
+                    video_id = self._extract_video_id(video_url)
+                    
+                    if not video_id:
+                        set_attributes(current, http_status=400)
+                        self._send_error(400, "Invalid YouTube URL")
+                        return
+                    
+                    # Get transcript
+                    with span('youtube.fetch_transcript', video_id=video_id):
+                        transcript = self._get_transcript(video_id)
+                    
+                    if transcript:
+                        set_attributes(current, http_status=200, segments=len(transcript['segments']))
+                        self._send_json(200, transcript)
+                    else:
+                        set_attributes(current, http_status=500)
+                        self._send_error(500, "Failed to get transcript")
                     
             except Exception as e:
                 logger.error(f"Error: {e}")
@@ -151,6 +158,7 @@ def run_server(port=8080):
 
 
 if __name__ == '__main__':
+    init_tracing('mcp-server')
     port = int(os.getenv('PORT', 8080))
     run_server(port)
 
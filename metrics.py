@@ -0,0 +1,162 @@
+"""
+Métricas Prometheus para la API del chatbot
+Histogramas de latencia por etapa, tokens, aciertos de caché, resultados de
+retrieval, errores y peticiones en vuelo. Con varios workers de gunicorn se
+usa el modo multiproceso si PROMETHEUS_MULTIPROC_DIR está definido
+"""
+import os
+import time
+from contextlib import contextmanager
+
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram,
+        generate_latest, multiprocess
+    )
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+    CONTENT_TYPE_LATEST = 'text/plain; version=0.0.4; charset=utf-8'
+
+MULTIPROCESS = PROMETHEUS_AVAILABLE and bool(os.getenv('PROMETHEUS_MULTIPROC_DIR'))
+
+# Buckets pensados para llamadas a Azure (de milisegundos a decenas de segundos)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40)
+
+if PROMETHEUS_AVAILABLE:
+    STAGE_LATENCY = Histogram(
+        'chat_stage_latency_seconds',
+        'Latencia de cada etapa del chat (embed_query, vector_query, llm, total)',
+        ['stage'],
+        buckets=LATENCY_BUCKETS
+    )
+    TOKENS = Counter(
+        'chat_llm_tokens_total',
+        'Tokens enviados y recibidos del LLM',
+        ['direction']
+    )
+    CACHE_REQUESTS = Counter(
+        'chat_cache_requests_total',
+        'Consultas a las cachés por resultado',
+        ['cache', 'result']
+    )
+    RETRIEVAL_RESULTS = Histogram(
+        'chat_retrieval_results',
+        'Chunks devueltos por la búsqueda vectorial',
+        buckets=(0, 1, 2, 3, 5, 10, 20, 30, 50)
+    )
+    ERRORS = Counter(
+        'chat_errors_total',
+        'Errores en el camino del chat por tipo',
+        ['type']
+    )
+    COALESCED = Counter(
+        'chat_coalesced_requests_total',
+        'Peticiones resueltas por single-flight sin cálculo propio'
+    )
+    REJECTED = Counter(
+        'chat_rejected_requests_total',
+        'Peticiones rechazadas por el control de admisión',
+        ['reason']
+    )
+    # En modo multiproceso cada worker publica su valor; 'livesum' los suma
+    IN_FLIGHT = Gauge(
+        'chat_in_flight_requests',
+        'Peticiones de chat en proceso',
+        multiprocess_mode='livesum'
+    )
+
+# Funciones (stage, seconds) avisadas al terminar cada etapa (ej. query_log)
+_stage_observers = []
+
+def add_stage_observer(observer):
+    """Registra una función que recibe (stage, seconds) de cada etapa medida"""
+    _stage_observers.append(observer)
+
+@contextmanager
+def observe_stage(stage):
+    """
+    Mide la duración de una etapa del chat
+
+    Args:
+        stage: Nombre de la etapa (embed_query, vector_query, llm, total)
+
+    Yields:
+        Dict donde se deja la duración en segundos al salir (clave 'seconds')
+    """
+    timing = {}
+    start = time.perf_counter()
+    try:
+        yield timing
+    finally:
+        timing['seconds'] = time.perf_counter() - start
+        if PROMETHEUS_AVAILABLE:
+            STAGE_LATENCY.labels(stage=stage).observe(timing['seconds'])
+        for observer in _stage_observers:
+            observer(stage, timing['seconds'])
+
+@contextmanager
+def track_in_flight():
+    """Incrementa el gauge de peticiones en vuelo mientras dura el bloque"""
+    if PROMETHEUS_AVAILABLE:
+        IN_FLIGHT.inc()
+    try:
+        yield
+    finally:
+        if PROMETHEUS_AVAILABLE:
+            IN_FLIGHT.dec()
+
+def record_tokens(prompt_tokens, completion_tokens):
+    """Registra tokens de entrada y salida del LLM"""
+    if PROMETHEUS_AVAILABLE:
+        TOKENS.labels(direction='in').inc(prompt_tokens or 0)
+        TOKENS.labels(direction='out').inc(completion_tokens or 0)
+
+def record_cache(cache, hit):
+    """Registra un acierto o fallo de caché"""
+    if PROMETHEUS_AVAILABLE:
+        CACHE_REQUESTS.labels(cache=cache, result='hit' if hit else 'miss').inc()
+
+def record_retrieval(count):
+    """Registra cuántos chunks devolvió la búsqueda"""
+    if PROMETHEUS_AVAILABLE:
+        RETRIEVAL_RESULTS.observe(count)
+
+def record_error(error):
+    """Registra un error por su tipo (nombre de la excepción)"""
+    if PROMETHEUS_AVAILABLE:
+        ERRORS.labels(type=type(error).__name__).inc()
+
+def record_coalesced():
+    """Registra una petición servida por single-flight"""
+    if PROMETHEUS_AVAILABLE:
+        COALESCED.inc()
+
+def record_rejected(reason):
+    """Registra una petición rechazada por admisión (rate_limit u overload)"""
+    if PROMETHEUS_AVAILABLE:
+        REJECTED.labels(reason=reason).inc()
+
+def render_metrics():
+    """
+    Genera el texto de exposición de Prometheus
+
+    Returns:
+        Tupla con (payload en bytes, content type)
+    """
+    if not PROMETHEUS_AVAILABLE:
+        return b'# prometheus_client no instalado\n', CONTENT_TYPE_LATEST
+
+    if MULTIPROCESS:
+        # Agrega las métricas de todos los workers desde PROMETHEUS_MULTIPROC_DIR
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+
+    from prometheus_client import REGISTRY
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+def mark_worker_dead(pid):
+    """Limpia los archivos de métricas de un worker que terminó (hook de gunicorn)"""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,187 @@
+"""
+Servidor mock de Azure OpenAI para pruebas de carga locales
+Implementa embeddings y chat completions (con streaming) con latencia
+configurable e inyección de errores 429, sin consumir cuota de Azure
+
+Uso:
+    python mock_azure_openai.py --port 8090 --chat-latency-ms 800 --error-rate 0.05
+
+Luego apuntar la API al mock:
+    AZURE_OPENAI_ENDPOINT=http://localhost:8090 AZURE_OPENAI_API_KEY=mock uvicorn api_server:app
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import random
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from fake_embeddings import embed_text
+
+app = FastAPI(title="Mock Azure OpenAI")
+
+# Configuración (variables de entorno o argumentos de main)
+config = {
+    'embed_latency_ms': float(os.getenv('MOCK_EMBED_LATENCY_MS', '50')),
+    'chat_latency_ms': float(os.getenv('MOCK_CHAT_LATENCY_MS', '800')),
+    'stream_token_ms': float(os.getenv('MOCK_STREAM_TOKEN_MS', '15')),
+    'jitter': float(os.getenv('MOCK_LATENCY_JITTER', '0.2')),
+    'error_rate': float(os.getenv('MOCK_429_RATE', '0')),
+    'dim': int(os.getenv('MOCK_EMBEDDING_DIM', '1536')),
+}
+
+stats = {'embeddings': 0, 'chat': 0, 'rate_limited': 0}
+
+_ANSWER = (
+    "¡Qué onda! En ese video Luisito recorre la ciudad, prueba la comida local "
+    "y platica con la gente sobre cómo es la vida ahí. Cuenta lo que más le "
+    "sorprendió del viaje y da algunos consejos para quien quiera visitarlo."
+)
+
+async def _sleep(latency_ms):
+    """Espera la latencia configurada con jitter uniforme"""
+    jitter = config['jitter']
+    await asyncio.sleep(latency_ms * random.uniform(1 - jitter, 1 + jitter) / 1000)
+
+def _rate_limited():
+    """Respuesta 429 como la de Azure cuando se agota la cuota"""
+    stats['rate_limited'] += 1
+    return JSONResponse(
+        status_code=429,
+        headers={'Retry-After': '1'},
+        content={'error': {'code': '429', 'message': 'Rate limit exceeded (mock)'}}
+    )
+
+def _input_to_text(item):
+    """El SDK puede mandar texto o listas de token ids (langchain tokeniza con tiktoken)"""
+    if isinstance(item, list):
+        return ' '.join(str(token) for token in item)
+    return str(item)
+
+@app.post("/openai/deployments/{deployment}/embeddings")
+async def embeddings(deployment: str, request: Request):
+    body = await request.json()
+    if random.random() < config['error_rate']:
+        return _rate_limited()
+
+    inputs = body.get('input', [])
+    if not isinstance(inputs, list) or (inputs and isinstance(inputs[0], int)):
+        inputs = [inputs]
+
+    await _sleep(config['embed_latency_ms'])
+    stats['embeddings'] += len(inputs)
+
+    data = []
+    for index, item in enumerate(inputs):
+        vector = embed_text(_input_to_text(item), config['dim'])
+        if body.get('encoding_format') == 'base64':
+            embedding = base64.b64encode(vector.astype('<f4').tobytes()).decode('ascii')
+        else:
+            embedding = vector.tolist()
+        data.append({'object': 'embedding', 'index': index, 'embedding': embedding})
+
+    tokens = sum(len(_input_to_text(item).split()) for item in inputs)
+    return {
+        'object': 'list',
+        'data': data,
+        'model': deployment,
+        'usage': {'prompt_tokens': tokens, 'total_tokens': tokens},
+    }
+
+@app.post("/openai/deployments/{deployment}/chat/completions")
+async def chat_completions(deployment: str, request: Request):
+    body = await request.json()
+    if random.random() < config['error_rate']:
+        return _rate_limited()
+
+    stats['chat'] += 1
+    completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+    created = int(time.time())
+    prompt_tokens = sum(len(str(m.get('content', '')).split()) for m in body.get('messages', []))
+    words = _ANSWER.split(' ')
+
+    if not body.get('stream'):
+        await _sleep(config['chat_latency_ms'])
+        return {
+            'id': completion_id,
+            'object': 'chat.completion',
+            'created': created,
+            'model': deployment,
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': _ANSWER},
+                'finish_reason': 'stop',
+            }],
+            'usage': {
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': len(words),
+                'total_tokens': prompt_tokens + len(words),
+            },
+        }
+
+    async def event_stream():
+        # Tiempo hasta el primer token y luego un token cada stream_token_ms
+        await _sleep(config['chat_latency_ms'] / 2)
+        for i, word in enumerate(words):
+            chunk = {
+                'id': completion_id,
+                'object': 'chat.completion.chunk',
+                'created': created,
+                'model': deployment,
+                'choices': [{
+                    'index': 0,
+                    'delta': {'content': word if i == 0 else ' ' + word},
+                    'finish_reason': None,
+                }],
+            }
+            yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+            await _sleep(config['stream_token_ms'])
+
+        final = {
+            'id': completion_id,
+            'object': 'chat.completion.chunk',
+            'created': created,
+            'model': deployment,
+            'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}],
+        }
+        yield f"data: {json.dumps(final)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(event_stream(), media_type='text/event-stream')
+
+@app.get("/stats")
+async def get_stats():
+    """Peticiones atendidas por el mock"""
+    return {**stats, 'config': config}
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock de Azure OpenAI")
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--embed-latency-ms', type=float, default=config['embed_latency_ms'])
+    parser.add_argument('--chat-latency-ms', type=float, default=config['chat_latency_ms'])
+    parser.add_argument('--stream-token-ms', type=float, default=config['stream_token_ms'])
+    parser.add_argument('--jitter', type=float, default=config['jitter'])
+    parser.add_argument('--error-rate', type=float, default=config['error_rate'], help="Fracción de peticiones que reciben 429")
+    parser.add_argument('--dim', type=int, default=config['dim'])
+    args = parser.parse_args()
+
+    config.update({
+        'embed_latency_ms': args.embed_latency_ms,
+        'chat_latency_ms': args.chat_latency_ms,
+        'stream_token_ms': args.stream_token_ms,
+        'jitter': args.jitter,
+        'error_rate': args.error_rate,
+        'dim': args.dim,
+    })
+
+    import uvicorn
+    print(f"🧪 Mock de Azure OpenAI en http://localhost:{args.port}")
+    uvicorn.run(app, host="0.0.0.0", port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
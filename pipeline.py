@@ -0,0 +1,409 @@
+"""
+Pipeline de punta a punta con etapas solapadas
+enumerar -> transcribir -> subir a Azure -> embeber en ChromaDB
+
+Cada etapa tiene sus propios threads y se comunica con la siguiente por una
+cola acotada, así un video se embebe mientras el siguiente todavía se está
+transcribiendo. Al terminar imprime (y guarda en data/pipeline_reports/) el
+throughput y la utilización de cada etapa
+
+Uso:
+    python pipeline.py                                  # data/video_list.json
+    python pipeline.py --video-list data/new_videos.json
+    python pipeline.py --source ytdlp --transcribe-workers 2
+"""
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+from tracing import init_tracing, span, set_attributes
+
+load_dotenv()
+
+TRANSCRIBE_WORKERS = int(os.getenv('PIPELINE_TRANSCRIBE_WORKERS', '2'))
+UPLOAD_WORKERS = int(os.getenv('PIPELINE_UPLOAD_WORKERS', '4'))
+EMBED_WORKERS = int(os.getenv('PIPELINE_EMBED_WORKERS', '2'))
+QUEUE_SIZE = int(os.getenv('PIPELINE_QUEUE_SIZE', '16'))
+# Pausa por video en cada worker de transcripción (evita bloqueos de YouTube)
+TRANSCRIBE_DELAY_SECONDS = float(os.getenv('PIPELINE_TRANSCRIBE_DELAY_SECONDS', '10'))
+REPORTS_DIR = 'data/pipeline_reports'
+
+_DONE = object()
+
+class TranscriptionFailed(Exception):
+    """El video no tiene transcripción (MCP y fallback fallaron)"""
+
+class Stage:
+    """
+    Etapa del pipeline: `workers` threads aplican fn a cada elemento
+
+    fn devuelve el elemento para la siguiente etapa, o None para descartarlo
+    (ej. un video sin transcripción no se sube ni se embebe)
+
+    Args:
+        name: Nombre de la etapa (para el reporte)
+        fn: Función elemento -> elemento o None
+        workers: Threads de la etapa
+        queue_size: Tamaño máximo de la cola de entrada
+    """
+
+    def __init__(self, name, fn, workers=1, queue_size=QUEUE_SIZE):
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, workers)
+        self.input = queue.Queue(maxsize=queue_size)
+        self.processed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.finished_at = None
+        self._alive = self.workers
+        self._lock = threading.Lock()
+
+    def record(self, seconds, result, failed):
+        with self._lock:
+            self.busy_seconds += seconds
+            if failed:
+                self.errors += 1
+            elif result is None:
+                self.dropped += 1
+            else:
+                self.processed += 1
+
+    def worker_finished(self):
+        """Marca el fin de un worker; True si era el último de la etapa"""
+        with self._lock:
+            self._alive -= 1
+            if self._alive == 0:
+                self.finished_at = time.perf_counter()
+                return True
+            return False
+
+class Pipeline:
+    """
+    Ejecuta una fuente de elementos a través de una lista de etapas
+
+    Args:
+        stages: Lista de Stage en orden
+        on_done: Callback(item) cuando un elemento sale de la última etapa
+        on_drop: Callback(item, etapa, error) cuando un elemento falla o se descarta
+    """
+
+    def __init__(self, stages, on_done=None, on_drop=None):
+        self.stages = stages
+        self.on_done = on_done
+        self.on_drop = on_drop
+        self.enumerated = 0
+        self.enumerate_seconds = 0.0
+
+    def _feed(self, items):
+        """Thread de enumeración: pasa los elementos de la fuente a la primera etapa"""
+        first = self.stages[0]
+        start = time.perf_counter()
+        try:
+            for item in items:
+                first.input.put(item)
+                self.enumerated += 1
+        except Exception as e:
+            print(f"❌ Error enumerando videos: {e}")
+        finally:
+            self.enumerate_seconds = time.perf_counter() - start
+            for _ in range(first.workers):
+                first.input.put(_DONE)
+
+    def _work(self, index):
+        """Thread de una etapa"""
+        stage = self.stages[index]
+        next_stage = self.stages[index + 1] if index + 1 < len(self.stages) else None
+
+        while True:
+            item = stage.input.get()
+            if item is _DONE:
+                break
+
+            start = time.perf_counter()
+            result, error = None, None
+            try:
+                result = stage.fn(item)
+            except Exception as e:
+                error = e
+                print(f"   ❌ [{stage.name}] {item.get('video_id', '?') if isinstance(item, dict) else item}: {e}")
+            stage.record(time.perf_counter() - start, result, error is not None)
+
+            if result is None:
+                self._callback(self.on_drop, item, stage.name, error)
+            elif next_stage is not None:
+                next_stage.input.put(result)
+            else:
+                self._callback(self.on_done, result)
+
+        # El último worker en salir avisa a todos los de la etapa siguiente
+        if stage.worker_finished() and next_stage is not None:
+            for _ in range(next_stage.workers):
+                next_stage.input.put(_DONE)
+
+    @staticmethod
+    def _callback(callback, *args):
+        """Un callback que falla no debe detener el worker"""
+        if callback is None:
+            return
+        try:
+            callback(*args)
+        except Exception as e:
+            print(f"   ⚠️  Error en callback del pipeline: {e}")
+
+    def run(self, items):
+        """
+        Procesa todos los elementos y espera a que terminen todas las etapas
+
+        Returns:
+            Dict con el reporte de la corrida
+        """
+        start = time.perf_counter()
+        threads = [threading.Thread(target=self._feed, args=(items,), name='enumerate', daemon=True)]
+        for index, stage in enumerate(self.stages):
+            threads.extend(
+                threading.Thread(target=self._work, args=(index,), name=f"{stage.name}-{i}", daemon=True)
+                for i in range(stage.workers)
+            )
+
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        return self.report(time.perf_counter() - start, start)
+
+    def report(self, wall_seconds, start):
+        """Throughput y utilización por etapa"""
+        stages = []
+        for stage in self.stages:
+            elapsed = (stage.finished_at or start + wall_seconds) - start
+            stages.append({
+                'stage': stage.name,
+                'workers': stage.workers,
+                'processed': stage.processed,
+                'dropped': stage.dropped,
+                'errors': stage.errors,
+                'busy_seconds': round(stage.busy_seconds, 2),
+                'items_per_minute': round(stage.processed / elapsed * 60, 2) if elapsed > 0 else 0.0,
+                'utilization': round(stage.busy_seconds / (elapsed * stage.workers), 3) if elapsed > 0 else 0.0,
+            })
+        return {
+            'started_at': datetime.now().isoformat(timespec='seconds'),
+            'wall_seconds': round(wall_seconds, 2),
+            'enumerated': self.enumerated,
+            'enumerate_seconds': round(self.enumerate_seconds, 2),
+            'stages': stages,
+        }
+
+def format_report(report):
+    """Tabla del reporte en texto"""
+    lines = [
+        f"{'='*72}",
+        "📊 REPORTE DEL PIPELINE",
+        f"{'='*72}",
+        f"   Videos enumerados: {report['enumerated']} en {report['enumerate_seconds']}s",
+        f"   Duración total:    {report['wall_seconds']}s",
+        "",
+        f"   {'etapa':12} {'workers':>7} {'ok':>6} {'desc.':>6} {'errores':>7} {'ocupado s':>10} {'items/min':>10} {'uso':>6}",
+    ]
+    for s in report['stages']:
+        lines.append(
+            f"   {s['stage']:12} {s['workers']:>7} {s['processed']:>6} {s['dropped']:>6} {s['errors']:>7} "
+            f"{s['busy_seconds']:>10.1f} {s['items_per_minute']:>10.2f} {s['utilization']:>6.0%}"
+        )
+    lines.append(f"{'='*72}")
+    return '\n'.join(lines)
+
+def save_report(report, directory=REPORTS_DIR):
+    """Guarda el reporte como JSON y devuelve la ruta"""
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    path = Path(directory) / f"pipeline_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.json"
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    return path
+
+def build_stages(transcribe_workers=TRANSCRIBE_WORKERS, upload_workers=UPLOAD_WORKERS,
+                 embed_workers=EMBED_WORKERS, transcribe_delay=TRANSCRIBE_DELAY_SECONDS,
+                 upload=None, embed=None, normalization=None):
+    """
+    Etapas estándar: transcribir (MCP + fallback), subir a Azure y embeber
+
+    Args:
+        transcribe_workers, upload_workers, embed_workers: Threads por etapa
+        transcribe_delay: Pausa por video en cada worker de transcripción
+        upload: Incluir la subida a Azure (None = solo si está configurado)
+        embed: Incluir el embebido en ChromaDB (None = solo si Azure OpenAI está configurado)
+        normalization: NormalizationStats donde acumular el ahorro de la normalización
+
+    Returns:
+        Tupla (lista de Stage, función de cierre que devuelve la ruta del dump)
+    """
+    import transcript_store
+    from transcribe_mcp import transcribe_with_fallback
+    from transcriptions_io import TranscriptionWriter
+
+    if upload is None:
+        upload = bool((os.getenv('AZURE_STORAGE_CONNECTION_STRING') or '').strip())
+    if embed is None:
+        embed = bool(os.getenv('AZURE_OPENAI_ENDPOINT') and os.getenv('AZURE_OPENAI_API_KEY'))
+
+    transcripts_dir = Path('data/transcripts')
+    transcripts_dir.mkdir(parents=True, exist_ok=True)
+    # Con microsegundos: el scheduler puede lanzar varias corridas en el mismo segundo
+    output_file = f"data/transcriptions_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.jsonl"
+    writer = TranscriptionWriter(output_file).open()
+    writer_lock = threading.Lock()
+
+    def transcribe(video):
+        video_id = video['video_id']
+        with span('transcribe.video', video_id=video_id) as current:
+            result = transcribe_with_fallback(video_id, f"https://www.youtube.com/watch?v={video_id}")
+            set_attributes(current, status=result['status'], method=result.get('method'))
+        result.update(video)
+        with writer_lock:
+            writer.write(result)
+
+        if transcribe_delay:
+            time.sleep(transcribe_delay)
+        if result['status'] != 'success':
+            # El worker lo registra como error (y avisa a on_drop con el motivo)
+            raise TranscriptionFailed(result.get('error', 'sin transcripción'))
+        print(f"   ✅ [transcribir] {video.get('title', video_id)[:60]}")
+        transcript_store.save(result, transcripts_dir / f"{video_id}{transcript_store.EXTENSION}")
+        return result
+
+    stages = [Stage('transcribir', transcribe, transcribe_workers)]
+
+    if upload:
+        from upload_to_azure import create_blob_client, create_container_if_not_exists, upload_individual_transcriptions
+
+        blob_service_client = create_blob_client()
+        container_name = os.getenv('AZURE_STORAGE_CONTAINER', 'luisito-transcripts')
+        create_container_if_not_exists(blob_service_client, container_name)
+
+        def upload_one(result):
+            upload_individual_transcriptions(blob_service_client, container_name, [result])
+            return result
+
+        stages.append(Stage('subir', upload_one, upload_workers))
+
+    if embed:
+        from build_vectorstore import get_collection, create_cached_embeddings, index_transcription
+
+        collection = get_collection()
+        collection_lock = threading.Lock()
+        local = threading.local()
+
+        def embed_one(result):
+            # Un modelo (y una conexión a la caché SQLite) por thread
+            if not hasattr(local, 'embeddings'):
+                local.embeddings = create_cached_embeddings()
+            chunks = index_transcription(collection, local.embeddings, result, lock=collection_lock,
+                                         normalization=normalization)
+            print(f"   🧠 [embeber] {result.get('title', result['video_id'])[:60]} ({chunks} chunks)")
+            return result
+
+        stages.append(Stage('embeber', embed_one, embed_workers))
+
+    def close():
+        writer.close()
+        return output_file
+
+    return stages, close
+
+def run_pipeline(videos, on_done=None, on_drop=None, **stage_options):
+    """
+    Ejecuta el pipeline completo sobre un iterable de videos
+
+    Args:
+        videos: Iterable de dicts de video (puede ser un generador en streaming)
+        on_done: Callback(transcripción) al completar la última etapa
+        on_drop: Callback(item, etapa, error) si un video falla en alguna etapa
+        **stage_options: Opciones de build_stages
+
+    Returns:
+        Dict con el reporte (incluye 'transcriptions_file')
+    """
+    from transcript_normalizer import NormalizationStats, format_summary as format_normalization
+
+    normalization = NormalizationStats()
+    stages, close = build_stages(normalization=normalization, **stage_options)
+    print(f"🚀 Etapas: {' -> '.join(f'{s.name} ({s.workers})' for s in stages)}")
+
+    try:
+        with span('pipeline.run'):
+            report = Pipeline(stages, on_done, on_drop).run(videos)
+    finally:
+        transcriptions_file = close()
+
+    report['transcriptions_file'] = transcriptions_file
+    report['normalization'] = normalization.summary()
+
+    # Con backend int8 se vuelve a exportar el índice que sirve la API
+    from quantized_store import VECTOR_BACKEND, INDEX_DIR
+    embedded = sum(s.processed for s in stages if s.name == 'embeber')
+    if embedded:
+        directories = ["./chroma_db"]
+        if VECTOR_BACKEND == 'int8':
+            from quantized_store import export_from_chroma
+            export_from_chroma()
+            directories.append(INDEX_DIR)
+        # Marca de versión: la API recarga el índice sin reiniciar
+        from index_version import write_index_version
+        for directory in directories:
+            write_index_version(directory, videos_indexed=embedded)
+
+    print(format_report(report))
+    if report['normalization']['transcriptions']:
+        print(f"   {format_normalization(report['normalization'])}")
+    print(f"   💾 Transcripciones: {transcriptions_file}")
+    print(f"   📄 Reporte: {save_report(report)}")
+    return report
+
+def iter_source(source, video_list_file):
+    """Videos desde la lista local, la YouTube Data API o yt-dlp (en streaming)"""
+    if source == 'file':
+        from transcribe_mcp import load_video_list
+        return load_video_list(video_list_file)
+
+    channel_id = os.getenv('YOUTUBE_CHANNEL_ID', 'UCECJDeK0MNapZbpaOzxrUPA')
+    if source == 'api':
+        from youtube_crawler import ChannelCrawler
+        return ChannelCrawler(os.getenv('YOUTUBE_API_KEY')).iter_videos(channel_id)
+
+    from get_videos_without_api import iter_channel_tabs
+    return iter_channel_tabs(f"channel/{channel_id}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Pipeline de transcripción, subida y embebido")
+    parser.add_argument('--source', choices=['file', 'api', 'ytdlp'], default='file', help="Origen de los videos")
+    parser.add_argument('--video-list', default=os.getenv('VIDEO_LIST_FILE', 'data/video_list.json'))
+    parser.add_argument('--transcribe-workers', type=int, default=TRANSCRIBE_WORKERS)
+    parser.add_argument('--upload-workers', type=int, default=UPLOAD_WORKERS)
+    parser.add_argument('--embed-workers', type=int, default=EMBED_WORKERS)
+    parser.add_argument('--transcribe-delay', type=float, default=TRANSCRIBE_DELAY_SECONDS)
+    args = parser.parse_args()
+
+    print("🏭 PIPELINE DE LUISITO COMUNICA")
+    print("="*60)
+    init_tracing('pipeline')
+
+    run_pipeline(
+        iter_source(args.source, args.video_list),
+        transcribe_workers=args.transcribe_workers,
+        upload_workers=args.upload_workers,
+        embed_workers=args.embed_workers,
+        transcribe_delay=args.transcribe_delay,
+    )
+
+if __name__ == "__main__":
+    main()
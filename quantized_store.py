@@ -0,0 +1,260 @@
+"""
+Vector store cuantizado a int8 (alternativa ligera a ChromaDB para servir)
+Cada vector float32 de 1536 dimensiones se guarda como 1536 bytes int8 más
+una escala y un offset por vector (~4x más pequeño). La búsqueda hace una
+pasada gruesa con la pregunta también cuantizada y re-ordena los mejores
+candidatos con la pregunta en float y coseno exacto sobre los vectores
+reconstruidos
+
+Uso:
+    python quantized_store.py export              # ./chroma_db -> ./vector_index
+    VECTOR_BACKEND=int8 gunicorn api_server:app   # servir desde ./vector_index
+"""
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+VECTOR_BACKEND = os.getenv('VECTOR_BACKEND', 'chroma').lower()
+INDEX_DIR = os.getenv('QUANTIZED_INDEX_DIR', './vector_index')
+# Candidatos de la pasada gruesa por cada resultado pedido
+RERANK_FACTOR = int(os.getenv('QUANTIZED_RERANK_FACTOR', '8'))
+
+_VECTORS_FILE = 'vectors.npz'
+_DOCUMENTS_FILE = 'documents.json'
+# Reintentos de load() si coincide con un save() en curso
+_LOAD_ATTEMPTS = 5
+# Bloques pequeños: la conversión int8 -> float32 cabe en caché de CPU
+_BLOCK_ROWS = 512
+
+def index_exists(directory=None):
+    """True si el directorio tiene un índice completo (un volumen montado vacío no cuenta)"""
+    directory = Path(directory or INDEX_DIR)
+    return all((directory / name).is_file() for name in (_VECTORS_FILE, _DOCUMENTS_FILE))
+
+def quantize(vectors):
+    """
+    Cuantización escalar por vector a int8
+
+    Args:
+        vectors: Matriz float (n, dim)
+
+    Returns:
+        Tupla (codes int8 (n, dim), scale float32 (n,), offset float32 (n,))
+        con vector ≈ (codes + 128) * scale + offset
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    low = vectors.min(axis=1)
+    high = vectors.max(axis=1)
+    scale = (high - low) / 255.0
+    scale[scale == 0] = 1.0
+    codes = np.rint((vectors - low[:, None]) / scale[:, None]) - 128
+    return np.clip(codes, -128, 127).astype(np.int8), scale.astype(np.float32), low.astype(np.float32)
+
+def dequantize(codes, scale, offset):
+    """Reconstruye vectores float32 desde los códigos int8"""
+    return (codes.astype(np.float32) + 128) * scale[:, None] + offset[:, None]
+
+class QuantizedIndex:
+    """
+    Índice en memoria con vectores int8, documentos y metadatos
+
+    Expone count() y query() con la misma forma de resultado que una
+    collection de ChromaDB, para poder sustituirla en get_relevant_chunks
+    """
+
+    def __init__(self, codes, scale, offset, ids, documents, metadatas):
+        self.codes = codes
+        self.scale = scale
+        self.offset = offset
+        self.ids = ids
+        self.documents = documents
+        self.metadatas = metadatas
+        # Suma de (codes + 128) por vector, usada en cada pasada gruesa
+        self._code_sums = (codes.astype(np.int32) + 128).sum(axis=1).astype(np.float32)
+
+    @classmethod
+    def from_vectors(cls, vectors, ids, documents, metadatas):
+        codes, scale, offset = quantize(vectors)
+        return cls(codes, scale, offset, list(ids), list(documents), list(metadatas))
+
+    @classmethod
+    def from_collection(cls, collection, batch_size=1000):
+        """
+        Exporta una collection de ChromaDB completa (vectores, textos y metadatos)
+
+        Args:
+            collection: Collection de ChromaDB
+            batch_size: Registros por página de collection.get
+        """
+        codes, scales, offsets = [], [], []
+        ids, documents, metadatas = [], [], []
+        total = collection.count()
+        for start in range(0, total, batch_size):
+            page = collection.get(
+                limit=batch_size,
+                offset=start,
+                include=['embeddings', 'documents', 'metadatas']
+            )
+            if not page['ids']:
+                break
+            page_codes, page_scale, page_offset = quantize(page['embeddings'])
+            codes.append(page_codes)
+            scales.append(page_scale)
+            offsets.append(page_offset)
+            ids.extend(page['ids'])
+            documents.extend(page['documents'])
+            metadatas.extend(page['metadatas'])
+
+        if not codes:
+            raise ValueError("La collection está vacía")
+        return cls(np.vstack(codes), np.concatenate(scales), np.concatenate(offsets), ids, documents, metadatas)
+
+    def save(self, directory=None):
+        """
+        Guarda el índice en directory (vectors.npz + documents.json)
+        Cada archivo se escribe en un temporal del mismo directorio y se
+        reemplaza con os.replace, así un lector nunca ve un archivo a medias.
+        Ambos llevan el mismo save_id para que load() detecte si leyó cada
+        archivo de un guardado distinto
+        """
+        directory = Path(directory or INDEX_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        save_id = str(time.time_ns())
+
+        documents_tmp = directory / f".{_DOCUMENTS_FILE}.tmp"
+        with open(documents_tmp, 'w', encoding='utf-8') as f:
+            json.dump(
+                {'save_id': save_id, 'ids': self.ids, 'documents': self.documents, 'metadatas': self.metadatas},
+                f, ensure_ascii=False, separators=(',', ':')
+            )
+            f.flush()
+            os.fsync(f.fileno())
+        # Con un archivo abierto np.savez no agrega la extensión .npz al nombre
+        vectors_tmp = directory / f".{_VECTORS_FILE}.tmp"
+        with open(vectors_tmp, 'wb') as f:
+            np.savez(f, codes=self.codes, scale=self.scale, offset=self.offset, save_id=np.array(save_id))
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(documents_tmp, directory / _DOCUMENTS_FILE)
+        os.replace(vectors_tmp, directory / _VECTORS_FILE)
+
+    @classmethod
+    def load(cls, directory=None):
+        """Carga un índice guardado con save() (reintenta si otro proceso está guardando)"""
+        directory = Path(directory or INDEX_DIR)
+        for attempt in range(_LOAD_ATTEMPTS):
+            with np.load(directory / _VECTORS_FILE) as data:
+                codes, scale, offset = data['codes'], data['scale'], data['offset']
+                save_id = data['save_id'].item() if 'save_id' in data.files else None
+            with open(directory / _DOCUMENTS_FILE, 'r', encoding='utf-8') as f:
+                payload = json.load(f)
+            # Índices guardados antes de existir save_id no lo tienen en ninguno de los dos
+            if payload.get('save_id') == save_id:
+                return cls(codes, scale, offset, payload['ids'], payload['documents'], payload['metadatas'])
+            time.sleep(0.2 * (attempt + 1))
+        raise ValueError(f"{_VECTORS_FILE} y {_DOCUMENTS_FILE} en {directory} son de guardados distintos")
+
+    def count(self):
+        return len(self.ids)
+
+    def _coarse_scores(self, query_vector):
+        """
+        Producto punto aproximado con la pregunta cuantizada, por bloques
+        para no materializar toda la matriz en float32
+        """
+        q_codes, q_scale, q_offset = quantize(query_vector[None, :])
+        q = q_codes[0].astype(np.float32) + 128
+        q_sum = float(q.sum())
+
+        scores = np.empty(len(self.ids), dtype=np.float32)
+        for start in range(0, len(self.ids), _BLOCK_ROWS):
+            rows = slice(start, start + _BLOCK_ROWS)
+            dot = self.codes[rows].astype(np.float32) @ q + 128 * q_sum
+            # (c*s + o) · (qc*qs + qo), desarrollado para usar un solo matmul
+            scores[rows] = (
+                self.scale[rows] * q_scale[0] * dot
+                + self.scale[rows] * q_offset[0] * self._code_sums[rows]
+                + self.offset[rows] * (q_scale[0] * q_sum + q_offset[0] * q.shape[0])
+            )
+        return scores
+
+    def search(self, query_vector, k, rerank_factor=None):
+        """
+        Top-k por similitud coseno
+
+        Args:
+            query_vector: Vector float de la pregunta
+            k: Número de resultados
+            rerank_factor: Candidatos gruesos por resultado (default RERANK_FACTOR)
+
+        Returns:
+            Tupla (índices, distancias coseno) ordenados de más a menos similar
+        """
+        query_vector = np.asarray(query_vector, dtype=np.float32)
+        n = len(self.ids)
+        k = min(k, n)
+        if k == 0:
+            return [], []
+
+        scores = self._coarse_scores(query_vector)
+        n_candidates = min(n, k * (rerank_factor or RERANK_FACTOR))
+        if n_candidates < n:
+            candidates = np.argpartition(-scores, n_candidates - 1)[:n_candidates]
+        else:
+            candidates = np.arange(n)
+
+        # Re-ranking en float: coseno exacto contra los candidatos reconstruidos
+        vectors = dequantize(self.codes[candidates], self.scale[candidates], self.offset[candidates])
+        norms = np.linalg.norm(vectors, axis=1) * (np.linalg.norm(query_vector) or 1.0)
+        similarity = (vectors @ query_vector) / np.where(norms == 0, 1.0, norms)
+
+        order = np.argsort(-similarity)[:k]
+        return candidates[order].tolist(), (1.0 - similarity[order]).tolist()
+
+    def query(self, query_embeddings, n_results=5, include=None, **kwargs):
+        """Misma forma de resultado que collection.query de ChromaDB"""
+        include = include or ['documents', 'metadatas', 'distances']
+        results = {'ids': [], 'documents': [], 'metadatas': [], 'distances': [], 'embeddings': None}
+        if 'embeddings' in include:
+            results['embeddings'] = []
+        for query_vector in query_embeddings:
+            indices, distances = self.search(query_vector, n_results)
+            results['ids'].append([self.ids[i] for i in indices])
+            results['documents'].append([self.documents[i] for i in indices])
+            results['metadatas'].append([self.metadatas[i] for i in indices])
+            results['distances'].append(distances)
+            if results['embeddings'] is not None:
+                results['embeddings'].append(
+                    dequantize(self.codes[indices], self.scale[indices], self.offset[indices]).tolist()
+                )
+        return results
+
+def export_from_chroma(persist_directory="./chroma_db", output_directory=None, collection_name="luisito_transcripts"):
+    """
+    Genera el índice int8 a partir del vector store de ChromaDB
+
+    Returns:
+        QuantizedIndex exportado
+    """
+    import chromadb
+
+    client = chromadb.PersistentClient(path=persist_directory)
+    collection = client.get_collection(collection_name)
+    index = QuantizedIndex.from_collection(collection)
+    index.save(output_directory)
+
+    output_directory = Path(output_directory or INDEX_DIR)
+    size_mb = sum(f.stat().st_size for f in output_directory.iterdir()) / 1024 / 1024
+    print(f"✅ Índice int8 exportado: {index.count()} vectores en {output_directory} ({size_mb:.1f} MB)")
+    return index
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != 'export':
+        print("Uso: python quantized_store.py export [chroma_db] [vector_index]")
+        sys.exit(1)
+    export_from_chroma(*sys.argv[2:4])
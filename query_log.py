@@ -0,0 +1,302 @@
+"""
+Registro de consultas del chat (JSON Lines, solo append)
+Cada petición a /chat deja un registro con la pregunta, los chunks
+recuperados, sus distancias, la latencia de cada etapa y los tokens del LLM.
+La API solo encola el registro; un thread en segundo plano lo escribe por
+lotes, así el disco nunca bloquea una respuesta. Cada worker escribe su propio
+archivo (logs/query_log/queries_<fecha>_<pid>.jsonl)
+
+Análisis offline:
+    python query_log.py                      # resumen de todo el registro
+    python query_log.py --since 2024-05-01   # desde una fecha
+    python query_log.py --top 50 --export-popular data/popular_questions.json
+"""
+import argparse
+import contextvars
+import json
+import os
+import queue
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+ENABLED = os.getenv('QUERY_LOG_ENABLED', 'true').lower() == 'true'
+LOG_DIR = os.getenv('QUERY_LOG_DIR', './logs/query_log')
+BATCH_SIZE = int(os.getenv('QUERY_LOG_BATCH_SIZE', '200'))
+FLUSH_SECONDS = float(os.getenv('QUERY_LOG_FLUSH_SECONDS', '2'))
+MAX_PENDING = 10000
+
+# Detalles de la consulta en curso (etapas, chunks, tokens) en el thread que la resuelve
+_current = contextvars.ContextVar('query_log_details', default=None)
+
+@contextmanager
+def collect(details=None):
+    """
+    Reúne en `details` lo que las etapas anoten mientras dura el bloque
+
+    Yields:
+        Dict de detalles (con 'stages' para las latencias)
+    """
+    details = {} if details is None else details
+    details.setdefault('stages', {})
+    token = _current.set(details)
+    try:
+        yield details
+    finally:
+        _current.reset(token)
+
+def record_stage(stage, seconds):
+    """Anota la latencia de una etapa en la consulta en curso (no-op fuera de collect)"""
+    details = _current.get()
+    if details is not None:
+        details['stages'][stage] = round(details['stages'].get(stage, 0.0) + seconds, 4)
+
+def annotate(**fields):
+    """Anota campos en la consulta en curso (no-op fuera de collect)"""
+    details = _current.get()
+    if details is not None:
+        details.update(fields)
+
+class QueryLog:
+    """
+    Escritor por lotes en segundo plano
+
+    Args:
+        directory: Carpeta de los archivos .jsonl
+        batch_size: Registros máximos por escritura
+        flush_seconds: Espera máxima antes de escribir un lote incompleto
+    """
+
+    def __init__(self, directory=LOG_DIR, batch_size=BATCH_SIZE, flush_seconds=FLUSH_SECONDS):
+        self.directory = Path(directory)
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.written = 0
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=MAX_PENDING)
+        self._thread = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_started(self):
+        # El thread se crea en cada worker después del fork (gunicorn preload)
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid != os.getpid():
+                self._queue = queue.Queue(maxsize=MAX_PENDING)
+                self._thread = threading.Thread(target=self._run, name='query-log', daemon=True)
+                self._thread.start()
+                self._pid = os.getpid()
+
+    def log(self, record):
+        """Encola un registro sin bloquear; si la cola está llena se descarta"""
+        self._ensure_started()
+        record.setdefault('ts', datetime.now().isoformat(timespec='milliseconds'))
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _path(self):
+        return self.directory / f"queries_{datetime.now().strftime('%Y%m%d')}_{os.getpid()}.jsonl"
+
+    def _write(self, batch):
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            lines = ''.join(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n' for record in batch)
+            with open(self._path(), 'a', encoding='utf-8') as f:
+                f.write(lines)
+            self.written += len(batch)
+        except Exception as e:
+            self.dropped += len(batch)
+            print(f"⚠️  Error escribiendo query log: {e}")
+
+    def _run(self):
+        pending = self._queue
+        stop = False
+        while not stop:
+            batch = []
+            deadline = None
+            while len(batch) < self.batch_size:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    record = pending.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if record is None:
+                    stop = True
+                    break
+                batch.append(record)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_seconds
+            if batch:
+                self._write(batch)
+
+    def close(self, timeout=5):
+        """Escribe lo pendiente y detiene el thread"""
+        if self._thread is None or self._pid != os.getpid():
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+    def stats(self):
+        return {'written': self.written, 'dropped': self.dropped, 'pending': self._queue.qsize()}
+
+# ---------------------------------------------------------------------------
+# Análisis offline
+# ---------------------------------------------------------------------------
+
+def iter_records(directory=LOG_DIR, since=None):
+    """Registros de todos los archivos del directorio (opcionalmente desde una fecha ISO)"""
+    for path in sorted(Path(directory).glob('queries_*.jsonl')):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Línea cortada si el proceso murió a mitad de escritura
+                    continue
+                if since and record.get('ts', '') < since:
+                    continue
+                yield record
+
+def _percentiles(values):
+    if not values:
+        return {'count': 0}
+    array = np.asarray(values, dtype=np.float64)
+    return {
+        'count': len(values),
+        'p50': round(float(np.percentile(array, 50)), 4),
+        'p95': round(float(np.percentile(array, 95)), 4),
+        'p99': round(float(np.percentile(array, 99)), 4),
+    }
+
+def aggregate(records, top=20):
+    """
+    Resumen del tráfico: estados, latencias por etapa, tokens, preguntas y chunks más frecuentes
+
+    Returns:
+        Dict con el resumen
+    """
+    statuses = Counter()
+    queries = Counter()
+    examples = {}
+    chunks = Counter()
+    videos = Counter()
+    stages = defaultdict(list)
+    totals = []
+    prompt_tokens = []
+    completion_tokens = []
+    empty_results = 0
+
+    for record in records:
+        status = record.get('status', 'ok')
+        statuses[status] += 1
+        key = record.get('query_key') or record.get('query', '')
+        queries[key] += 1
+        examples.setdefault(key, record.get('query', key))
+        if record.get('total_seconds') is not None:
+            totals.append(record['total_seconds'])
+
+        # Las etapas y tokens solo cuentan para la petición que hizo el cálculo
+        if status != 'ok':
+            continue
+        for stage, seconds in (record.get('stages') or {}).items():
+            stages[stage].append(seconds)
+        if record.get('prompt_tokens') is not None:
+            prompt_tokens.append(record['prompt_tokens'])
+            completion_tokens.append(record.get('completion_tokens') or 0)
+        chunk_ids = record.get('chunk_ids') or []
+        if not chunk_ids:
+            empty_results += 1
+        chunks.update(chunk_ids)
+        videos.update(chunk_id.rsplit('_', 1)[0] for chunk_id in chunk_ids)
+
+    total = sum(statuses.values())
+    return {
+        'requests': total,
+        'statuses': dict(statuses),
+        'answer_cache_hit_rate': round(statuses['cache_hit'] / total, 3) if total else 0.0,
+        'coalesced_rate': round(statuses['coalesced'] / total, 3) if total else 0.0,
+        'unique_queries': len(queries),
+        'repeated_query_share': round(sum(c for c in queries.values() if c > 1) / total, 3) if total else 0.0,
+        'latency_total': _percentiles(totals),
+        'latency_by_stage': {stage: _percentiles(values) for stage, values in sorted(stages.items())},
+        'tokens': {
+            'prompt_total': int(sum(prompt_tokens)),
+            'completion_total': int(sum(completion_tokens)),
+            'prompt_avg': round(float(np.mean(prompt_tokens)), 1) if prompt_tokens else 0.0,
+            'completion_avg': round(float(np.mean(completion_tokens)), 1) if completion_tokens else 0.0,
+        },
+        'no_results': empty_results,
+        'top_queries': [
+            {'query': examples[key], 'count': count} for key, count in queries.most_common(top)
+        ],
+        'top_chunks': [{'chunk_id': chunk_id, 'count': count} for chunk_id, count in chunks.most_common(top)],
+        'top_videos': [{'video_id': video_id, 'count': count} for video_id, count in videos.most_common(top)],
+    }
+
+def popular_queries(directory=LOG_DIR, limit=20, min_count=2, since=None):
+    """Preguntas más repetidas (candidatas a precalcular en el arranque)"""
+    summary = aggregate(iter_records(directory, since), top=limit)
+    return [item['query'] for item in summary['top_queries'] if item['count'] >= min_count]
+
+def print_summary(summary):
+    print(f"📊 Peticiones: {summary['requests']}  {summary['statuses']}")
+    print(f"   Caché de respuestas: {summary['answer_cache_hit_rate']:.1%}  "
+          f"single-flight: {summary['coalesced_rate']:.1%}  "
+          f"preguntas repetidas: {summary['repeated_query_share']:.1%}")
+    print(f"   Preguntas distintas: {summary['unique_queries']}  sin resultados: {summary['no_results']}")
+
+    print("\n⏱️  Latencia (s)      count      p50      p95      p99")
+    rows = [('total', summary['latency_total'])] + list(summary['latency_by_stage'].items())
+    for stage, stats in rows:
+        if stats['count']:
+            print(f"   {stage:16} {stats['count']:>6} {stats['p50']:>8.3f} {stats['p95']:>8.3f} {stats['p99']:>8.3f}")
+
+    tokens = summary['tokens']
+    print(f"\n🪙 Tokens: prompt {tokens['prompt_total']} (media {tokens['prompt_avg']}), "
+          f"respuesta {tokens['completion_total']} (media {tokens['completion_avg']})")
+
+    print("\n🔥 Preguntas más frecuentes")
+    for item in summary['top_queries']:
+        print(f"   {item['count']:>5}  {item['query'][:80]}")
+    print("\n🎬 Videos más recuperados")
+    for item in summary['top_videos']:
+        print(f"   {item['count']:>5}  {item['video_id']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Análisis del registro de consultas del chat")
+    parser.add_argument('--dir', default=LOG_DIR, help="Carpeta del registro")
+    parser.add_argument('--since', help="Solo registros desde esta fecha (YYYY-MM-DD)")
+    parser.add_argument('--top', type=int, default=20, help="Elementos en los rankings")
+    parser.add_argument('--json', action='store_true', help="Imprimir el resumen como JSON")
+    parser.add_argument('--export-popular', help="Guardar las preguntas más frecuentes en un JSON")
+    args = parser.parse_args()
+
+    summary = aggregate(iter_records(args.dir, args.since), top=args.top)
+    if args.json:
+        print(json.dumps(summary, indent=2, ensure_ascii=False))
+    else:
+        print_summary(summary)
+
+    if args.export_popular:
+        popular = [item['query'] for item in summary['top_queries'] if item['count'] >= 2]
+        Path(args.export_popular).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.export_popular, 'w', encoding='utf-8') as f:
+            json.dump(popular, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 {len(popular)} preguntas populares en {args.export_popular}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Re-ranking local de chunks recuperados (sin LLM ni cross-encoder)
+Se piden más candidatos de los necesarios al vector store (ej. 30) y se
+re-ordenan combinando similitud semántica, solapamiento léxico con la
+pregunta, coincidencia con el título y recencia del video. La selección
+final usa MMR sobre los embeddings guardados para no repetir chunks casi
+idénticos (p. ej. chunks solapados del mismo fragmento de un video)
+"""
+import os
+import re
+import unicodedata
+from datetime import datetime, timezone
+
+import numpy as np
+
+RERANK_ENABLED = os.getenv('RERANK_ENABLED', 'true').lower() != 'false'
+RERANK_CANDIDATES = int(os.getenv('RERANK_CANDIDATES', '30'))
+MMR_LAMBDA = float(os.getenv('RERANK_MMR_LAMBDA', '0.7'))
+RECENCY_HALF_LIFE_DAYS = float(os.getenv('RERANK_RECENCY_HALF_LIFE_DAYS', '730'))
+
+# Peso de cada señal en la relevancia combinada
+WEIGHTS = {
+    'semantic': 0.7,
+    'lexical': 0.15,
+    'title': 0.1,
+    'recency': 0.05,
+}
+
+_word_re = re.compile(r"[a-z0-9ñ]+")
+
+STOPWORDS = frozenset("""
+a al algo como con cual cuales cuando de del donde el ella ellos en era es esa ese eso esta este esto fue
+ha hay la las le les lo los luisito mas me mi muy no nos o para pero por porque que se sea ser si sin
+sobre su sus te tiene tu un una uno unos video videos y ya yo
+""".split())
+
+def _strip_accents(text):
+    """Minúsculas sin tildes (conserva la ñ)"""
+    text = text.lower().replace('ñ', '\x00')
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return text.replace('\x00', 'ñ')
+
+def terms(text):
+    """Conjunto de términos con contenido (sin stopwords ni palabras de 1-2 letras)"""
+    return {w for w in _word_re.findall(_strip_accents(text or '')) if len(w) > 2 and w not in STOPWORDS}
+
+def _overlap(query_terms, texts):
+    """Fracción de términos de la pregunta presentes en cada texto"""
+    if not query_terms:
+        return np.zeros(len(texts), dtype=np.float32)
+    return np.array(
+        [len(query_terms & terms(text)) / len(query_terms) for text in texts],
+        dtype=np.float32
+    )
+
+def _parse_date(value):
+    """published_at en ISO ('2024-01-01T00:00:00Z') o 'YYYY-MM-DD'; None si no se reconoce"""
+    try:
+        return datetime.strptime(str(value)[:10], '%Y-%m-%d').replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
+
+def recency_scores(metadatas, now=None):
+    """
+    Decaimiento exponencial por antigüedad del video (1.0 = publicado hoy)
+    Los videos sin fecha reciben 0.5 para no premiarlos ni castigarlos
+    """
+    now = now or datetime.now(timezone.utc)
+    scores = np.full(len(metadatas), 0.5, dtype=np.float32)
+    for i, metadata in enumerate(metadatas):
+        published = _parse_date(metadata.get('published_at'))
+        if published is not None:
+            age_days = max(0.0, (now - published).total_seconds() / 86400)
+            scores[i] = 0.5 ** (age_days / RECENCY_HALF_LIFE_DAYS)
+    return scores
+
+def relevance_scores(query, documents, metadatas, distances):
+    """
+    Relevancia combinada de cada candidato
+
+    Args:
+        query: Pregunta del usuario
+        documents: Textos de los candidatos
+        metadatas: Metadatos (title, published_at)
+        distances: Distancias coseno devueltas por el vector store
+
+    Returns:
+        np.ndarray float32 con la relevancia de cada candidato
+    """
+    query_terms = terms(query)
+    semantic = 1.0 - np.asarray(distances, dtype=np.float32)
+    lexical = _overlap(query_terms, documents)
+    title = _overlap(query_terms, [m.get('title', '') for m in metadatas])
+    recency = recency_scores(metadatas)
+    return (
+        WEIGHTS['semantic'] * semantic
+        + WEIGHTS['lexical'] * lexical
+        + WEIGHTS['title'] * title
+        + WEIGHTS['recency'] * recency
+    )
+
+def mmr(relevance, embeddings, k, lambda_=None):
+    """
+    Maximal Marginal Relevance: elige k candidatos equilibrando relevancia y
+    diversidad respecto a los ya elegidos
+
+    Args:
+        relevance: np.ndarray de relevancia por candidato
+        embeddings: Matriz (n, dim) de embeddings de los candidatos
+        k: Número de candidatos a elegir
+        lambda_: 1.0 = solo relevancia, 0.0 = solo diversidad
+
+    Returns:
+        Lista de índices en orden de selección
+    """
+    lambda_ = MMR_LAMBDA if lambda_ is None else lambda_
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = vectors / np.where(norms == 0, 1.0, norms)
+    similarity = vectors @ vectors.T
+
+    selected = [int(np.argmax(relevance))]
+    # Máxima similitud de cada candidato con los ya elegidos
+    max_similarity = similarity[selected[0]].copy()
+    available = np.ones(len(relevance), dtype=bool)
+    available[selected[0]] = False
+
+    while len(selected) < min(k, len(relevance)):
+        scores = lambda_ * relevance - (1 - lambda_) * max_similarity
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(max_similarity, similarity[best], out=max_similarity)
+
+    return selected
+
+def rerank(query, documents, metadatas, distances, embeddings=None, k=5):
+    """
+    Re-ordena los candidatos y devuelve los índices de los k mejores
+
+    Args:
+        query: Pregunta del usuario
+        documents: Textos de los candidatos
+        metadatas: Metadatos de los candidatos
+        distances: Distancias coseno de los candidatos
+        embeddings: Embeddings de los candidatos (opcional, activa MMR)
+        k: Número de resultados
+
+    Returns:
+        Lista de índices sobre los candidatos
+    """
+    if not documents:
+        return []
+
+    relevance = relevance_scores(query, documents, metadatas, distances)
+    if embeddings is not None and len(embeddings) == len(documents):
+        return mmr(relevance, embeddings, k)
+    return np.argsort(-relevance)[:k].tolist()
@@ -0,0 +1,181 @@
+"""
+Scheduler de actualización del canal (servicio de larga duración)
+Cada SCHEDULER_INTERVAL_SECONDS sincroniza la lista de videos, encola los
+nuevos en la cola persistente (data/jobs.sqlite3) y procesa la cola con el
+pipeline (transcribir → subir → embeber). Los videos que fallan se reintentan
+con backoff; al embeber se publica una versión nueva del índice y la API la
+recarga sin reiniciar
+
+    python scheduler.py                  # bucle continuo
+    python scheduler.py --once           # una pasada (cron, pruebas)
+    python scheduler.py --retry-failed   # volver a encolar los fallidos
+"""
+import argparse
+import os
+import signal
+import threading
+import time
+
+from dotenv import load_dotenv
+
+from job_queue import JobQueue
+from pipeline import run_pipeline, TRANSCRIBE_WORKERS, UPLOAD_WORKERS, EMBED_WORKERS, TRANSCRIBE_DELAY_SECONDS
+from tracing import init_tracing, span
+
+load_dotenv()
+
+INTERVAL_SECONDS = float(os.getenv('SCHEDULER_INTERVAL_SECONDS', '900'))
+POLL_SECONDS = float(os.getenv('SCHEDULER_POLL_SECONDS', '60'))
+BATCH_SIZE = int(os.getenv('SCHEDULER_BATCH_SIZE', '20'))
+STALE_JOB_SECONDS = float(os.getenv('SCHEDULER_STALE_JOB_SECONDS', '3600'))
+
+class Scheduler:
+    """
+    Bucle de sincronización + procesamiento de la cola
+
+    Args:
+        queue: JobQueue con los videos pendientes
+        source: 'api' (YouTube Data API) o 'ytdlp'
+        interval: Segundos entre sincronizaciones del canal
+        batch_size: Videos tomados de la cola por corrida del pipeline
+        stage_options: Opciones de build_stages (workers por etapa, pausa)
+    """
+
+    def __init__(self, queue, source, interval=INTERVAL_SECONDS, batch_size=BATCH_SIZE, **stage_options):
+        self.queue = queue
+        self.source = source
+        self.interval = interval
+        self.batch_size = batch_size
+        self.stage_options = stage_options
+        self.next_sync = 0.0
+        self._stop = threading.Event()
+
+    def stop(self, *_):
+        """Termina después del lote en curso (SIGTERM/SIGINT)"""
+        print("\n🛑 Deteniendo scheduler al terminar el lote actual...")
+        self._stop.set()
+
+    def sync(self):
+        """Sincroniza la lista de videos y encola los nuevos"""
+        from video_sync import sync_video_list, api_videos, ytdlp_videos
+
+        channel_id = os.getenv('YOUTUBE_CHANNEL_ID', 'UCECJDeK0MNapZbpaOzxrUPA')
+        if self.source == 'api':
+            videos = api_videos(channel_id, os.getenv('YOUTUBE_API_KEY'))
+        else:
+            videos = ytdlp_videos(channel_id)
+
+        with span('scheduler.sync', source=self.source):
+            new_videos = sync_video_list(videos)
+        # Del más antiguo al más reciente: la cola ordena por next_run_at
+        added = self.queue.enqueue(reversed(new_videos))
+        print(f"📥 {added} trabajos nuevos en la cola")
+        return added
+
+    def process(self):
+        """
+        Procesa un lote de la cola con el pipeline
+
+        Returns:
+            Número de videos tomados de la cola
+        """
+        jobs = self.queue.claim(self.batch_size)
+        if not jobs:
+            return 0
+
+        print(f"\n🏭 Procesando {len(jobs)} videos de la cola")
+        pending = {job['video_id'] for job in jobs}
+
+        def on_done(result):
+            pending.discard(result['video_id'])
+            self.queue.complete(result['video_id'])
+
+        def on_drop(item, stage_name, error):
+            pending.discard(item['video_id'])
+            retry = self.queue.fail(item['video_id'], f"{stage_name}: {error or 'descartado'}")
+            print(f"   🔁 {item['video_id']}: {'se reintentará' if retry else 'marcado como fallido'}")
+
+        try:
+            run_pipeline(jobs, on_done=on_done, on_drop=on_drop, **self.stage_options)
+        finally:
+            # Si el pipeline se cortó, los trabajos sin resultado vuelven a la cola
+            for video_id in pending:
+                self.queue.fail(video_id, "pipeline interrumpido")
+        return len(jobs)
+
+    def run_once(self):
+        """Una pasada: sincronizar si toca, recuperar trabajos abandonados y vaciar la cola"""
+        if time.time() >= self.next_sync:
+            try:
+                self.sync()
+            except Exception as e:
+                # Sin red o sin cuota: se procesa lo que ya hay en la cola
+                print(f"⚠️  Error sincronizando el canal: {e}")
+            self.next_sync = time.time() + self.interval
+
+        recovered = self.queue.requeue_stale(STALE_JOB_SECONDS)
+        if recovered:
+            print(f"♻️  {recovered} trabajos abandonados devueltos a la cola")
+
+        while not self._stop.is_set() and self.process():
+            pass
+        print(f"📊 Cola: {self.queue.counts()}")
+
+    def run_forever(self, poll_seconds=POLL_SECONDS):
+        """Bucle principal hasta recibir SIGTERM/SIGINT"""
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        while not self._stop.is_set():
+            self.run_once()
+            # Despertar por sincronización o por reintentos programados
+            self._stop.wait(min(poll_seconds, max(0.0, self.next_sync - time.time())))
+
+def main():
+    parser = argparse.ArgumentParser(description="Scheduler de actualización del canal")
+    parser.add_argument('--source', choices=['api', 'ytdlp'], default=None,
+                        help="Origen de los videos (por defecto api si hay YOUTUBE_API_KEY)")
+    parser.add_argument('--once', action='store_true', help="Una sola pasada")
+    parser.add_argument('--retry-failed', action='store_true', help="Volver a encolar los trabajos fallidos")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--transcribe-workers', type=int, default=TRANSCRIBE_WORKERS)
+    parser.add_argument('--upload-workers', type=int, default=UPLOAD_WORKERS)
+    parser.add_argument('--embed-workers', type=int, default=EMBED_WORKERS)
+    parser.add_argument('--transcribe-delay', type=float, default=TRANSCRIBE_DELAY_SECONDS)
+    args = parser.parse_args()
+
+    print("⏰ SCHEDULER DE LUISITO COMUNICA")
+    print("="*60)
+    init_tracing('scheduler')
+
+    source = args.source or ('api' if os.getenv('YOUTUBE_API_KEY') else 'ytdlp')
+    queue = JobQueue()
+    print(f"   Fuente: {source} | Cola: {queue.path} | Intervalo: {INTERVAL_SECONDS:.0f}s")
+
+    # Trabajos que quedaron 'running' porque el scheduler anterior murió
+    recovered = queue.requeue_orphaned()
+    if recovered:
+        print(f"♻️  {recovered} trabajos de una corrida interrumpida devueltos a la cola")
+
+    if args.retry_failed:
+        print(f"🔁 {queue.retry_failed()} trabajos fallidos vueltos a encolar")
+
+    scheduler = Scheduler(
+        queue,
+        source,
+        batch_size=args.batch_size,
+        transcribe_workers=args.transcribe_workers,
+        upload_workers=args.upload_workers,
+        embed_workers=args.embed_workers,
+        transcribe_delay=args.transcribe_delay,
+    )
+    try:
+        if args.once:
+            scheduler.run_once()
+        else:
+            scheduler.run_forever()
+    finally:
+        queue.close()
+
+if __name__ == "__main__":
+    main()
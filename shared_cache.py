@@ -0,0 +1,163 @@
+"""
+Caché clave-valor local compartida entre procesos
+Usa SQLite en modo WAL para que varios workers de la API (gunicorn) lean y
+escriban el mismo almacén sin servidor externo
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+class SharedCache:
+    """
+    Caché persistente con TTL sobre un archivo SQLite
+
+    Args:
+        path: Ruta del archivo SQLite (compartido por todos los workers)
+        namespace: Prefijo lógico (ej. 'embeddings', 'answers')
+        ttl: Segundos de validez de cada entrada (None = sin expiración)
+        max_entries: Máximo de entradas del namespace antes de purgar las más antiguas
+    """
+
+    def __init__(self, path, namespace, ttl=None, max_entries=50000):
+        self.path = str(path)
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._writes = 0
+
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+            "created_at REAL NOT NULL, PRIMARY KEY (namespace, key))"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS cache_created ON cache (namespace, created_at)")
+
+    def _conn(self):
+        """
+        Conexión por thread y por proceso
+        Las conexiones SQLite no deben cruzar un fork ni compartirse entre threads
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key):
+        """
+        Busca una entrada
+
+        Args:
+            key: Clave a buscar
+
+        Returns:
+            Valor deserializado o None si no existe o expiró
+        """
+        try:
+            row = self._conn().execute(
+                "SELECT value, created_at FROM cache WHERE namespace = ? AND key = ?",
+                (self.namespace, key)
+            ).fetchone()
+        except sqlite3.Error:
+            row = None
+
+        if row is None or (self.ttl is not None and time.time() - row[1] > self.ttl):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key, value):
+        """
+        Guarda una entrada (sobrescribe si ya existe)
+
+        Args:
+            key: Clave
+            value: Valor serializable a JSON
+        """
+        try:
+            conn = self._conn()
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (namespace, key, value, created_at) VALUES (?, ?, ?, ?)",
+                (self.namespace, key, json.dumps(value, ensure_ascii=False), time.time())
+            )
+            self._writes += 1
+            # Purga periódica en lugar de en cada escritura
+            if self._writes % 500 == 0:
+                self._evict(conn)
+        except sqlite3.Error as e:
+            print(f"⚠️  Error escribiendo en caché '{self.namespace}': {e}")
+
+    def claim(self, key, value=True):
+        """
+        Guarda una entrada solo si no existe (o expiró), de forma atómica entre procesos
+        Sirve para que un solo worker se encargue de una tarea compartida
+
+        Returns:
+            True si este proceso obtuvo la entrada, False si otro ya la tenía
+        """
+        try:
+            conn = self._conn()
+            now = time.time()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if self.ttl is not None:
+                    conn.execute(
+                        "DELETE FROM cache WHERE namespace = ? AND key = ? AND created_at < ?",
+                        (self.namespace, key, now - self.ttl)
+                    )
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO cache (namespace, key, value, created_at) VALUES (?, ?, ?, ?)",
+                    (self.namespace, key, json.dumps(value, ensure_ascii=False), now)
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            return cursor.rowcount == 1
+        except sqlite3.Error as e:
+            print(f"⚠️  Error reclamando '{key}' en caché '{self.namespace}': {e}")
+            return False
+
+    def _evict(self, conn):
+        """Elimina entradas expiradas y las más antiguas si se supera max_entries"""
+        if self.ttl is not None:
+            conn.execute(
+                "DELETE FROM cache WHERE namespace = ? AND created_at < ?",
+                (self.namespace, time.time() - self.ttl)
+            )
+        conn.execute(
+            "DELETE FROM cache WHERE namespace = ? AND key IN ("
+            "SELECT key FROM cache WHERE namespace = ? ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+            (self.namespace, self.namespace, self.max_entries)
+        )
+
+    def size(self):
+        """Número de entradas del namespace"""
+        try:
+            return self._conn().execute(
+                "SELECT COUNT(*) FROM cache WHERE namespace = ?", (self.namespace,)
+            ).fetchone()[0]
+        except sqlite3.Error:
+            return 0
+
+    def stats(self):
+        """Aciertos y fallos de este proceso"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / total, 3) if total else 0.0,
+        }
@@ -0,0 +1,67 @@
+"""
+Coalescencia de peticiones idénticas en vuelo (single-flight)
+Si varias peticiones con la misma clave llegan mientras una ya se está
+calculando, todas esperan y reciben el mismo resultado
+"""
+import asyncio
+import re
+import unicodedata
+
+_whitespace_re = re.compile(r"\s+")
+_edge_punctuation_re = re.compile(r"^[¿¡\s]+|[?!.\s]+$")
+
+def normalize_query(query):
+    """
+    Normaliza una pregunta para usarla como clave de coalescencia
+
+    Args:
+        query: Pregunta del usuario
+
+    Returns:
+        Pregunta en minúsculas, sin signos de interrogación/exclamación en
+        los extremos y con espacios colapsados
+    """
+    text = unicodedata.normalize('NFC', query).casefold()
+    text = _whitespace_re.sub(' ', text)
+    return _edge_punctuation_re.sub('', text)
+
+class SingleFlight:
+    """Agrupa llamadas concurrentes con la misma clave en una sola ejecución"""
+
+    def __init__(self):
+        self._inflight = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key, fn, *args):
+        """
+        Ejecuta fn(*args) una sola vez por clave mientras esté en vuelo
+
+        Args:
+            key: Clave de coalescencia
+            fn: Corrutina a ejecutar
+            *args: Argumentos para fn
+
+        Returns:
+            Resultado compartido (o la misma excepción) para todos los que esperan
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            self.calls += 1
+            # El cálculo corre como tarea propia: si el cliente que lo inició se
+            # desconecta, los demás siguen esperando el mismo resultado
+            task = asyncio.ensure_future(fn(*args))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+
+        return await asyncio.shield(task)
+
+    def is_inflight(self, key):
+        """Indica si ya hay un cálculo en curso para la clave"""
+        return key in self._inflight
+
+    def inflight(self):
+        """Número de claves que se están calculando en este momento"""
+        return len(self._inflight)
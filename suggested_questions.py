@@ -0,0 +1,13 @@
+"""
+Preguntas sugeridas que se muestran en la interfaz
+Viven en un módulo aparte para que la API pueda precalcular sus respuestas en
+el arranque sin importar Streamlit (chatbot.py)
+"""
+
+SUGGESTED_QUESTIONS = [
+    "¿De qué trató el video del mercado de solteros en China?",
+    "¿Qué lugares visitó en Madagascar?",
+    "¿Cuál fue su experiencia en Dubai?",
+    "¿Qué opinó sobre Cuba?",
+    "¿En qué video habla de comida mexicana?"
+]
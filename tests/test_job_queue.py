@@ -0,0 +1,67 @@
+"""
+Recuperación de trabajos 'running' al arrancar el scheduler
+
+    python -m pytest tests/
+"""
+import os
+import subprocess
+import sys
+
+from job_queue import JobQueue
+
+def dead_pid():
+    """PID de un proceso que ya terminó"""
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+def videos(*ids):
+    return [{'video_id': video_id, 'title': video_id} for video_id in ids]
+
+def test_restart_requeues_jobs_of_previous_run(tmp_path):
+    path = tmp_path / 'jobs.sqlite3'
+    queue = JobQueue(path)
+    queue.enqueue(videos('a', 'b', 'c'))
+    assert len(queue.claim(2)) == 2
+    queue.close()
+
+    # El scheduler reinicia (mismo PID, como en un contenedor): nada de esperar a requeue_stale
+    queue = JobQueue(path)
+    assert queue.requeue_stale(3600) == 0
+    assert queue.requeue_orphaned() == 2
+    assert queue.counts()['running'] == 0
+    assert {job['video_id'] for job in queue.claim(10)} == {'a', 'b', 'c'}
+    queue.close()
+
+def test_requeue_orphaned_only_takes_dead_owners(tmp_path):
+    queue = JobQueue(tmp_path / 'jobs.sqlite3')
+    queue.enqueue(videos('dead', 'alive', 'remote', 'legacy'))
+    queue.claim(4)
+    owners = {
+        'dead': f"{queue.host}:{dead_pid()}",
+        'alive': f"{queue.host}:{os.getppid()}",
+        'remote': "otra-maquina:1234",
+        'legacy': None,
+    }
+    with queue._transaction() as conn:
+        conn.executemany("UPDATE jobs SET owner = ? WHERE video_id = ?",
+                         [(owner, video_id) for video_id, owner in owners.items()])
+
+    assert queue.requeue_orphaned() == 2
+    recovered = {job['video_id'] for job in queue.claim(10)}
+    assert recovered == {'dead', 'legacy'}
+    queue.close()
+
+def test_requeue_orphaned_keeps_attempts(tmp_path):
+    queue = JobQueue(tmp_path / 'jobs.sqlite3', max_attempts=1)
+    queue.enqueue(videos('a'))
+    queue.claim()
+    queue.close()
+
+    queue = JobQueue(tmp_path / 'jobs.sqlite3', max_attempts=1)
+    queue.requeue_orphaned()
+    queue.claim()
+    # El intento interrumpido cuenta: con max_attempts=1 un fallo ya es definitivo
+    assert queue.fail('a', 'error') is False
+    assert queue.counts()['failed'] == 1
+    queue.close()
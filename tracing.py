@@ -0,0 +1,228 @@
+"""
+Trazas OpenTelemetry para el pipeline y la API
+Exporta los spans a archivos JSON Lines locales, uno por proceso
+(traces/<servicio>.<pid>.jsonl, así los workers de gunicorn no comparten ni
+rotan el mismo archivo), para analizarlos offline. Si opentelemetry no está
+instalado todo es un no-op
+
+Uso offline (acepta varios archivos o patrones glob):
+    python tracing.py 'traces/api.*.jsonl'
+"""
+import glob
+import json
+import os
+import sys
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    from opentelemetry import trace, propagate
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter, SpanExportResult
+    OTEL_AVAILABLE = True
+except ImportError:
+    OTEL_AVAILABLE = False
+
+_initialized = False
+_init_lock = threading.Lock()
+
+# Tamaño máximo del archivo de trazas antes de rotarlo (traces/api.<pid>.jsonl -> .1, .2, ...)
+MAX_BYTES = int(os.getenv('TRACES_MAX_BYTES', str(50 * 1024 * 1024)))
+BACKUP_COUNT = int(os.getenv('TRACES_BACKUP_COUNT', '3'))
+
+if OTEL_AVAILABLE:
+    class FileSpanExporter(SpanExporter):
+        """
+        Escribe cada span como una línea JSON en un archivo local del proceso
+        Al superar max_bytes el archivo se rota (se conservan backup_count copias).
+        El PID se resuelve al exportar: con gunicorn preload el exportador se crea
+        en el master y cada worker escribe después del fork en su propio archivo
+
+        Args:
+            directory: Carpeta de las trazas
+            service_name: Prefijo del archivo (<servicio>.<pid>.jsonl)
+        """
+
+        def __init__(self, directory, service_name, max_bytes=MAX_BYTES, backup_count=BACKUP_COUNT):
+            self.directory = Path(directory)
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self.service_name = service_name
+            self.max_bytes = max_bytes
+            self.backup_count = backup_count
+            self._lock = threading.Lock()
+
+        @property
+        def path(self):
+            return self.directory / f"{self.service_name}.{os.getpid()}.jsonl"
+
+        def _rotate(self, path):
+            if self.backup_count <= 0:
+                path.unlink(missing_ok=True)
+                return
+            for i in range(self.backup_count - 1, 0, -1):
+                older = path.with_name(f"{path.name}.{i}")
+                if older.exists():
+                    os.replace(older, path.with_name(f"{path.name}.{i + 1}"))
+            os.replace(path, path.with_name(f"{path.name}.1"))
+
+        def export(self, spans):
+            lines = ''.join(span.to_json(indent=None) + '\n' for span in spans)
+            path = self.path
+            try:
+                with self._lock:
+                    try:
+                        if self.max_bytes and path.stat().st_size >= self.max_bytes:
+                            self._rotate(path)
+                    except FileNotFoundError:
+                        # Sin archivo todavía
+                        pass
+                    with open(path, 'a', encoding='utf-8') as f:
+                        f.write(lines)
+            except OSError:
+                return SpanExportResult.FAILURE
+            return SpanExportResult.SUCCESS
+
+        def shutdown(self):
+            pass
+
+def init_tracing(service_name):
+    """
+    Configura el proveedor de trazas del proceso (idempotente)
+
+    Args:
+        service_name: Nombre del servicio (api, transcriber, mcp-server, ...)
+
+    Returns:
+        bool: True si las trazas quedaron activas
+    """
+    global _initialized
+    if not OTEL_AVAILABLE or os.getenv('TRACING_ENABLED', 'true').lower() == 'false':
+        return False
+
+    with _init_lock:
+        if _initialized:
+            return True
+
+        traces_dir = os.getenv('TRACES_DIR', 'traces')
+        provider = TracerProvider(resource=Resource.create({'service.name': service_name}))
+        provider.add_span_processor(
+            BatchSpanProcessor(FileSpanExporter(traces_dir, service_name))
+        )
+        trace.set_tracer_provider(provider)
+        _initialized = True
+        return True
+
+@contextmanager
+def span(name, context=None, **attributes):
+    """
+    Abre un span hijo del span actual (o de `context` si se pasa)
+
+    Args:
+        name: Nombre del span (ej. 'llm.invoke', 'blob.upload')
+        context: Contexto remoto extraído con extract_context (opcional)
+        **attributes: Atributos del span
+
+    Yields:
+        El span (o None si las trazas no están disponibles)
+    """
+    if not OTEL_AVAILABLE:
+        yield None
+        return
+
+    tracer = trace.get_tracer('luisito')
+    with tracer.start_as_current_span(name, context=context) as current:
+        for key, value in attributes.items():
+            if value is not None:
+                current.set_attribute(key, value)
+        yield current
+
+def set_attributes(current, **attributes):
+    """Agrega atributos a un span ya abierto (ignora None)"""
+    if current is None:
+        return
+    for key, value in attributes.items():
+        if value is not None:
+            current.set_attribute(key, value)
+
+def inject_headers(headers=None):
+    """
+    Agrega la cabecera traceparent del span actual para propagar la traza
+
+    Args:
+        headers: Dict de cabeceras HTTP (opcional)
+
+    Returns:
+        Dict de cabeceras con el contexto de la traza
+    """
+    headers = dict(headers or {})
+    if OTEL_AVAILABLE:
+        propagate.inject(headers)
+    return headers
+
+def extract_context(headers):
+    """
+    Extrae el contexto de traza de cabeceras HTTP entrantes
+
+    Args:
+        headers: Cabeceras (dict o http.client.HTTPMessage)
+
+    Returns:
+        Contexto para pasar a span(..., context=...) o None
+    """
+    if not OTEL_AVAILABLE:
+        return None
+    return propagate.extract({key.lower(): value for key, value in headers.items()})
+
+def expand_trace_paths(patterns):
+    """Archivos que coinciden con las rutas o patrones glob, sin repetidos y en orden"""
+    paths = []
+    for pattern in patterns:
+        for path in sorted(glob.glob(str(pattern))) or [str(pattern)]:
+            if path not in paths:
+                paths.append(path)
+    return paths
+
+def summarize_traces(*patterns):
+    """
+    Resume archivos de trazas: llamadas, duración total y media por span
+
+    Args:
+        patterns: Rutas o patrones glob de archivos JSON Lines de spans
+            (ej. 'traces/api.*.jsonl' para todos los workers)
+
+    Returns:
+        Lista de (nombre, llamadas, total_ms, media_ms, errores) ordenada por total
+    """
+    from datetime import datetime
+
+    def parse(ts):
+        return datetime.fromisoformat(ts.replace('Z', '+00:00'))
+
+    totals = defaultdict(lambda: [0, 0.0, 0])
+    for path in expand_trace_paths(patterns):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                data = json.loads(line)
+                duration_ms = (parse(data['end_time']) - parse(data['start_time'])).total_seconds() * 1000
+                entry = totals[data['name']]
+                entry[0] += 1
+                entry[1] += duration_ms
+                if data.get('status', {}).get('status_code') == 'ERROR':
+                    entry[2] += 1
+
+    rows = [(name, calls, total, total / calls, errors) for name, (calls, total, errors) in totals.items()]
+    return sorted(rows, key=lambda row: row[2], reverse=True)
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Uso: python tracing.py 'traces/<servicio>.*.jsonl' [más archivos o patrones]")
+        sys.exit(1)
+
+    print(f"{'span':40} {'llamadas':>9} {'total ms':>12} {'media ms':>10} {'errores':>8}")
+    for name, calls, total, mean, errors in summarize_traces(*sys.argv[1:]):
+        print(f"{name[:40]:40} {calls:>9} {total:>12.1f} {mean:>10.1f} {errors:>8}")
@@ -1,6 +1,7 @@
 """
 Transcripción de videos de Luisito Comunica usando MCP de YouTube
-Estrategia: MCP primero, fallback a youtube-transcript-api si falla
+Estrategia: MCP primero, fallback a youtube-transcript-api si falla y, si el
+video no tiene subtítulos, transcripción local del audio con Whisper
 """
 import os
 import json
@@ -9,6 +10,9 @@ import requests
 from dotenv import load_dotenv
 from datetime import datetime
 from pathlib import Path
+from tracing import init_tracing, span, set_attributes, inject_headers
+import transcript_store
+from transcriptions_io import TranscriptionWriter
 
 load_dotenv()
 
@@ -24,13 +28,15 @@ def get_mcp_transcript(mcp_url, video_url):
         Dict con la transcripción o None si falla
     """
     try:
-        # Llamada al endpoint del servidor MCP
-        response = requests.post(
-            f"{mcp_url}/api/transcript",
-            json={"url": video_url},
-            timeout=60,
-            headers={"Content-Type": "application/json"}
-        )
+        # Llamada al endpoint del servidor MCP (propaga la traza con traceparent)
+        with span('mcp.request', mcp_url=mcp_url, video_url=video_url) as current:
+            response = requests.post(
+                f"{mcp_url}/api/transcript",
+                json={"url": video_url},
+                timeout=60,
+                headers=inject_headers({"Content-Type": "application/json"})
+            )
+            set_attributes(current, http_status=response.status_code)
         
         if response.status_code == 200:
             data = response.json()
@@ -82,7 +88,8 @@ def transcribe_with_fallback(video_id, video_url):
         from youtube_transcript_api import YouTubeTranscriptApi
         from youtube_transcript_api._errors import TranscriptsDisabled, NoTranscriptFound
         
-        transcript_list = YouTubeTranscriptApi.list_transcripts(video_id)
+        with span('youtube.list_transcripts', video_id=video_id):
+            transcript_list = YouTubeTranscriptApi.list_transcripts(video_id)
         
         try:
             transcript = transcript_list.find_transcript(['es', 'en'])
@@ -96,7 +103,8 @@ def transcribe_with_fallback(video_id, video_url):
             except:
                 raise NoTranscriptFound(video_id, ['es', 'en'])
         
-        transcript_data = transcript.fetch()
+        with span('youtube.fetch_transcript', video_id=video_id):
+            transcript_data = transcript.fetch()
         
         result = {
             'video_id': video_id,
@@ -110,17 +118,9 @@ def transcribe_with_fallback(video_id, video_url):
         return result
         
     except TranscriptsDisabled:
-        return {
-            'video_id': video_id,
-            'error': 'Los subtítulos están deshabilitados para este video',
-            'status': 'error'
-        }
+        return transcribe_locally(video_id, 'Los subtítulos están deshabilitados para este video')
     except NoTranscriptFound:
-        return {
-            'video_id': video_id,
-            'error': 'No se encontró transcripción disponible',
-            'status': 'error'
-        }
+        return transcribe_locally(video_id, 'No se encontró transcripción disponible')
     except Exception as e:
         return {
             'video_id': video_id,
@@ -128,6 +128,36 @@ def transcribe_with_fallback(video_id, video_url):
             'status': 'error'
         }
 
+def transcribe_locally(video_id, subtitles_error):
+    """
+    Intento 3: transcribir el audio localmente con Whisper (CPU)
+    
+    Args:
+        video_id: ID del video de YouTube
+        subtitles_error: Motivo por el que no hubo subtítulos
+    
+    Returns:
+        Dict con la transcripción o el error de subtítulos si tampoco funciona
+    """
+    import local_transcriber
+    
+    if not local_transcriber.is_available():
+        return {'video_id': video_id, 'error': subtitles_error, 'status': 'error'}
+    
+    print(f"   Intento 3: Transcripción local del audio (Whisper {local_transcriber.MODEL_SIZE})...")
+    with span('whisper.transcribe', video_id=video_id) as current:
+        result = local_transcriber.transcribe_video(video_id)
+        set_attributes(current, status=result['status'])
+    
+    if result['status'] == 'success':
+        print(f"   ✅ Transcripción local exitosa")
+        return result
+    return {
+        'video_id': video_id,
+        'error': f"{subtitles_error}; {result['error']}",
+        'status': 'error'
+    }
+
 def load_video_list(video_list_file='data/video_list.json'):
     """
     Carga la lista de videos a transcribir
@@ -180,45 +210,53 @@ def transcribe_all_videos(video_list_file='data/video_list.json'):
     
     print(f"\n🎬 Iniciando transcripción de {len(videos)} videos\n")
     
-    transcriptions = []
+    output_file = f"data/transcriptions_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+    transcripts_dir = Path('data/transcripts')
+    transcripts_dir.mkdir(parents=True, exist_ok=True)
     mcp_count = 0
     fallback_count = 0
+    local_count = 0
     error_count = 0
     
-    for i, video in enumerate(videos, 1):
-        video_id = video['video_id']
-        video_url = f"https://www.youtube.com/watch?v={video_id}"
-        
-        print(f"[{i}/{len(videos)}] {video['title'][:60]}...")
-        
-        result = transcribe_with_fallback(video_id, video_url)
-        result.update(video)
-        transcriptions.append(result)
-        
-        if result['status'] == 'success':
-            if result.get('method') == 'MCP':
-                mcp_count += 1
+    # Cada resultado se escribe al dump en cuanto termina (JSON Lines), sin
+    # acumular todas las transcripciones en memoria
+    with TranscriptionWriter(output_file) as writer:
+        for i, video in enumerate(videos, 1):
+            video_id = video['video_id']
+            video_url = f"https://www.youtube.com/watch?v={video_id}"
+            
+            print(f"[{i}/{len(videos)}] {video['title'][:60]}...")
+            
+            with span('transcribe.video', video_id=video_id) as current:
+                result = transcribe_with_fallback(video_id, video_url)
+                set_attributes(current, status=result['status'], method=result.get('method'))
+            result.update(video)
+            writer.write(result)
+            
+            if result['status'] == 'success':
+                # Copia compacta por video (segmentos en columnas, comprimida)
+                transcript_store.save(result, transcripts_dir / f"{video_id}{transcript_store.EXTENSION}")
+                if result.get('method') == 'MCP':
+                    mcp_count += 1
+                elif result.get('method') == 'local_whisper':
+                    local_count += 1
+                else:
+                    fallback_count += 1
             else:
-                fallback_count += 1
-        else:
-            error_count += 1
-        
-        # Rate limiting para no saturar APIs (aumentar si hay problemas)
-        time.sleep(10)
-    
-    # Guardar resultados
-    output_file = f"data/transcriptions_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(transcriptions, f, indent=2, ensure_ascii=False)
+                error_count += 1
+            
+            # Rate limiting para no saturar APIs (aumentar si hay problemas)
+            time.sleep(10)
     
     # Estadísticas
     print(f"\n{'='*60}")
     print(f"📊 RESUMEN DE TRANSCRIPCIONES")
     print(f"{'='*60}")
-    print(f"   Total procesados:     {len(transcriptions)}")
-    print(f"   ✅ Exitosos:          {mcp_count + fallback_count}")
+    print(f"   Total procesados:     {writer.count}")
+    print(f"   ✅ Exitosos:          {mcp_count + fallback_count + local_count}")
     print(f"      - Con MCP:         {mcp_count}")
     print(f"      - Con fallback:    {fallback_count}")
+    print(f"      - Con Whisper:     {local_count}")
     print(f"   ❌ Errores:           {error_count}")
     print(f"   💾 Archivo:           {output_file}")
     print(f"{'='*60}\n")
@@ -253,6 +291,7 @@ def main():
     """Función principal"""
     print("🎥 SISTEMA DE TRANSCRIPCIÓN DE LUISITO COMUNICA")
     print("="*60)
+    init_tracing('transcriber')
     
     # Crear directorio de datos
     Path("data").mkdir(exist_ok=True)
@@ -264,30 +303,24 @@ def main():
         print("\n⚠️  El servidor MCP no está disponible.")
         print("   Se usará youtube-transcript-api como fallback.")
     
-    # Transcribir videos
-    transcriptions_file = transcribe_all_videos()
+    # Pipeline con etapas solapadas: cada video se sube y se embebe mientras
+    # los siguientes se transcriben (VIDEO_LIST_FILE=data/new_videos.json
+    # procesa solo el delta de la última sincronización de video_sync.py)
+    videos = load_video_list(os.getenv('VIDEO_LIST_FILE', 'data/video_list.json'))
+    if not videos:
+        print("❌ No hay videos para transcribir")
+        return
+    
+    from pipeline import run_pipeline
+    report = run_pipeline(videos)
     
-    if not transcriptions_file:
+    if not report['stages'][0]['processed']:
         print("❌ No se generaron transcripciones")
         return
     
-    # Upload a Azure si está configurado
     azure_conn_str = os.getenv('AZURE_STORAGE_CONNECTION_STRING')
-    if azure_conn_str and azure_conn_str.strip():
-        print("\n📤 Subiendo transcripciones a Azure Blob Storage...")
-        try:
-            from upload_to_azure import upload_transcriptions
-            upload_transcriptions(transcriptions_file)
-            
-            print("\n🧠 Construyendo vector store con ChromaDB...")
-            from build_vectorstore import create_vectorstore
-            create_vectorstore()
-            
-            print("\n✅ Pipeline completo finalizado!")
-        except Exception as e:
-            print(f"\n⚠️  Error en upload/vectorstore: {e}")
-    else:
-        print("\n⚠️  Azure no configurado. Skipping upload y vector store.")
+    if not (azure_conn_str and azure_conn_str.strip()):
+        print("\n⚠️  Azure no configurado. Skipping upload.")
     
     print("\n🎉 Proceso completado!")
 
@@ -0,0 +1,164 @@
+"""
+Normalización de transcripciones antes del chunking
+Los subtítulos automáticos traen etiquetas ([Música], [Aplausos]...),
+entidades HTML, fragmentos repetidos de los subtítulos "rodantes" (cada línea
+repite el final de la anterior) y muletillas duplicadas ("no no no"). Todo
+eso ocupa tokens en los embeddings y en el prompt sin aportar contenido.
+Las transcripciones guardadas no se modifican: se normaliza al generar chunks
+
+Uso (reporte de ahorro sobre un dump):
+    python transcript_normalizer.py data/transcriptions_x.jsonl
+"""
+import html
+import os
+import re
+import sys
+import threading
+
+from chunking import count_tokens
+
+ENABLED = os.getenv('NORMALIZE_TRANSCRIPTS', 'true').lower() == 'true'
+
+# Palabras máximas que se comparan entre el final de un segmento y el inicio del siguiente
+MAX_OVERLAP_WORDS = 12
+# Solapamientos más cortos pueden ser casualidad ("de ... de")
+MIN_OVERLAP_WORDS = 2
+
+# Etiquetas de sonido y palabras censuradas: [Música], [Aplausos], [ __ ], (risas)
+_tag_re = re.compile(r"\[[^\]]{0,40}\]|\((?:m[uú]sica|aplausos|risas|music|applause|laughter)\)", re.IGNORECASE)
+_markup_re = re.compile(r"<[^>]{0,100}>|[♪♫]+|>>")
+_space_re = re.compile(r"\s+")
+# Un n-grama de 1 a 4 palabras repetido de forma consecutiva ("vamos a ver vamos a ver").
+# Solo letras: números repetidos ("el 10 10 de marzo") suelen ser contenido
+_repeat_re = re.compile(r"\b((?:[^\W\d_]+\W+){0,3}?[^\W\d_]+)(?:\W+\1\b)+", re.IGNORECASE)
+_word_key_re = re.compile(r"\W+")
+
+def clean_text(text):
+    """Quita etiquetas, marcado y espacios sobrantes y colapsa repeticiones"""
+    if not text:
+        return ''
+    if '&' in text:
+        text = html.unescape(text)
+    text = _tag_re.sub(' ', text)
+    text = _markup_re.sub(' ', text)
+    text = _space_re.sub(' ', text).strip()
+    if text:
+        text = _repeat_re.sub(r'\1', text)
+    return text
+
+def _word_keys(words):
+    return [_word_key_re.sub('', word.lower()) for word in words]
+
+def _overlap(previous_keys, keys):
+    """Palabras al inicio de `keys` que repiten el final de `previous_keys`"""
+    limit = min(len(previous_keys), len(keys), MAX_OVERLAP_WORDS)
+    for n in range(limit, 0, -1):
+        if previous_keys[-n:] == keys[:n]:
+            # Un segmento entero repetido cuenta aunque sea corto
+            return n if n >= MIN_OVERLAP_WORDS or n == len(keys) else 0
+    return 0
+
+def normalize_segments(segments):
+    """
+    Limpia los segmentos y quita el texto que repite el final del segmento anterior
+
+    Args:
+        segments: Lista de dicts con 'text', 'start' y 'duration'
+
+    Returns:
+        Lista nueva de segmentos (se descartan los que quedan vacíos)
+    """
+    normalized = []
+    previous_keys = []
+    for segment in segments:
+        text = clean_text(segment.get('text', ''))
+        if not text:
+            continue
+        words = text.split(' ')
+        keys = _word_keys(words)
+        overlap = _overlap(previous_keys, keys)
+        if overlap:
+            words = words[overlap:]
+            keys = keys[overlap:]
+            if not words:
+                continue
+            text = ' '.join(words)
+
+        normalized.append({**segment, 'text': text})
+        # Para el siguiente solapamiento basta con la cola de lo ya emitido
+        previous_keys = (previous_keys + keys)[-MAX_OVERLAP_WORDS:]
+    return normalized
+
+def normalize_transcription(transcription):
+    """
+    Copia normalizada de una transcripción y el ahorro obtenido
+
+    Returns:
+        Tupla (transcripción, stats) con stats = {'segments_before', 'segments_after',
+        'tokens_before', 'tokens_after'}
+    """
+    segments = transcription.get('transcript_data') or []
+    if segments and isinstance(segments[0], dict) and 'start' in segments[0]:
+        before = [s.get('text', '') for s in segments]
+        normalized = normalize_segments(segments)
+        after = [s['text'] for s in normalized]
+        result = {**transcription, 'transcript_data': normalized, 'transcript': ' '.join(after)}
+    else:
+        before = [transcription.get('transcript') or '']
+        after = [clean_text(before[0])]
+        result = {**transcription, 'transcript': after[0]}
+
+    stats = {
+        'segments_before': len(before),
+        'segments_after': len(after),
+        'tokens_before': int(count_tokens(before).sum()) if before else 0,
+        'tokens_after': int(count_tokens(after).sum()) if after else 0,
+    }
+    return result, stats
+
+class NormalizationStats:
+    """Acumula el ahorro de tokens de varias transcripciones (thread-safe)"""
+
+    def __init__(self):
+        self.totals = {'transcriptions': 0, 'segments_before': 0, 'segments_after': 0,
+                       'tokens_before': 0, 'tokens_after': 0}
+        self._lock = threading.Lock()
+
+    def add(self, stats):
+        with self._lock:
+            self.totals['transcriptions'] += 1
+            for key, value in stats.items():
+                self.totals[key] += value
+
+    def summary(self):
+        with self._lock:
+            summary = dict(self.totals)
+        saved = summary['tokens_before'] - summary['tokens_after']
+        summary['tokens_saved'] = saved
+        summary['tokens_saved_pct'] = round(100 * saved / summary['tokens_before'], 1) if summary['tokens_before'] else 0.0
+        return summary
+
+def format_summary(summary):
+    """Resumen legible del ahorro"""
+    return (
+        f"🧹 Normalización: {summary['transcriptions']} transcripciones, "
+        f"segmentos {summary['segments_before']} → {summary['segments_after']}, "
+        f"tokens {summary['tokens_before']} → {summary['tokens_after']} "
+        f"(-{summary['tokens_saved_pct']}%)"
+    )
+
+def main():
+    if len(sys.argv) < 2:
+        print("Uso: python transcript_normalizer.py data/transcriptions_x.jsonl")
+        return
+
+    from transcriptions_io import iter_transcriptions
+
+    stats = NormalizationStats()
+    for transcription in iter_transcriptions(sys.argv[1]):
+        if transcription.get('status') == 'success':
+            stats.add(normalize_transcription(transcription)[1])
+    print(format_summary(stats.summary()))
+
+if __name__ == "__main__":
+    main()
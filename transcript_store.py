@@ -0,0 +1,179 @@
+"""
+Formato binario compacto para transcripciones (.ltr)
+Guarda los segmentos en columnas (textos + arrays de start/duration) en vez de
+una lista de dicts con claves repetidas, comprimido con zlib
+
+Estructura:
+    magic b'LTR1' | uint32 longitud del header | header JSON (metadatos del video)
+    | bloque zlib con: uint32 n | float32[n] start | float32[n] duration
+                       | uint32[n+1] offsets | textos UTF-8 concatenados
+
+El texto completo ('transcript') no se guarda: se reconstruye uniendo los segmentos
+"""
+import json
+import struct
+import sys
+import zlib
+from array import array
+
+MAGIC = b'LTR1'
+EXTENSION = '.ltr'
+
+_SEGMENT_KEYS = ('transcript_data', 'transcript')
+
+def dumps(transcription):
+    """
+    Serializa una transcripción al formato compacto
+
+    Args:
+        transcription: Dict con metadatos y 'transcript_data' (text/start/duration)
+
+    Returns:
+        bytes
+    """
+    segments = transcription.get('transcript_data') or []
+    header = {key: value for key, value in transcription.items() if key not in _SEGMENT_KEYS}
+
+    # Transcripciones sin segmentos: el texto completo va como un único segmento sin tiempo
+    if not segments and transcription.get('transcript'):
+        segments = [{'text': transcription['transcript'], 'start': 0.0, 'duration': 0.0}]
+        header['_untimed'] = True
+
+    starts = array('f', (float(s.get('start', 0.0)) for s in segments))
+    durations = array('f', (float(s.get('duration', 0.0)) for s in segments))
+    encoded = [s.get('text', '').encode('utf-8') for s in segments]
+
+    offsets = array('I', [0])
+    for text in encoded:
+        offsets.append(offsets[-1] + len(text))
+
+    body = b''.join((
+        struct.pack('<I', len(segments)),
+        _le_bytes(starts),
+        _le_bytes(durations),
+        _le_bytes(offsets),
+        b''.join(encoded),
+    ))
+
+    header_bytes = json.dumps(header, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return MAGIC + struct.pack('<I', len(header_bytes)) + header_bytes + zlib.compress(body, 6)
+
+def _le_bytes(values):
+    """Bytes little-endian de un array (el formato es independiente de la plataforma)"""
+    if sys.byteorder != 'little':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+def _from_le(typecode, data):
+    """Array desde bytes little-endian"""
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values
+
+def is_compact(data):
+    """Indica si unos bytes están en formato compacto"""
+    return data[:4] == MAGIC
+
+def read_header(data):
+    """
+    Lee solo los metadatos, sin descomprimir los segmentos
+
+    Args:
+        data: bytes en formato compacto
+
+    Returns:
+        Dict con los metadatos del video
+    """
+    if not is_compact(data):
+        raise ValueError("No es una transcripción en formato compacto")
+    (header_length,) = struct.unpack_from('<I', data, 4)
+    return json.loads(data[8:8 + header_length].decode('utf-8'))
+
+class _ZlibReader:
+    """Descomprime un bloque zlib bajo demanda, solo lo necesario para cada read()"""
+
+    CHUNK = 64 * 1024
+
+    def __init__(self, data):
+        self._decompressor = zlib.decompressobj()
+        self._source = memoryview(data)
+        self._position = 0
+        self._buffer = bytearray()
+
+    def read(self, size):
+        while len(self._buffer) < size:
+            if self._decompressor.unconsumed_tail:
+                piece = self._decompressor.decompress(self._decompressor.unconsumed_tail, self.CHUNK)
+            elif self._position < len(self._source):
+                compressed = self._source[self._position:self._position + self.CHUNK]
+                self._position += len(compressed)
+                piece = self._decompressor.decompress(compressed, self.CHUNK)
+            else:
+                piece = self._decompressor.flush()
+                if not piece:
+                    raise ValueError("Transcripción compacta truncada")
+            self._buffer += piece
+        result = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return result
+
+def iter_segments(data):
+    """
+    Recorre los segmentos de forma perezosa (un dict a la vez)
+    Se descomprimen primero las columnas de tiempos y offsets (12 bytes por
+    segmento) y después los textos a medida que se piden, sin materializar el
+    bloque completo
+
+    Args:
+        data: bytes en formato compacto
+
+    Yields:
+        Dicts con 'text', 'start' y 'duration'
+    """
+    (header_length,) = struct.unpack_from('<I', data, 4)
+    body = _ZlibReader(memoryview(data)[8 + header_length:])
+
+    (n,) = struct.unpack('<I', body.read(4))
+    starts = _from_le('f', body.read(4 * n))
+    durations = _from_le('f', body.read(4 * n))
+    offsets = _from_le('I', body.read(4 * (n + 1)))
+
+    for i in range(n):
+        yield {
+            'text': body.read(offsets[i + 1] - offsets[i]).decode('utf-8'),
+            'start': round(starts[i], 3),
+            'duration': round(durations[i], 3),
+        }
+
+def loads(data):
+    """
+    Deserializa una transcripción completa (formato compacto o JSON antiguo)
+
+    Args:
+        data: bytes
+
+    Returns:
+        Dict con el mismo formato que produce el transcriber
+    """
+    if not is_compact(data):
+        return json.loads(data.decode('utf-8'))
+
+    transcription = read_header(data)
+    untimed = transcription.pop('_untimed', False)
+    segments = list(iter_segments(data))
+    transcription['transcript'] = ' '.join(s['text'] for s in segments)
+    transcription['transcript_data'] = [] if untimed else segments
+    return transcription
+
+def save(transcription, path):
+    """Guarda una transcripción en un archivo .ltr"""
+    with open(path, 'wb') as f:
+        f.write(dumps(transcription))
+
+def load(path):
+    """Carga una transcripción desde un archivo .ltr (o .json antiguo)"""
+    with open(path, 'rb') as f:
+        return loads(f.read())
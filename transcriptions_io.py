@@ -0,0 +1,128 @@
+"""
+Lectura y escritura en streaming de los dumps de transcripciones
+El formato nuevo es JSON Lines (data/transcriptions_<fecha>.jsonl): una
+transcripción por línea, escrita a medida que se genera y leída de una en
+una, así la memoria no crece con el tamaño del canal. Los dumps antiguos
+(.json con una lista) también se leen en streaming
+"""
+import json
+from pathlib import Path
+
+DUMP_PATTERNS = ('transcriptions_*.jsonl', 'transcriptions_*.json')
+
+class TranscriptionWriter:
+    """
+    Escribe transcripciones en un archivo JSON Lines, una por línea
+
+    Uso:
+        with TranscriptionWriter('data/transcriptions_x.jsonl') as writer:
+            writer.write(result)
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.count = 0
+        self._file = None
+
+    def open(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'w', encoding='utf-8')
+        return self
+
+    def __enter__(self):
+        return self.open()
+
+    def write(self, transcription):
+        """Agrega una transcripción y la deja en disco (sobrevive a un corte a mitad de corrida)"""
+        self._file.write(json.dumps(transcription, ensure_ascii=False, separators=(',', ':')))
+        self._file.write('\n')
+        self._file.flush()
+        self.count += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def _iter_json_array(f, chunk_size=1 << 16):
+    """
+    Recorre los elementos de un archivo con una lista JSON sin cargarla entera
+    Lee bloques y decodifica un objeto a la vez con raw_decode
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    started = False
+    eof = False
+
+    while True:
+        # Saltar espacios, '[' inicial y comas entre elementos
+        while True:
+            while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                position += 1
+            if position < len(buffer) or eof:
+                break
+            buffer, position = f.read(chunk_size), 0
+            eof = not buffer
+
+        if position >= len(buffer):
+            return
+        if not started:
+            if buffer[position] != '[':
+                raise ValueError("El dump de transcripciones no es una lista JSON")
+            started = True
+            position += 1
+            continue
+        if buffer[position] == ']':
+            return
+
+        try:
+            item, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            # Objeto incompleto: leer más y reintentar
+            more = f.read(chunk_size)
+            eof = not more
+            buffer = buffer[position:] + more
+            position = 0
+            continue
+
+        yield item
+        position = end
+
+def iter_transcriptions(path):
+    """
+    Itera las transcripciones de un dump (.jsonl o .json antiguo)
+
+    Args:
+        path: Ruta al archivo
+
+    Yields:
+        Dicts de transcripción
+    """
+    path = Path(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.suffix == '.jsonl':
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from _iter_json_array(f)
+
+def find_latest_dump(directory='data'):
+    """
+    Dump de transcripciones más reciente (.jsonl o .json)
+
+    Returns:
+        Path o None si no hay ninguno
+    """
+    directory = Path(directory)
+    candidates = [path for pattern in DUMP_PATTERNS for path in directory.glob(pattern)]
+    if not candidates:
+        return None
+    # El nombre lleva la fecha (transcriptions_YYYYmmdd_HHMMSS): ordenar por nombre sin extensión
+    return max(candidates, key=lambda path: (path.stem, path.suffix == '.jsonl'))
@@ -92,6 +92,62 @@ def upload_chromadb_to_azure():
             os.remove(temp_path)
         return False
 
+def upload_quantized_index(index_directory=None):
+    """
+    Comprime y sube el índice int8 (quantized_store) a Azure Blob Storage
+    Es varias veces más pequeño que el snapshot de ChromaDB
+    
+    Returns:
+        bool: True si subió exitosamente, False si falló
+    """
+    from quantized_store import INDEX_DIR
+    index_directory = index_directory or INDEX_DIR
+    
+    if not Path(index_directory).exists():
+        print("❌ Índice int8 no existe localmente (python quantized_store.py export)")
+        return False
+    
+    connection_string = os.getenv('AZURE_STORAGE_CONNECTION_STRING')
+    if not connection_string:
+        print("⚠️  AZURE_STORAGE_CONNECTION_STRING no configurada")
+        return False
+    
+    container_name = os.getenv('AZURE_STORAGE_CONTAINER', 'luisito-transcripts')
+    blob_name = "vector_index/index.tar.gz"
+    
+    import tempfile
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.tar.gz') as temp_file:
+        temp_path = temp_file.name
+    
+    try:
+        print("📦 Comprimiendo índice int8...")
+        with tarfile.open(temp_path, "w:gz") as tar:
+            for file_path in Path(index_directory).iterdir():
+                tar.add(str(file_path), arcname=file_path.name)
+        
+        print(f"📤 Subiendo índice int8 ({os.path.getsize(temp_path) / 1024 / 1024:.1f} MB)...")
+        blob_client = BlobClient.from_connection_string(
+            connection_string,
+            container_name=container_name,
+            blob_name=blob_name
+        )
+        with open(temp_path, "rb") as data:
+            blob_client.upload_blob(data, overwrite=True)
+        
+        print("✅ Índice int8 subido exitosamente a Azure")
+        return True
+    
+    except Exception as e:
+        print(f"❌ Error subiendo índice int8 a Azure: {e}")
+        return False
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
 if __name__ == "__main__":
-    upload_chromadb_to_azure()
+    from quantized_store import VECTOR_BACKEND
+    if VECTOR_BACKEND == 'int8':
+        upload_quantized_index()
+    else:
+        upload_chromadb_to_azure()
 
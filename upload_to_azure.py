@@ -2,11 +2,12 @@
 Sube transcripciones a Azure Blob Storage
 """
 import os
-import json
 from datetime import datetime
 from azure.storage.blob import BlobServiceClient, BlobClient
 from dotenv import load_dotenv
-from pathlib import Path
+from tracing import init_tracing, span
+import transcript_store
+from transcriptions_io import iter_transcriptions, find_latest_dump
 
 load_dotenv()
 
@@ -54,12 +55,13 @@ def upload_transcription_file(blob_service_client, container_name, file_path):
     
     container_client = blob_service_client.get_container_client(container_name)
     
-    with open(file_path, 'rb') as data:
-        blob_client = container_client.upload_blob(
-            name=blob_name,
-            data=data,
-            overwrite=True
-        )
+    with span('blob.upload', blob=blob_name, bytes=os.path.getsize(file_path)):
+        with open(file_path, 'rb') as data:
+            blob_client = container_client.upload_blob(
+                name=blob_name,
+                data=data,
+                overwrite=True
+            )
     
     print(f"   ✅ Archivo completo subido: {blob_name}")
 
@@ -76,21 +78,23 @@ def upload_individual_transcriptions(blob_service_client, container_name, transc
     
     for trans in transcriptions:
         if trans['status'] == 'success':
-            blob_name = f"videos/{trans['video_id']}.json"
-            json_data = json.dumps(trans, ensure_ascii=False, indent=2)
+            # Formato compacto: segmentos en columnas y comprimidos
+            blob_name = f"videos/{trans['video_id']}{transcript_store.EXTENSION}"
+            payload = transcript_store.dumps(trans)
             
             container_client = blob_service_client.get_container_client(container_name)
-            container_client.upload_blob(
-                name=blob_name,
-                data=json_data.encode('utf-8'),
-                overwrite=True
-            )
+            with span('blob.upload', blob=blob_name, bytes=len(payload)):
+                container_client.upload_blob(
+                    name=blob_name,
+                    data=payload,
+                    overwrite=True
+                )
             uploaded += 1
             print(f"   ✅ {trans.get('title', 'Sin título')[:60]}...")
     
     print(f"\n   📦 {uploaded} transcripciones individuales subidas")
 
-def upload_transcriptions(transcriptions_file='data/transcriptions_latest.json'):
+def upload_transcriptions(transcriptions_file='data/transcriptions_latest.jsonl'):
     """
     Función principal para subir transcripciones a Azure
     
@@ -103,22 +107,14 @@ def upload_transcriptions(transcriptions_file='data/transcriptions_latest.json')
     # Verificar archivo
     if not os.path.exists(transcriptions_file):
         # Buscar el archivo más reciente
-        transcriptions_dir = Path('data')
-        transcription_files = list(transcriptions_dir.glob('transcriptions_*.json'))
+        transcriptions_file = find_latest_dump('data')
         
-        if not transcription_files:
+        if not transcriptions_file:
             print("❌ No se encontró archivo de transcripciones")
             return
         
-        transcriptions_file = sorted(transcription_files)[-1]
         print(f"📋 Usando archivo más reciente: {transcriptions_file}")
     
-    # Cargar transcripciones
-    with open(transcriptions_file, 'r', encoding='utf-8') as f:
-        transcriptions = json.load(f)
-    
-    print(f"   📊 Total de transcripciones: {len(transcriptions)}")
-    
     # Crear cliente
     blob_service_client = create_blob_client()
     container_name = os.getenv('AZURE_STORAGE_CONTAINER', 'luisito-transcripts')
@@ -132,7 +128,8 @@ def upload_transcriptions(transcriptions_file='data/transcriptions_latest.json')
     
     # Subir transcripciones individuales
     print(f"\n📦 Subiendo transcripciones individuales...")
-    upload_individual_transcriptions(blob_service_client, container_name, transcriptions)
+    # Las transcripciones se leen del dump de una en una (streaming)
+    upload_individual_transcriptions(blob_service_client, container_name, iter_transcriptions(transcriptions_file))
     
     print("\n✅ Upload completado!")
 
@@ -160,8 +157,10 @@ def download_transcriptions(container_name=None):
             container=container_name,
             blob=blob.name
         )
-        data = blob_client.download_blob().readall()
-        transcription = json.loads(data.decode('utf-8'))
+        with span('blob.download', blob=blob.name):
+            data = blob_client.download_blob().readall()
+        # Acepta blobs compactos (.ltr) y JSON antiguos
+        transcription = transcript_store.loads(data)
         transcriptions.append(transcription)
         print(f"   ✅ {transcription.get('title', 'Sin título')[:60]}...")
     
@@ -169,6 +168,8 @@ def download_transcriptions(container_name=None):
     return transcriptions
 
 if __name__ == "__main__":
+    init_tracing('uploader')
+    
     # Subir transcripciones
     upload_transcriptions()
     
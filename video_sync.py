@@ -0,0 +1,190 @@
+"""
+Sincronización incremental de data/video_list.json
+Recorre los videos del canal del más reciente al más antiguo y se detiene al
+llegar a videos ya conocidos, así una actualización diaria cuesta una o dos
+páginas. Los videos nuevos se mezclan con la lista existente y además se
+escriben en data/new_videos.json para que el transcriber procese solo esos:
+
+    python video_sync.py                       # YouTube Data API
+    python video_sync.py --source ytdlp        # sin API key
+    VIDEO_LIST_FILE=data/new_videos.json python transcribe_mcp.py
+"""
+import argparse
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+VIDEO_LIST_FILE = 'data/video_list.json'
+DELTA_FILE = 'data/new_videos.json'
+STATE_FILE = 'data/sync_state.json'
+
+# Videos conocidos seguidos antes de dejar de paginar (tolera estrenos y
+# videos que pasan de ocultos a públicos y aparecen fuera de orden)
+STOP_AFTER_KNOWN = int(os.getenv('SYNC_STOP_AFTER_KNOWN', '5'))
+
+def load_json(path, default):
+    """Lee un JSON o devuelve default si no existe"""
+    if not os.path.exists(path):
+        return default
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_json(path, data):
+    """Escribe un JSON de forma atómica (no deja listas a medias si se corta)"""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(temp_path, path)
+
+def find_new_videos(videos, known_ids, newest_video_id=None, stop_after_known=STOP_AFTER_KNOWN,
+                    early_stop=True):
+    """
+    Consume videos (del más reciente al más antiguo) hasta llegar al más
+    reciente de la sincronización anterior o encontrar `stop_after_known`
+    videos conocidos seguidos
+
+    Args:
+        videos: Iterable de dicts de video (un generador para paginar bajo demanda)
+        known_ids: Conjunto de video_id ya presentes en la lista (vacío = recorrer todo)
+        newest_video_id: Video más reciente visto en la última sincronización
+        early_stop: False para recorrer todo (fuentes que no llegan en orden,
+            ej. varias pestañas del canal mezcladas)
+
+    Returns:
+        Lista de videos nuevos en el orden recibido
+    """
+    new_videos = []
+    known_streak = 0
+    for video in videos:
+        if early_stop and video['video_id'] == newest_video_id:
+            break
+        if video['video_id'] in known_ids:
+            known_streak += 1
+            if early_stop and known_streak >= stop_after_known:
+                break
+            continue
+        known_streak = 0
+        new_videos.append(video)
+        # Evitar duplicados si la fuente repite un video
+        known_ids.add(video['video_id'])
+    return new_videos
+
+def sync_video_list(videos, video_list_file=VIDEO_LIST_FILE, delta_file=DELTA_FILE,
+                    state_file=STATE_FILE, full=False, early_stop=True):
+    """
+    Mezcla los videos nuevos con la lista existente
+
+    Args:
+        videos: Iterable de videos del canal, del más reciente al más antiguo, o
+            dict pestaña -> iterable (cada pestaña en su propio orden, se corta por separado)
+        video_list_file: Lista completa de videos
+        delta_file: Archivo donde se escriben solo los videos nuevos
+        state_file: Estado de la última sincronización
+        full: Ignorar la lista existente y recorrer todo el canal
+        early_stop: Dejar de leer al llegar a videos conocidos (solo si `videos`
+            viene ordenado del más reciente al más antiguo)
+
+    Returns:
+        Lista de videos nuevos
+    """
+    existing = [] if full else load_json(video_list_file, [])
+    known_ids = {video['video_id'] for video in existing}
+    state = {} if full else load_json(state_file, {})
+
+    if known_ids:
+        print(f"📋 {len(known_ids)} videos conocidos en {video_list_file} "
+              f"(último sync: {state.get('last_sync', 'nunca')})")
+    else:
+        print("📋 Sin lista previa: sincronización completa")
+    newest_video_id = state.get('newest_video_id') if known_ids else None
+    if isinstance(videos, dict):
+        new_videos = []
+        for tab, tab_videos in videos.items():
+            tab_new = find_new_videos(tab_videos, known_ids, newest_video_id, early_stop=early_stop)
+            # Termina el yt-dlp de la pestaña si se dejó de leer antes del final
+            getattr(tab_videos, 'close', lambda: None)()
+            if tab_new:
+                print(f"   {tab}: {len(tab_new)} nuevos")
+            new_videos += tab_new
+    else:
+        new_videos = find_new_videos(videos, known_ids, newest_video_id, early_stop=early_stop)
+
+    merged = new_videos + existing
+    merged.sort(key=lambda v: str(v.get('published_at') or ''), reverse=True)
+
+    save_json(video_list_file, merged)
+    save_json(delta_file, new_videos)
+
+    newest = merged[0] if merged else {}
+    save_json(state_file, {
+        'last_sync': datetime.now().isoformat(timespec='seconds'),
+        'newest_video_id': newest.get('video_id'),
+        'newest_published_at': newest.get('published_at'),
+        'total_videos': len(merged),
+        'new_videos': len(new_videos),
+    })
+
+    print(f"✅ {len(new_videos)} videos nuevos ({len(merged)} en total)")
+    print(f"   💾 Lista: {video_list_file}")
+    print(f"   🆕 Delta: {delta_file}")
+    return new_videos
+
+def api_videos(channel_id, api_key):
+    """
+    Videos del canal con la YouTube Data API, página a página
+    Sin caché de respuestas (la primera página debe ser fresca) y con un solo
+    worker, que no adelanta páginas: detenerse pronto no gasta cuota extra
+    """
+    from youtube_crawler import ChannelCrawler
+
+    crawler = ChannelCrawler(api_key, cache_dir=None, max_workers=1)
+    try:
+        yield from crawler.iter_videos(channel_id)
+    finally:
+        # También cuando la sincronización deja de paginar antes del final
+        stats = crawler.stats()
+        print(f"   📊 Cuota usada: {stats['quota_spent']} unidades")
+
+def ytdlp_videos(channel_id, tabs=None):
+    """
+    Videos del canal con yt-dlp (sin API key), leídos en streaming
+    Una fuente por pestaña (videos, shorts, directos): cada una viene ordenada
+    por separado, así sync_video_list puede dejar de leer cada pestaña al llegar
+    a videos conocidos y se termina su proceso sin enumerar el canal entero
+
+    Returns:
+        Dict pestaña -> generador de videos (yt-dlp arranca al empezar a iterar)
+    """
+    from get_videos_without_api import iter_videos_with_ytdlp, YTDLP_TABS
+
+    return {tab: iter_videos_with_ytdlp(f"channel/{channel_id}", tab) for tab in (tabs or YTDLP_TABS)}
+
+def main():
+    parser = argparse.ArgumentParser(description="Sincronización incremental de la lista de videos")
+    parser.add_argument('--source', choices=['api', 'ytdlp'], default='api', help="Origen de los videos")
+    parser.add_argument('--full', action='store_true', help="Reconstruir la lista completa")
+    args = parser.parse_args()
+
+    print("🔄 SINCRONIZAR LISTA DE VIDEOS")
+    print("="*60)
+
+    channel_id = os.getenv('YOUTUBE_CHANNEL_ID', 'UCECJDeK0MNapZbpaOzxrUPA')
+    if args.source == 'api':
+        api_key = os.getenv('YOUTUBE_API_KEY')
+        if not api_key:
+            print("❌ Configura YOUTUBE_API_KEY en .env (o usa --source ytdlp)")
+            return
+        videos = api_videos(channel_id, api_key)
+    else:
+        videos = ytdlp_videos(channel_id)
+
+    sync_video_list(videos, full=args.full)
+
+if __name__ == "__main__":
+    main()
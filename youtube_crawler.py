@@ -0,0 +1,290 @@
+"""
+Enumeración de videos de un canal con YouTube Data API v3, cuidando la cuota
+Recorre la playlist de subidas del canal con playlistItems.list (1 unidad por
+página de 50) en vez de search.list (100 unidades por página), pide duración
+y estadísticas con videos.list en lotes de 50 IDs en paralelo, lleva la
+cuenta de la cuota gastada y guarda las respuestas en disco
+
+Uso:
+    crawler = ChannelCrawler(api_key)
+    for video in crawler.iter_videos(channel_id, max_videos=5000):
+        ...
+    print(crawler.stats())
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Coste en unidades de cuota de cada método (https://developers.google.com/youtube/v3/determine_quota_cost)
+QUOTA_COSTS = {
+    'channels.list': 1,
+    'playlistItems.list': 1,
+    'videos.list': 1,
+    'search.list': 100,
+}
+
+DEFAULT_CACHE_DIR = os.getenv('YOUTUBE_CACHE_DIR', './cache/youtube')
+DEFAULT_CACHE_TTL = int(os.getenv('YOUTUBE_CACHE_TTL', '21600'))
+DEFAULT_QUOTA_LIMIT = int(os.getenv('YOUTUBE_QUOTA_LIMIT', '10000'))
+DEFAULT_WORKERS = int(os.getenv('YOUTUBE_CRAWLER_WORKERS', '4'))
+
+_duration_re = re.compile(r"P(?:(\d+)D)?T?(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?")
+
+class QuotaExceededError(Exception):
+    """Se alcanzó el presupuesto de cuota configurado"""
+
+def parse_duration(value):
+    """Duración ISO 8601 de la API ('PT1H2M3S') a segundos"""
+    match = _duration_re.fullmatch(value or '')
+    if not match:
+        return None
+    days, hours, minutes, seconds = (int(part or 0) for part in match.groups())
+    return ((days * 24 + hours) * 60 + minutes) * 60 + seconds
+
+class QuotaTracker:
+    """
+    Cuenta las unidades de cuota gastadas por método
+
+    Args:
+        limit: Presupuesto máximo de unidades para esta ejecución
+    """
+
+    def __init__(self, limit=DEFAULT_QUOTA_LIMIT):
+        self.limit = limit
+        self.spent = 0
+        self.by_method = {}
+        self._lock = threading.Lock()
+
+    def charge(self, method):
+        """Reserva la cuota de una llamada; lanza QuotaExceededError si no alcanza"""
+        cost = QUOTA_COSTS.get(method, 1)
+        with self._lock:
+            if self.spent + cost > self.limit:
+                raise QuotaExceededError(f"Presupuesto de cuota agotado ({self.spent}/{self.limit} unidades)")
+            self.spent += cost
+            self.by_method[method] = self.by_method.get(method, 0) + cost
+
+class ResponseCache:
+    """
+    Caché en disco de respuestas de la API (un archivo JSON por petición)
+
+    Args:
+        directory: Carpeta de la caché
+        ttl: Segundos de validez de cada respuesta
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, ttl=DEFAULT_CACHE_TTL):
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, method, params):
+        key = json.dumps([method, params], sort_keys=True)
+        return self.directory / f"{hashlib.sha256(key.encode('utf-8')).hexdigest()}.json"
+
+    def get(self, method, params):
+        path = self._path(method, params)
+        try:
+            if time.time() - path.stat().st_mtime > self.ttl:
+                return None
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def set(self, method, params, response):
+        path = self._path(method, params)
+        # Escritura atómica: varios threads pueden guardar a la vez
+        temp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(response, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+class ChannelCrawler:
+    """
+    Enumerador de videos de canal con cuota controlada
+
+    Args:
+        api_key: API key de YouTube Data API v3
+        cache_dir: Carpeta de la caché de respuestas (None desactiva la caché)
+        cache_ttl: Validez de la caché en segundos
+        quota_limit: Presupuesto de unidades de cuota
+        max_workers: Lotes de videos.list en paralelo (1 = sin pedir páginas por adelantado)
+    """
+
+    def __init__(self, api_key, cache_dir=DEFAULT_CACHE_DIR, cache_ttl=DEFAULT_CACHE_TTL,
+                 quota_limit=DEFAULT_QUOTA_LIMIT, max_workers=DEFAULT_WORKERS):
+        self.api_key = api_key
+        self.cache = ResponseCache(cache_dir, cache_ttl) if cache_dir else None
+        self.quota = QuotaTracker(quota_limit)
+        self.max_workers = max_workers
+        self.requests = 0
+        self.cache_hits = 0
+        self._local = threading.local()
+
+    def _client(self):
+        """Cliente de la API por thread (httplib2 no es thread-safe)"""
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            from googleapiclient.discovery import build
+            client = build('youtube', 'v3', developerKey=self.api_key, cache_discovery=False)
+            self._local.client = client
+        return client
+
+    def _call(self, method, **params):
+        """
+        Ejecuta un método de la API ('videos.list', ...) usando caché y cuota
+        """
+        if self.cache:
+            cached = self.cache.get(method, params)
+            if cached is not None:
+                self.cache_hits += 1
+                return cached
+
+        self.quota.charge(method)
+        resource, action = method.split('.')
+        response = getattr(getattr(self._client(), resource)(), action)(**params).execute()
+        self.requests += 1
+
+        if self.cache:
+            self.cache.set(method, params, response)
+        return response
+
+    def uploads_playlist_id(self, channel_id):
+        """ID de la playlist de subidas del canal (channels.list, 1 unidad)"""
+        response = self._call('channels.list', part='contentDetails', id=channel_id)
+        items = response.get('items') or []
+        if not items:
+            raise ValueError(f"Canal no encontrado: {channel_id}")
+        return items[0]['contentDetails']['relatedPlaylists']['uploads']
+
+    def iter_playlist_pages(self, playlist_id, max_videos=None):
+        """
+        Páginas de la playlist, de la más reciente a la más antigua
+
+        Yields:
+            Lista de items de playlistItems.list (hasta 50 por página)
+        """
+        page_token = None
+        remaining = max_videos
+        while remaining is None or remaining > 0:
+            params = {
+                'part': 'snippet,contentDetails',
+                'playlistId': playlist_id,
+                'maxResults': 50,
+            }
+            if page_token:
+                params['pageToken'] = page_token
+            response = self._call('playlistItems.list', **params)
+
+            items = response.get('items', [])
+            if remaining is not None:
+                items = items[:remaining]
+                remaining -= len(items)
+            if items:
+                yield items
+
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                break
+
+    def fetch_details(self, video_ids):
+        """
+        Duración y estadísticas de hasta 50 videos (videos.list, 1 unidad)
+
+        Returns:
+            Dict video_id -> item de videos.list
+        """
+        response = self._call(
+            'videos.list',
+            part='snippet,contentDetails,statistics',
+            id=','.join(video_ids),
+            maxResults=50
+        )
+        return {item['id']: item for item in response.get('items', [])}
+
+    @staticmethod
+    def _to_video(playlist_item, details, channel_id):
+        """Registro de video con el formato de data/video_list.json"""
+        snippet = playlist_item['snippet']
+        video = {
+            'video_id': playlist_item['contentDetails']['videoId'],
+            'title': snippet['title'],
+            'published_at': playlist_item['contentDetails'].get('videoPublishedAt') or snippet['publishedAt'],
+            'description': snippet.get('description', '')[:200],
+            'channel_id': channel_id,
+        }
+        if details:
+            statistics = details.get('statistics', {})
+            video['duration_seconds'] = parse_duration(details.get('contentDetails', {}).get('duration'))
+            video['view_count'] = int(statistics['viewCount']) if 'viewCount' in statistics else None
+            video['like_count'] = int(statistics['likeCount']) if 'likeCount' in statistics else None
+        return video
+
+    def iter_videos(self, channel_id, max_videos=None, with_details=True):
+        """
+        Videos del canal, del más reciente al más antiguo
+
+        Mientras se pide la siguiente página de la playlist, los detalles de la
+        anterior se piden en paralelo. Con max_workers=1 no se adelanta nada:
+        la siguiente página solo se pide cuando el consumidor terminó la actual.
+        Los videos privados o eliminados (sin detalles en videos.list) se
+        omiten cuando with_details=True
+
+        Args:
+            channel_id: ID del canal
+            max_videos: Máximo de videos (None = todos)
+            with_details: Pedir duración y estadísticas con videos.list
+
+        Yields:
+            Dicts de video
+        """
+        playlist_id = self.uploads_playlist_id(channel_id)
+        pages = self.iter_playlist_pages(playlist_id, max_videos)
+
+        if not with_details:
+            for items in pages:
+                for item in items:
+                    yield self._to_video(item, None, channel_id)
+            return
+
+        if self.max_workers <= 1:
+            for items in pages:
+                details = self.fetch_details([item['contentDetails']['videoId'] for item in items])
+                for item in items:
+                    item_details = details.get(item['contentDetails']['videoId'])
+                    if item_details is not None:
+                        yield self._to_video(item, item_details, channel_id)
+            return
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = []
+            for items in pages:
+                ids = [item['contentDetails']['videoId'] for item in items]
+                pending.append((items, executor.submit(self.fetch_details, ids)))
+                # Entregar en orden las páginas cuyos detalles ya llegaron
+                while pending and (pending[0][1].done() or len(pending) > self.max_workers):
+                    yield from self._complete_page(*pending.pop(0), channel_id)
+            for items, future in pending:
+                yield from self._complete_page(items, future, channel_id)
+
+    def _complete_page(self, items, future, channel_id):
+        details = future.result()
+        for item in items:
+            item_details = details.get(item['contentDetails']['videoId'])
+            if item_details is not None:
+                yield self._to_video(item, item_details, channel_id)
+
+    def stats(self):
+        """Cuota gastada, peticiones reales y aciertos de caché"""
+        return {
+            'quota_spent': self.quota.spent,
+            'quota_by_method': dict(self.quota.by_method),
+            'requests': self.requests,
+            'cache_hits': self.cache_hits,
+        }